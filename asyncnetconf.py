@@ -0,0 +1,453 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Asyncio version of the "netconf" class.
+
+The RPCs are sent with the asynchronous mode of ncclient and the reply is delivered to an asyncio future by the
+thread reading the SSH transport, so an RPC in flight does not hold any thread. Many RPCs can be pipelined on the same
+NETCONF session and thousands of them, across many devices, can share one event loop. Only the opening and the
+closing of the session, which are blocking in ncclient, run in the default executor.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import asyncio, xmlstream, routemap, payload, community
+from ncclient.operations import GetConfig, EditConfig, Commit, RaiseMode
+from ncclient.operations.rpc import RPCError
+from run import netconf, getWithDefaults
+
+
+class replyEvent(object):
+	"""
+		Replacement of the threading.Event of an ncclient RPC, the reply resolves an asyncio future instead of
+		waking up a thread.
+	"""
+
+	## Class variables
+	loop: object
+	future: object
+
+	def __init__(self, loop: object) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				loop(object)  => The event loop waiting for the reply.
+
+			Returns:
+				object
+		"""
+		self.loop=loop
+		self.future=loop.create_future()
+
+
+	def resolve(self) -> None:
+		"""
+			Resolve the future, called in the event loop.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		if not self.future.done():
+			self.future.set_result(None)
+		return None
+
+
+	def set(self) -> None:
+		"""
+			Called by ncclient in the transport thread when the reply (or an error) is delivered.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		try:
+			self.loop.call_soon_threadsafe(self.resolve)
+		except RuntimeError:
+			## The event loop is already closed, nobody waits for the reply
+			pass
+		return None
+
+
+	def is_set(self) -> bool:
+		return self.future.done()
+
+
+class asyncNetconf(object):
+	"""
+		Execute instructions via NETCONF from an asyncio event loop.
+	"""
+
+	## Class variables
+	netconf: object
+	timeout: float
+	slots: object
+	lock: object
+
+	def __init__(self, host: str, username: str, password: str, port: int = 830, keepalive: int = 30, candidate: bool = False, concurrency: int = 8, timeout: float = 30.0, instrumentation: object = None, retryPolicy: object = None, circuitBreaker: object = None) -> object:
+		"""
+			Constructor that return an instantiation of the object. The NETCONF session is opened by the first request.
+
+			Arguments:
+				host(str)          => FQDN or IP address of the NETCONF host.
+				username(str)      => Username for the NETCONF host.
+				passowrd(str)      => Password for the NETCONF host.
+				port(int)          => Port for the Netconf host (Default = 830)
+				keepalive(int)     => Interval in seconds between SSH keepalive packets, 0 to disable (Default = 30)
+				candidate(bool)    => If it is True and the host supports ":candidate", the writes are done on the candidate datastore and committed (Default = False)
+				concurrency(int)   => Maximum number of RPCs in flight on the session (Default = 8)
+				timeout(float)     => Seconds before a request is cancelled, None to wait forever (Default = 30.0)
+				instrumentation(object) => "instrument.instrumentation" object receiving the timings and the counters, None to disable (Default = None)
+				retryPolicy(object)     => "retry.retryPolicy" object deciding which errors are retried and when, None for retry.DEFAULT_POLICY (Default = None)
+				circuitBreaker(object)  => "retry.circuitBreaker" object of the host, None to disable (Default = None)
+
+			Returns:
+				object
+		"""
+		self.netconf=netconf(host=host, username=username, password=password, port=port, keepalive=keepalive, candidate=candidate, instrumentation=instrumentation, retryPolicy=retryPolicy, circuitBreaker=circuitBreaker)
+		self.timeout=timeout
+		self.slots=asyncio.Semaphore(concurrency)
+		self.lock=asyncio.Lock()
+
+
+	async def __aenter__(self) -> object:
+		"""
+			Open the NETCONF session when entering an "async with" block.
+
+			Returns:
+				object
+		"""
+		await self.connect()
+		return self
+
+
+	async def __aexit__(self, *args: object) -> None:
+		"""
+			Close the NETCONF session when leaving an "async with" block.
+
+			Returns:
+				None
+		"""
+		await self.close()
+
+
+	async def connect(self) -> object:
+		"""
+			Return the ncclient manager, the session is (re)opened in the executor only if there is no live session.
+
+			Arguments:
+				None
+
+			Returns:
+				object
+		"""
+
+		## Reuse the session if it is still connected
+		if self.netconf.manager is not None and self.netconf.manager.connected:
+			return self.netconf.manager
+
+		## Only one coroutine opens the session, the other ones wait for it
+		async with self.lock:
+			return await asyncio.get_running_loop().run_in_executor(None, self.netconf.connect)
+
+
+	async def close(self) -> None:
+		"""
+			Close the NETCONF session if it is opened.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		async with self.lock:
+			await asyncio.get_running_loop().run_in_executor(None, self.netconf.close)
+		return None
+
+
+	async def send(self, operation: object, *args: object, **kwargs: object) -> object:
+		"""
+			Send an RPC without blocking the event loop and return its reply.
+
+			Arguments:
+				operation(object)  => The ncclient operation class (GetConfig, EditConfig, ...)
+				args(object)       => Arguments of the request() method of the operation.
+				kwargs(object)     => Keyword arguments of the request() method of the operation.
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		manager: object=await self.connect()
+		rpc: object=operation(manager._session, device_handler=manager._device_handler, async_mode=True, raise_mode=manager.raise_mode, huge_tree=manager.huge_tree)
+		event: object=replyEvent(asyncio.get_running_loop())
+
+		## The reply wakes up the coroutine instead of a thread
+		rpc._event=event
+		try:
+			with self.netconf.instrumentation.span("netconf.rpc", host=self.netconf.host):
+				rpc.request(*args, **kwargs)
+				await event.future
+		finally:
+			## A cancelled request does not keep its RPC registered until the end of the session
+			if not event.is_set():
+				with rpc._listener._lock:
+					rpc._listener._id2rpc.pop(rpc.id, None)
+
+		## Error that prevented the delivery of the reply
+		if rpc.error is not None:
+			raise rpc.error
+
+		## <rpc-error> in the reply
+		rpc.reply.parse()
+		if rpc.reply.error is not None and manager.raise_mode != RaiseMode.NONE:
+			raise rpc.reply.error
+
+		return rpc.reply
+
+
+	async def execute(self, operation: object, *args: object, timeout: float = None, idempotent: bool = True, **kwargs: object) -> object:
+		"""
+			Execute an RPC and return its reply. The number of RPCs in flight is bounded by the concurrency of the
+			object, the request is cancelled after the timeout (reduced to the time left before the deadline of the
+			"netconf" object) and the retryable errors are retried as decided by its retry policy. A write which is
+			not idempotent is only retried after an <rpc-error> (ex: "lock-denied").
+
+			Arguments:
+				operation(object)  => The ncclient operation class (GetConfig, EditConfig, ...)
+				args(object)       => Arguments of the request() method of the operation.
+				timeout(float)     => Seconds before the request is cancelled, None to use the timeout of the object (Default = None)
+				idempotent(bool)   => If it is False (ex: EditConfig, Commit), the request is not sent again after a timeout or a dropped transport (Default = True)
+				kwargs(object)     => Keyword arguments of the request() method of the operation.
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		nc: object=self.netconf
+
+		async def attempt() -> object:
+
+			## Variables
+			seconds: float=timeout if timeout is not None else self.timeout
+
+			## The deadline is read at each attempt, the retries have less time
+			if nc.deadline is not None and nc.deadline.remaining() is not None:
+				seconds=nc.deadline.remaining() if seconds is None else nc.deadline.limit(seconds)
+			return await asyncio.wait_for(self.send(operation, *args, **kwargs), seconds)
+
+		async def reset(error: Exception) -> None:
+			## The session is dead or in an unknown state, the next attempt opens a new one
+			if not isinstance(error, RPCError):
+				await self.close()
+
+		async with self.slots:
+			## Nothing is sent while the session is opened, so it can be retried for any request
+			if not idempotent:
+				await nc.retryPolicy.callAsync(self.connect, breaker=nc.circuitBreaker, deadline=nc.deadline, reset=reset)
+			return await nc.retryPolicy.callAsync(attempt, breaker=nc.circuitBreaker, deadline=nc.deadline, reset=reset, idempotent=idempotent)
+
+
+	async def getConfig(self, filter: str, timeout: float = None) -> str:
+		"""
+			Read a part of the running configuration and return the XML. The default values are trimmed from the reply
+			if the host supports the "trim" mode of ":with-defaults".
+
+			Arguments:
+				filter(object)   => The subtree filter or an XPath filter (see payload.getFilter)
+				timeout(float)   => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				str
+		"""
+
+		## Variables
+		manager: object=await self.connect()
+
+		return (await self.execute(GetConfig, source='running', filter=filter, with_defaults=getWithDefaults(manager.server_capabilities), timeout=timeout)).data_xml
+
+
+	async def editConfig(self, config: str, timeout: float = None) -> None:
+		"""
+			Send a <config> payload with an <edit-config>, committed right away on the candidate datastore.
+
+			Arguments:
+				config(str)      => The <config> payload.
+				timeout(float)   => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		manager: object=await self.connect()
+		target: str="candidate" if self.netconf.candidate and ":candidate" in manager.server_capabilities else "running"
+
+		## NETCONF request
+		await self.execute(EditConfig, target=target, config=config, timeout=timeout, idempotent=False)
+		if target == "candidate":
+			await self.execute(Commit, timeout=timeout, idempotent=False)
+
+		## The cached route-map table is not up to date anymore
+		self.netconf.invalidate()
+
+		## End the function
+		return None
+
+
+	async def getRouteMapByName(self, routeMapName: str="routeMapName", timeout: float = None) -> str:
+		"""
+			Read the route-map information and return the XML.
+
+			Arguments:
+				routeMapName(str)  => Name for the route-map to search (Default = "routeMapName")
+				timeout(float)     => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				str
+		"""
+
+		## Variables
+		manager: object=await self.connect()
+
+		return await self.getConfig(payload.getFilter(routeMapName, xpath=":xpath" in manager.server_capabilities), timeout=timeout)
+
+
+	async def setRouteMap(self, routeMapName: str, routeMapSequence: int=10, routeMapOperation: str="permit", delete: bool=False, timeout: float = None) -> None:
+		"""
+			Create or delete a route-map sequence.
+
+			Arguments:
+				routeMapName(str)       => Name of the route-map to update.
+				routeMapSequence(int)   => Sequence number of the route-map (Default = 10)
+				routeMapOperation(str)  => Action to apply to the route-map [permit|deny] (Default = permit)
+				delete(bool)            => If it is True, only the sequence is deleted, the route-map is deleted with its last sequence; If it is False, the route-map information will be merged (Default = False)
+				timeout(float)          => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		manager: object
+		sequences: dict
+
+		if not delete:
+			await self.editConfig(payload.getRouteMapConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, routeMapOperation=routeMapOperation), timeout=timeout)
+			return None
+
+		## The sequence numbers of the route-map are read to know if it is the last sequence
+		manager=await self.connect()
+		sequences=routemap.parseRouteMaps(await self.getConfig(payload.getFilter(routeMapName, fields=[payload.SEQUENCE_NUMBER], xpath=":xpath" in manager.server_capabilities), timeout=timeout)).get(routeMapName, {})
+		if set(sequences) - {int(routeMapSequence)}:
+			await self.editConfig(payload.getSequenceConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, routeMapOperation=routeMapOperation, delete=True), timeout=timeout)
+		else:
+			await self.editConfig(payload.getRouteMapConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, routeMapOperation=routeMapOperation, delete=True), timeout=timeout)
+		return None
+
+
+	async def deleteRouteMap(self, routeMapName: str, timeout: float = None) -> None:
+		"""
+			Delete a route-map with all its sequences.
+
+			Arguments:
+				routeMapName(str)  => Name of the route-map to delete.
+				timeout(float)     => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				None
+		"""
+		await self.editConfig(payload.getRouteMapConfig(routeMapName=routeMapName, delete=True), timeout=timeout)
+		return None
+
+
+	async def getRouteMapBGPCommunity(self, routeMapName: str, routeMapSequence: int=10, canonical: bool=False, timeout: float = None) -> list:
+		"""
+			Get the list BGP Community from a route-map.
+
+			Arguments:
+				routeMapName(str)     => Name of the route-map to get the BGP community list.
+				routeMapSequence(int) => Sequence number where to get the set instructions (Default = 10)
+				canonical(bool)       => If it is True, the communities are returned sorted, deduplicated and in the "AA:NN" format (Default = False)
+				timeout(float)        => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				list
+		"""
+
+		## Variables
+		manager: object=await self.connect()
+		xml: str=await self.getConfig(payload.getFilter(routeMapName, routeMapSequence, fields=[payload.COMMUNITY_LIST], xpath=":xpath" in manager.server_capabilities), timeout=timeout)
+		communities: list
+
+		with self.netconf.instrumentation.span("netconf.parse", host=self.netconf.host):
+			communities=xmlstream.getCommunities(xml, routeMapName, routeMapSequence)
+
+		if canonical:
+			return community.canonicalCommunities(communities)
+		return communities
+
+
+	async def setRouteMapBGPCommunity(self, routeMapName: str, routeMapSequence: int=10, BGPCommunity: str="1:1", delete: bool=False, timeout: float = None) -> None:
+		"""
+			Add the BGP community value to the targeted route-map/sequence.
+
+			Arguments:
+				routeMapName(str)       => Name of the route-map to update.
+				routeMapSequence(int)   => Sequence number of the route-map (Default = 10)
+				BGPCommunity(str)       => BGP community to manipulate
+				delete(bool)            => If it is True, the BGP community is removed from the route-map; If it is False, the BGP Community information will be merged (Default = False)
+				timeout(float)          => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				None
+		"""
+		await self.editConfig(payload.getCommunityConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, BGPCommunity=BGPCommunity, delete=delete), timeout=timeout)
+		return None
+
+
+	async def getBGPCommunityNewFormat(self, timeout: float = None) -> bool:
+		"""
+			Get the information if the system uses the "new-format" to display the BGP Community (True = uses the new-format)
+
+			Arguments:
+				timeout(float)  => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				bool
+		"""
+		## Variables
+		manager: object=await self.connect()
+		xml: str=await self.getConfig(payload.getFilter(routeMaps=False, newFormat=True, xpath=":xpath" in manager.server_capabilities), timeout=timeout)
+
+		with self.netconf.instrumentation.span("netconf.parse", host=self.netconf.host):
+			return xmlstream.hasNode(xml, "new-format")
+
+
+	async def setBGPCommunityNewFormat(self, delete: bool=False, timeout: float = None) -> None:
+		"""
+			Add (or remove) the bgp-community new-format.
+
+			Arguments:
+				delete(bool)     => If True, it will remove the new-format configuraiton
+				timeout(float)   => Seconds before the request is cancelled (Default = None)
+
+			Returns:
+				None
+		"""
+		await self.editConfig(payload.getNewFormatConfig(delete=delete), timeout=timeout)
+		return None
@@ -0,0 +1,458 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Audit the route-maps and the BGP communities of a fleet against a set of policy rules.
+
+The route-maps and "ip bgp-community new-format" of each device are read with a single <get-config>, in parallel on
+the devices of the fleet. The route-maps are flattened into NumPy arrays (one row per community) and every rule is
+checked with array operations on the whole device at once. The violations of a device are yielded as soon as the
+device is audited, without waiting for the rest of the fleet.
+
+A rule is a dict, ex:
+	{"name": "no-decimal", "check": "decimal", "when": {"newFormat": True}}
+	{"name": "no-blackhole", "check": "forbidden", "communities": ["65535:666"], "routeMaps": "^CUSTOMER-"}
+	{"name": "tagged", "check": "required", "communities": ["65000:1"], "operations": ["permit"]}
+	{"name": "small", "check": "maxCommunities", "limit": 32, "severity": "warning"}
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import re, numpy, routemap, xmlstream, payload, community
+
+
+class auditModel(object):
+	"""
+		Route-maps of a device flattened into arrays: one row per sequence and one row per community.
+	"""
+
+	## Class variables
+	names: list
+	newFormat: bool
+	sequenceMaps: object
+	sequenceNumbers: object
+	operations: object
+	counts: object
+	communityRows: object
+	texts: list
+	values: object
+	decimal: object
+
+	def __init__(self, routeMaps: dict, newFormat: bool) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				routeMaps(dict)   => Index of the route-maps (see routemap.parseRouteMaps)
+				newFormat(bool)   => True if "ip bgp-community new-format" is configured.
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		sequenceMaps: list=[]
+		sequenceNumbers: list=[]
+		operations: list=[]
+		counts: list=[]
+		texts: list=[]
+		index: int
+		routeMapName: str
+		routeMapSequence: int
+		sequence: dict
+
+		self.names=list(routeMaps)
+		self.newFormat=bool(newFormat)
+
+		for index, routeMapName in enumerate(self.names):
+			for routeMapSequence, sequence in routeMaps[routeMapName].items():
+				sequenceMaps.append(index)
+				sequenceNumbers.append(routeMapSequence)
+				operations.append(sequence["operation"])
+				counts.append(len(sequence["communities"]))
+				texts.extend(sequence["communities"])
+
+		self.sequenceMaps=numpy.array(sequenceMaps, dtype=numpy.int32)
+		self.sequenceNumbers=numpy.array(sequenceNumbers, dtype=numpy.int64)
+		self.operations=numpy.array(operations, dtype=object)
+		self.counts=numpy.array(counts, dtype=numpy.int64)
+		self.communityRows=numpy.repeat(numpy.arange(len(counts), dtype=numpy.int64), self.counts)
+		self.texts=texts
+		self.values=community.parseCommunities(texts)
+		self.decimal=numpy.fromiter((text.strip().isdigit() for text in texts), dtype=bool, count=len(texts))
+
+
+	def __len__(self) -> int:
+		return len(self.sequenceNumbers)
+
+
+	def getLocation(self, row: int) -> tuple:
+		"""
+			Return the route-map name and the sequence number of a sequence row.
+
+			Arguments:
+				row(int)  => Index of the sequence.
+
+			Returns:
+				tuple => (routeMapName, routeMapSequence)
+		"""
+		return self.names[self.sequenceMaps[row]], int(self.sequenceNumbers[row])
+
+
+class auditRule(object):
+	"""
+		Policy rule checked on every sequence in its scope.
+	"""
+
+	## Class variables
+	name: str
+	check: object
+	severity: str
+	description: str
+	routeMaps: object
+	operations: tuple
+	when: dict
+	communities: object
+	limit: int
+
+	def __init__(self, name: str, check: str, severity: str="error", description: str=None, routeMaps: str=None, operations: list=None, when: dict=None, communities: list=None, limit: int=None) -> object:
+		"""
+			Constructor that return an instantiation of the object, the rule is validated and compiled once.
+
+			Arguments:
+				name(str)           => Name of the rule, reported in its violations.
+				check(str)          => Name of the check (see CHECKS)
+				severity(str)       => Severity reported in the violations (Default = "error")
+				description(str)    => Message of the violations, None for the message of the check (Default = None)
+				routeMaps(str)      => Regular expression the route-map names must match, None for all (Default = None)
+				operations(list)    => Operations of the sequences checked ("permit", "deny"), None for all (Default = None)
+				when(dict)          => Conditions on the device, ex: {"newFormat": True}, None for always (Default = None)
+				communities(list)   => Communities of the "forbidden" and "required" checks (Default = None)
+				limit(int)          => Maximum of the "maxCommunities" check (Default = None)
+
+			Returns:
+				object
+		"""
+		if check not in CHECKS:
+			raise ValueError("Unknown check {} in the rule {}, expected one of {}".format(check, name, ", ".join(CHECKS)))
+		if check in ("forbidden", "required") and not communities:
+			raise ValueError("The rule {} needs communities".format(name))
+		if check == "maxCommunities" and limit is None:
+			raise ValueError("The rule {} needs a limit".format(name))
+		if set(when or {}) - {"newFormat"}:
+			raise ValueError("Unknown condition {} in the rule {}".format(", ".join(set(when) - {"newFormat"}), name))
+
+		self.name=name
+		self.check=CHECKS[check]
+		self.severity=severity
+		self.description=description if description is not None else MESSAGES[check]
+		self.routeMaps=re.compile(routeMaps) if routeMaps is not None else None
+		self.operations=tuple(operations) if operations is not None else None
+		self.when=dict(when or {})
+		self.communities=numpy.unique(community.parseCommunities(list(communities or [])))
+		self.limit=limit
+
+
+	def getScope(self, model: object) -> object:
+		"""
+			Return the mask of the sequences checked by the rule, all False if the device does not meet the conditions.
+
+			Arguments:
+				model(object)  => The "auditModel" object.
+
+			Returns:
+				numpy.ndarray => bool, one value per sequence
+		"""
+
+		## Variables
+		scope: object=numpy.ones(len(model), dtype=bool)
+
+		if "newFormat" in self.when and bool(self.when["newFormat"]) != model.newFormat:
+			return ~scope
+		if self.routeMaps is not None:
+			scope&=numpy.array([self.routeMaps.search(name) is not None for name in model.names], dtype=bool)[model.sequenceMaps]
+		if self.operations is not None:
+			scope&=numpy.isin(model.operations, self.operations)
+		return scope
+
+
+	def evaluate(self, model: object) -> list:
+		"""
+			Return the violations of the rule on a device.
+
+			Arguments:
+				model(object)  => The "auditModel" object.
+
+			Returns:
+				list => [{"device": None, "rule": str, "severity": str, "routeMapName": str, "routeMapSequence": int, "communities": list, "message": str}]
+		"""
+		return self.check(self, model, self.getScope(model))
+
+
+	def getViolation(self, model: object, row: int, communities: list) -> dict:
+		"""
+			Return a violation of the rule on a sequence.
+
+			Arguments:
+				model(object)       => The "auditModel" object.
+				row(int)            => Index of the sequence.
+				communities(list)   => Communities at fault.
+
+			Returns:
+				dict
+		"""
+
+		## Variables
+		routeMapName: str
+		routeMapSequence: int
+
+		routeMapName, routeMapSequence=model.getLocation(row)
+		return {"device": None, "rule": self.name, "severity": self.severity, "routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "communities": communities, "message": self.description}
+
+
+	def groupBySequence(self, model: object, mask: object) -> list:
+		"""
+			Return a violation per sequence holding communities selected by the mask.
+
+			Arguments:
+				model(object)  => The "auditModel" object.
+				mask(object)   => Mask of the communities at fault, one value per community.
+
+			Returns:
+				list
+		"""
+
+		## Variables
+		indexes: object=numpy.flatnonzero(mask)
+		rows: object=model.communityRows[indexes]
+		starts: object=numpy.flatnonzero(numpy.concatenate(([True], rows[1:] != rows[:-1]))) if len(rows) else rows
+		bounds: list=starts.tolist() + [len(indexes)]
+		position: int
+
+		return [self.getViolation(model, int(rows[bounds[position]]), [model.texts[index] for index in indexes[bounds[position]:bounds[position + 1]]]) for position in range(len(starts))]
+
+
+def checkDecimal(rule: object, model: object, scope: object) -> list:
+	"""
+		Communities written as a 32-bit decimal value.
+
+		Arguments:
+			rule(object)    => The "auditRule" object.
+			model(object)   => The "auditModel" object.
+			scope(object)   => Mask of the sequences checked.
+
+		Returns:
+			list
+	"""
+	return rule.groupBySequence(model, model.decimal & scope[model.communityRows])
+
+
+def checkDuplicate(rule: object, model: object, scope: object) -> list:
+	"""
+		Equivalent communities set several times by the same sequence ("655370" and "10:10").
+
+		Arguments:
+			rule(object)    => The "auditRule" object.
+			model(object)   => The "auditModel" object.
+			scope(object)   => Mask of the sequences checked.
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	keys: object=(model.communityRows.astype(numpy.uint64) << numpy.uint64(32)) | model.values
+	inverse: object
+	counts: object
+
+	_, inverse, counts=numpy.unique(keys, return_inverse=True, return_counts=True)
+	return rule.groupBySequence(model, (counts[inverse] > 1) & scope[model.communityRows])
+
+
+def checkForbidden(rule: object, model: object, scope: object) -> list:
+	"""
+		Communities which must not be set.
+
+		Arguments:
+			rule(object)    => The "auditRule" object.
+			model(object)   => The "auditModel" object.
+			scope(object)   => Mask of the sequences checked.
+
+		Returns:
+			list
+	"""
+	return rule.groupBySequence(model, numpy.isin(model.values, rule.communities) & scope[model.communityRows])
+
+
+def checkRequired(rule: object, model: object, scope: object) -> list:
+	"""
+		Communities which must be set by every sequence, the missing ones are reported.
+
+		Arguments:
+			rule(object)    => The "auditRule" object.
+			model(object)   => The "auditModel" object.
+			scope(object)   => Mask of the sequences checked.
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	missing: object=numpy.tile(scope[:, None], (1, len(rule.communities)))
+	texts: list=community.formatCommunities(rule.communities, model.newFormat)
+	present: object=numpy.searchsorted(rule.communities, model.values)
+	found: object=present < len(rule.communities)
+	row: int
+	column: int
+
+	## A community of the rule found in a sequence is not missing anymore
+	found[found]=rule.communities[present[found]] == model.values[found]
+	missing[model.communityRows[found], present[found]]=False
+
+	return [rule.getViolation(model, row, [texts[column] for column in numpy.flatnonzero(missing[row])]) for row in numpy.flatnonzero(missing.any(axis=1)).tolist()]
+
+
+def checkMaxCommunities(rule: object, model: object, scope: object) -> list:
+	"""
+		Sequences setting more communities than the limit.
+
+		Arguments:
+			rule(object)    => The "auditRule" object.
+			model(object)   => The "auditModel" object.
+			scope(object)   => Mask of the sequences checked.
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	row: int
+
+	return [rule.getViolation(model, row, []) for row in numpy.flatnonzero(scope & (model.counts > rule.limit)).tolist()]
+
+
+## Checks available to the rules and their default message
+CHECKS: dict={
+	"decimal": checkDecimal,
+	"duplicate": checkDuplicate,
+	"forbidden": checkForbidden,
+	"required": checkRequired,
+	"maxCommunities": checkMaxCommunities,
+}
+MESSAGES: dict={
+	"decimal": "Community written as a 32-bit decimal value",
+	"duplicate": "Equivalent community set several times",
+	"forbidden": "Forbidden community",
+	"required": "Required community missing",
+	"maxCommunities": "Too many communities",
+}
+
+## Rules used when none is given: the states demonstrated by main()
+DEFAULT_RULES: list=[
+	{"name": "decimal-with-new-format", "check": "decimal", "when": {"newFormat": True}, "severity": "warning", "description": "Community written as a 32-bit decimal value while new-format is configured"},
+	{"name": "duplicate-community", "check": "duplicate"},
+]
+
+
+def compileRules(rules: list=None) -> list:
+	"""
+		Return the "auditRule" objects of a rule set, the rules already compiled are kept as they are.
+
+		Arguments:
+			rules(list)  => List of dict (see auditRule) or "auditRule" objects, None for DEFAULT_RULES (Default = None)
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	rule: object
+
+	return [rule if isinstance(rule, auditRule) else auditRule(**rule) for rule in (rules if rules is not None else DEFAULT_RULES)]
+
+
+def collect(nc: object) -> object:
+	"""
+		Read the route-maps and "ip bgp-community new-format" of a device with a single <get-config>. Its filter
+		(payload.getFilter) selects the keys, the operation and the communities of the sequences and the new-format
+		node, not the whole route-map table.
+
+		Arguments:
+			nc(object)  => The "netconf" object.
+
+		Returns:
+			object => The "auditModel" object
+	"""
+
+	## Variables
+	xml: str=nc.getConfig(fields=[payload.SEQUENCE_OPERATION, payload.COMMUNITY_LIST], newFormat=True)
+
+	with nc.instrumentation.span("netconf.parse", host=nc.host):
+		return auditModel(routemap.parseRouteMaps(xml), xmlstream.hasNode(xml, "new-format"))
+
+
+def evaluate(model: object, rules: list=None) -> list:
+	"""
+		Return the violations of the rules on a device.
+
+		Arguments:
+			model(object)  => The "auditModel" object.
+			rules(list)    => The rules (see compileRules), None for DEFAULT_RULES (Default = None)
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	rule: object
+
+	return [violation for rule in compileRules(rules) for violation in rule.evaluate(model)]
+
+
+def auditDevice(nc: object, rules: list=None) -> list:
+	"""
+		Read the route-maps of a device and return their violations.
+
+		Arguments:
+			nc(object)    => The "netconf" object.
+			rules(list)   => The rules (see compileRules), None for DEFAULT_RULES (Default = None)
+
+		Returns:
+			list
+	"""
+	return evaluate(collect(nc), rules)
+
+
+def auditFleet(routers: object, rules: list=None, devices: list=None, timeout: float=None) -> object:
+	"""
+		Audit the devices of a fleet in parallel and yield the violations of each device as soon as it is done. A
+		device which cannot be audited yields a single "device-error" violation.
+
+		Arguments:
+			routers(object)  => The "fleet.fleet" object.
+			rules(list)      => The rules (see compileRules), None for DEFAULT_RULES (Default = None)
+			devices(list)    => Name of the devices to target, None for the whole fleet (Default = None)
+			timeout(float)   => Seconds given to the whole audit (Default = None)
+
+		Returns:
+			object => Generator of violations (see auditRule.evaluate), the "device" key holds the name of the device
+	"""
+
+	## Variables
+	compiled: list=compileRules(rules)
+	name: str
+	result: dict
+	violation: dict
+
+	for name, result in routers.stream(lambda nc: auditDevice(nc, compiled), devices=devices, timeout=timeout):
+		if result["error"] is not None:
+			yield {"device": name, "rule": "device-error", "severity": "error", "routeMapName": None, "routeMapSequence": None, "communities": [], "message": repr(result["error"])}
+			continue
+		for violation in result["result"]:
+			violation["device"]=name
+			yield violation
@@ -0,0 +1,234 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Merge several NETCONF <config> payloads into a single <edit-config>.
+
+The payloads are merged node by node: the route-map entries are matched on their <name>, the sequences on their
+<seq_no>, the community values on their text and the other nodes on their tag. A node written with "merge" (or
+without operation) is merged child by child into the node written before, so two writes to the same route-map keep
+both. Only a "remove", "delete", "replace" or "create" supersedes the node written before, and a merge written after
+a removed node turns it into a "replace". The merged payload has the same effect as the payloads sent one after the
+other.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+from lxml import etree
+
+## Key of the YANG lists (node name => name of the key leaf)
+LIST_KEYS: dict={
+	"route-map": "name",
+	"route-map-without-order-seq": "seq_no",
+}
+
+## Operations superseding the node written before (RFC 6241, section 7.2)
+SUPERSEDING_OPERATIONS: tuple=("remove", "delete", "replace", "create")
+
+## Operations removing the node
+REMOVING_OPERATIONS: tuple=("remove", "delete")
+
+## YANG leaf-lists, each value is a distinct node
+LEAF_LISTS: set={
+	"community-list",
+}
+
+## Parser dropping the indentation of the templates
+PARSER: object=etree.XMLParser(remove_blank_text=True)
+
+
+def getKey(element: object) -> tuple:
+	"""
+		Return the key identifying a node among its siblings.
+
+		Arguments:
+			element(object)  => The lxml element.
+
+		Returns:
+			tuple
+	"""
+
+	## Variables
+	name: str=etree.QName(element).localname
+	key: object
+
+	if name in LIST_KEYS:
+		key=element.find("{*}" + LIST_KEYS[name])
+		return (element.tag, key.text if key is not None else None)
+	if name in LEAF_LISTS:
+		return (element.tag, element.text)
+	return (element.tag,)
+
+
+def mergeElement(target: object, source: object, index: dict) -> None:
+	"""
+		Merge the source node into the target node.
+
+		Arguments:
+			target(object)  => Node of the merged tree.
+			source(object)  => Node of the payload to merge.
+			index(dict)     => Cache of the children of the merged tree ({parent: {key: child}})
+
+		Returns:
+			None
+	"""
+
+	## Variables
+	children: dict
+	child: object
+	existing: object
+	key: tuple
+
+	## A superseding operation on the source node, or a node removed before, is replaced by the source node
+	if source.get("operation") in SUPERSEDING_OPERATIONS or target.get("operation") in REMOVING_OPERATIONS:
+		if source.get("operation") not in SUPERSEDING_OPERATIONS and len(source) > 0:
+			## Remove then merge is the same as a replace (a leaf is simply written again)
+			source.set("operation", "replace")
+		index.pop(target, None)
+		target.getparent().replace(target, source)
+		index.setdefault(source.getparent(), {})[getKey(source)]=source
+		return None
+
+	## A leaf takes the value of the source
+	if len(source) == 0:
+		target.text=source.text
+		return None
+
+	## Build the index of the children of the target once
+	if target not in index:
+		index[target]={getKey(child): child for child in target}
+	children=index[target]
+
+	## Merge every child of the source
+	for child in list(source):
+		key=getKey(child)
+		existing=children.get(key)
+		if existing is None:
+			target.append(child)
+			children[key]=child
+		else:
+			mergeElement(existing, child, index)
+
+	## End the function
+	return None
+
+
+def mergeConfig(configs: list) -> str:
+	"""
+		Merge several <config> payloads into a single one.
+
+		Arguments:
+			configs(list)  => List of <config> payloads (str)
+
+		Returns:
+			str
+	"""
+
+	## Variables
+	root: object=None
+	index: dict={}
+	config: str
+	tree: object
+
+	for config in configs:
+		tree=etree.fromstring(config.strip(), PARSER)
+		if root is None:
+			root=tree
+		else:
+			mergeElement(root, tree, index)
+
+	return etree.tostring(root).decode()
+
+
+def getSequences(configs: list, routeMapName: str, sequences: set) -> set:
+	"""
+		Return the sequence numbers of a route-map once the <config> payloads are applied in order.
+
+		Arguments:
+			configs(list)       => List of <config> payloads (str)
+			routeMapName(str)   => Name of the route-map.
+			sequences(set)      => Sequence numbers of the route-map before the payloads.
+
+		Returns:
+			set
+	"""
+
+	## Variables
+	config: str
+	routeMap: object
+	sequence: object
+
+	sequences=set(sequences)
+	for config in configs:
+		for routeMap in etree.fromstring(config.strip(), PARSER).iterfind("{*}native/{*}route-map"):
+			if routeMap.findtext("{*}name") != routeMapName:
+				continue
+			## A removed or replaced route-map loses the sequences written before
+			if routeMap.get("operation") in REMOVING_OPERATIONS + ("replace",):
+				sequences=set()
+			if routeMap.get("operation") in REMOVING_OPERATIONS:
+				continue
+			for sequence in routeMap.iterfind("{*}route-map-without-order-seq"):
+				if sequence.get("operation") in REMOVING_OPERATIONS:
+					sequences.discard(int(sequence.findtext("{*}seq_no")))
+				else:
+					sequences.add(int(sequence.findtext("{*}seq_no")))
+
+	return sequences
+
+
+class configBatch(object):
+	"""
+		Collect the writes done on a "netconf" object and send them in a single <edit-config>.
+
+		Usage:
+			with nc.batch():
+				nc.setRouteMap(...)
+				nc.setRouteMapBGPCommunity(...)
+	"""
+
+	## Class variables
+	netconf: object
+	configs: list
+	outer: bool
+
+	def __init__(self, netconf: object) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				netconf(object)  => The "netconf" object to batch.
+
+			Returns:
+				object
+		"""
+		self.netconf=netconf
+		self.configs=[]
+		self.outer=False
+
+
+	def __enter__(self) -> object:
+		## A nested batch is part of the outer batch
+		if self.netconf.pending is None:
+			self.netconf.pending=self.configs
+			self.outer=True
+		return self
+
+
+	def __exit__(self, exceptionType: object, *args: object) -> None:
+		if not self.outer:
+			return None
+
+		self.netconf.pending=None
+
+		## Send the merged payload only if the block succeeded
+		if exceptionType is None and self.configs:
+			self.netconf.editConfig(mergeConfig(self.configs))
+
+		## End the function
+		return None
@@ -0,0 +1,755 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Benchmarks of the "netconf" class against the local stand-in NETCONF server (see simulator.py).
+
+Usage:
+	python3 ./benchmark.py [--only session,parse] [--parse-size MB]        => Compare the optimisations with the previous behaviour
+	python3 ./benchmark.py suite [--quick] [--only table,fleet] [output]   => Run the workflow suite, print or write the JSON results
+	python3 ./benchmark.py compare [--tolerance 0.2] baseline current      => List the regressions between two JSON results
+	python3 ./benchmark.py --help                                          => Describe all the options
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import sys, os, time, json, logging, argparse, tempfile, subprocess, multiprocessing, numpy, xmltodict, simulator, xmlstream, payload, routemap, fleet
+from run import netconf, ssh
+
+
+## Comparisons of the optimisations and suites of the workflows, in the order they run
+BENCHMARKS: tuple=("session", "batch", "parse", "payload")
+SUITES: tuple=("latency", "bulk", "table", "fleet", "demo")
+
+
+def benchmarkSession(iterations: int=20, latency: float=0.0) -> dict:
+	"""
+		Compare a new NETCONF session per request against a single session reused for all the requests.
+
+		Arguments:
+			iterations(int)  => Number of requests sent in each mode (Default = 20)
+			latency(float)   => Latency in seconds added by the server before each message (Default = 0.0)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	nc: object
+	start: float
+	iteration: int
+
+	with simulator.netconfServer(latency=latency) as server:
+
+		## One session per request (the previous behaviour)
+		start=time.perf_counter()
+		for iteration in range(iterations):
+			nc=netconf(host=server.host, username="admin", password="admin", port=server.port)
+			nc.getBGPCommunityNewFormat()
+			nc.close()
+		results["perCall"]=time.perf_counter() - start
+
+		## One session reused for all the requests
+		start=time.perf_counter()
+		with netconf(host=server.host, username="admin", password="admin", port=server.port) as nc:
+			for iteration in range(iterations):
+				nc.getBGPCommunityNewFormat()
+		results["reused"]=time.perf_counter() - start
+
+	return results
+
+
+def benchmarkBatch(communities: int=1000, latency: float=0.0) -> dict:
+	"""
+		Compare one <edit-config> per community against a batch sending all the communities in a single <edit-config>.
+
+		Arguments:
+			communities(int)  => Number of communities to add (Default = 1000)
+			latency(float)    => Latency in seconds added by the server before each message (Default = 0.0)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	nc: object
+	start: float
+	rpcCount: int
+	community: int
+
+	with simulator.netconfServer(latency=latency) as server:
+		with netconf(host=server.host, username="admin", password="admin", port=server.port) as nc:
+			nc.connect()
+
+			## One <edit-config> per community
+			rpcCount=server.rpcCount
+			start=time.perf_counter()
+			for community in range(communities):
+				nc.setRouteMapBGPCommunity(routeMapName="BENCHMARK", BGPCommunity="65000:{}".format(community))
+			results["single"]={"seconds": time.perf_counter() - start, "rpc": server.rpcCount - rpcCount}
+
+			## All the communities in a single <edit-config>
+			rpcCount=server.rpcCount
+			start=time.perf_counter()
+			with nc.batch():
+				for community in range(communities):
+					nc.setRouteMapBGPCommunity(routeMapName="BENCHMARK", BGPCommunity="65000:{}".format(community))
+			results["batch"]={"seconds": time.perf_counter() - start, "rpc": server.rpcCount - rpcCount}
+
+	return results
+
+
+def generateReply(path: str, size: int) -> str:
+	"""
+		Write a synthetic <get-config> reply of about "size" bytes with prefix-lists and route-maps.
+
+		Arguments:
+			path(str)  => Path of the file to write.
+			size(int)  => Approximative size of the reply in bytes.
+
+		Returns:
+			str => Name of the last route-map of the reply.
+	"""
+
+	## Variables
+	routeMapName: str=""
+	index: int=0
+	sequence: int
+
+	with open(path, "w") as reply:
+		reply.write('<data xmlns="urn:ietf:params:xml:ns:netconf:base:1.0"><native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native"><ip><prefix-list>')
+		while reply.tell() < size // 2:
+			reply.write('<prefixes><name>PL_{index}</name><seq><no>10</no><action>permit</action><ip>10.{a}.{b}.0/24</ip></seq></prefixes>'.format(index=index, a=index // 256 % 256, b=index % 256))
+			index+=1
+		reply.write('</prefix-list></ip>')
+		index=0
+		while reply.tell() < size:
+			routeMapName="RM_{}".format(index)
+			reply.write('<route-map><name>{}</name>'.format(routeMapName))
+			for sequence in (10, 20, 30):
+				reply.write('<route-map-without-order-seq xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-route-map"><seq_no>{sequence}</seq_no><operation>permit</operation><set><community><community-well-known><community-list>{index}:{sequence}</community-list><community-list>655370</community-list></community-well-known></community></set></route-map-without-order-seq>'.format(sequence=sequence, index=index % 65536))
+			reply.write('</route-map>')
+			index+=1
+		reply.write('</native></data>')
+
+	return routeMapName
+
+
+def getMemory() -> dict:
+	"""
+		Return the current and peak RSS of the process in MB, read from /proc/self/status.
+
+		Arguments:
+			None
+
+		Returns:
+			dict => {"VmRSS": float, "VmHWM": float}
+	"""
+
+	## Variables
+	memory: dict={}
+	line: str
+
+	with open("/proc/self/status") as status:
+		for line in status:
+			if line.startswith(("VmRSS:", "VmHWM:")):
+				memory[line.split(":")[0]]=int(line.split()[1]) / 1024
+
+	return memory
+
+
+def measureParse(path: str, routeMapName: str, method: str, results: object) -> None:
+	"""
+		Parse the reply with one method and put the parse time and the peak RSS increase in the results queue.
+		Run in its own process so the peak RSS of each method is measured separately.
+
+		Arguments:
+			path(str)          => Path of the reply.
+			routeMapName(str)  => Route-map to search.
+			method(str)        => "xmltodict" or "stream"
+			results(object)    => multiprocessing queue receiving the result.
+
+		Returns:
+			None
+	"""
+
+	## Variables
+	xml: str
+	baseline: float
+	start: float
+	response: dict
+
+	## The reply is already in memory, as the data_xml of ncclient
+	with open(path) as reply:
+		xml=reply.read()
+
+	## Reset the peak RSS so the reading of the file is not counted
+	with open("/proc/self/clear_refs", "w") as clearRefs:
+		clearRefs.write("5")
+	baseline=getMemory()["VmRSS"]
+
+	start=time.perf_counter()
+	if method == "xmltodict":
+		response=xmltodict.parse(xml)
+		[routeMap for routeMap in response['data']['native']['route-map'] if routeMap['name'] == routeMapName][0]['route-map-without-order-seq'][0]['set']['community']['community-well-known']['community-list']
+	else:
+		xmlstream.getCommunities(xml, routeMapName, 10)
+	results.put({"seconds": time.perf_counter() - start, "peakMB": getMemory()["VmHWM"] - baseline})
+
+	## End the function
+	return None
+
+
+def benchmarkParse(size: int=100 * 1024 * 1024) -> dict:
+	"""
+		Compare xmltodict with the incremental parsing on a synthetic <get-config> reply.
+
+		Arguments:
+			size(int)  => Size of the reply in bytes (Default = 100 MB)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	queue: object=multiprocessing.Queue()
+	process: object
+	routeMapName: str
+	method: str
+	path: str
+
+	with tempfile.TemporaryDirectory() as directory:
+		path=os.path.join(directory, "reply.xml")
+		routeMapName=generateReply(path, size)
+		for method in ("xmltodict", "stream"):
+			process=multiprocessing.Process(target=measureParse, args=(path, routeMapName, method, queue))
+			process.start()
+			results[method]=queue.get()
+			process.join()
+
+	return results
+
+
+## Previous template of setRouteMapBGPCommunity, kept for the comparison
+LEGACY_COMMUNITY_CONFIG: str="""
+			<config>
+				<native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
+					<route-map>
+						<name>{routeMapName}</name>
+						<route-map-without-order-seq xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-route-map">
+							<seq_no>{routeMapSequence}</seq_no>
+							<set>
+								<community>
+									<community-well-known>
+										<community-list operation="{operation}">{BGPCommunity}</community-list>
+									</community-well-known>
+								</community>
+							</set>
+						</route-map-without-order-seq>
+					</route-map>
+				</native>
+			</config>
+		"""
+
+
+def benchmarkPayload(count: int=100000) -> dict:
+	"""
+		Compare the build time and the size of the community payloads built with the previous templates, with the
+		payload module one by one and with its bulk mode.
+
+		Arguments:
+			count(int)  => Number of payloads to build (Default = 100000)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	communities: list=["65000:{}".format(community) for community in range(count)]
+	payloads: list
+	start: float
+	BGPCommunity: str
+
+	start=time.perf_counter()
+	payloads=[LEGACY_COMMUNITY_CONFIG.format(routeMapName="BENCHMARK", routeMapSequence=10, BGPCommunity=BGPCommunity, operation="merge") for BGPCommunity in communities]
+	results["legacy"]={"seconds": time.perf_counter() - start, "bytes": len(payloads[0].encode())}
+
+	start=time.perf_counter()
+	payloads=[payload.getCommunityConfig(routeMapName="BENCHMARK", routeMapSequence=10, BGPCommunity=BGPCommunity) for BGPCommunity in communities]
+	results["payload"]={"seconds": time.perf_counter() - start, "bytes": len(payloads[0].encode())}
+
+	start=time.perf_counter()
+	payloads=payload.getCommunityConfigs(routeMapName="BENCHMARK", routeMapSequence=10, BGPCommunities=communities)
+	results["bulk"]={"seconds": time.perf_counter() - start, "bytes": len(payloads[0].encode())}
+
+	return results
+
+
+def resetPeakMemory() -> float:
+	"""
+		Reset the peak RSS of the process and return the current RSS in MB (Linux only).
+
+		Arguments:
+			None
+
+		Returns:
+			float => None if the peak cannot be reset
+	"""
+	try:
+		with open("/proc/self/clear_refs", "w") as clearRefs:
+			clearRefs.write("5")
+		return getMemory()["VmRSS"]
+	except (OSError, KeyError):
+		return None
+
+
+def getPercentiles(samples: list) -> dict:
+	"""
+		Return the statistics of a list of latencies.
+
+		Arguments:
+			samples(list)  => Latencies in seconds.
+
+		Returns:
+			dict => {"samples": int, "mean": float, "p50": float, "p95": float, "p99": float, "max": float}
+	"""
+
+	## Variables
+	values: object=numpy.asarray(samples, dtype=float)
+
+	return {
+		"samples": int(values.size),
+		"mean": float(values.mean()),
+		"p50": float(numpy.percentile(values, 50)),
+		"p95": float(numpy.percentile(values, 95)),
+		"p99": float(numpy.percentile(values, 99)),
+		"max": float(values.max()),
+	}
+
+
+def measure(servers: list, operation: object, iterations: int) -> dict:
+	"""
+		Run an operation several times and return its latencies with the RPCs, the bytes exchanged with the servers
+		and the peak RSS increase.
+
+		Arguments:
+			servers(list)      => The "simulator.netconfServer" objects used by the operation.
+			operation(object)  => Function without argument to measure.
+			iterations(int)    => Number of times the operation is run.
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	samples: list=[]
+	rpcCount: int=sum(server.rpcCount for server in servers)
+	bytesSent: int=sum(server.bytesReceived for server in servers)
+	bytesReceived: int=sum(server.bytesSent for server in servers)
+	baseline: float=resetPeakMemory()
+	start: float
+	iteration: int
+	results: dict
+
+	for iteration in range(iterations):
+		start=time.perf_counter()
+		operation()
+		samples.append(time.perf_counter() - start)
+
+	## The bytes sent by the client are the bytes received by the servers
+	results=getPercentiles(samples)
+	results["rpc"]=(sum(server.rpcCount for server in servers) - rpcCount) / iterations
+	results["bytesSent"]=(sum(server.bytesReceived for server in servers) - bytesSent) / iterations
+	results["bytesReceived"]=(sum(server.bytesSent for server in servers) - bytesReceived) / iterations
+	results["peakMB"]=getMemory()["VmHWM"] - baseline if baseline is not None else None
+	return results
+
+
+def suiteLatency(iterations: int=50, latency: float=0.0) -> dict:
+	"""
+		Latency of the session opening and of a single get and set.
+
+		Arguments:
+			iterations(int)  => Number of samples per operation (Default = 50)
+			latency(float)   => Latency in seconds added by the server before each message (Default = 0.0)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	nc: object
+
+	with simulator.netconfServer(latency=latency) as server:
+		nc=netconf(host=server.host, username="admin", password="admin", port=server.port)
+		results["connect"]=measure([server], lambda: (nc.close(), nc.connect()), iterations)
+		results["get"]=measure([server], lambda: nc.getRouteMapBGPCommunity(routeMapName="BENCHMARK"), iterations)
+		results["set"]=measure([server], lambda: nc.setRouteMapBGPCommunity(routeMapName="BENCHMARK", BGPCommunity="65000:1"), iterations)
+		nc.close()
+
+	return results
+
+
+def suiteBulk(sizes: tuple=(10, 100, 10000), repeats: int=5, latency: float=0.0) -> dict:
+	"""
+		Latency of a batch adding, then removing, many communities.
+
+		Arguments:
+			sizes(tuple)     => Number of communities of each batch (Default = (10, 100, 10000))
+			repeats(int)     => Number of samples per size (Default = 5)
+			latency(float)   => Latency in seconds added by the server before each message (Default = 0.0)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	size: int
+	communities: list
+	nc: object
+
+	def setCommunities(communities: list, delete: bool) -> None:
+		with nc.batch():
+			for BGPCommunity in communities:
+				nc.setRouteMapBGPCommunity(routeMapName="BENCHMARK", BGPCommunity=BGPCommunity, delete=delete)
+
+	with simulator.netconfServer(latency=latency) as server:
+		with netconf(host=server.host, username="admin", password="admin", port=server.port) as nc:
+			for size in sizes:
+				communities=["65000:{}".format(community) for community in range(size)]
+				results["add-{}".format(size)]=measure([server], lambda: setCommunities(communities, False), repeats)
+				results["remove-{}".format(size)]=measure([server], lambda: setCommunities(communities, True), repeats)
+
+	return results
+
+
+def suiteTable(routeMaps: int=1000, repeats: int=5, latency: float=0.0) -> dict:
+	"""
+		Latency of the fetch of the whole route-map table, split between the RPC and the parsing of the reply.
+
+		Arguments:
+			routeMaps(int)   => Number of route-maps of the device, with 10 sequences of 10 communities (Default = 1000)
+			repeats(int)     => Number of samples (Default = 5)
+			latency(float)   => Latency in seconds added by the server before each message (Default = 0.0)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	replies: list=[]
+	nc: object
+
+	with simulator.netconfServer(latency=latency, model=simulator.deviceModel().generate(routeMaps=routeMaps)) as server:
+		with netconf(host=server.host, username="admin", password="admin", port=server.port) as nc:
+			results["fetch"]=measure([server], lambda: replies.append(nc.execute(lambda manager: manager.get_config(source='running', filter=payload.getRouteMapTableFilter()).data_xml)), repeats)
+			results["parse"]=measure([server], lambda: routemap.parseRouteMaps(replies[-1]), repeats)
+			results["table"]=measure([server], lambda: nc.getRouteMapTable().load(), repeats)
+
+	return results
+
+
+def suiteFleet(sizes: tuple=(1, 10, 100), repeats: int=5, latency: float=0.0) -> dict:
+	"""
+		Latency of a get fanned out to a fleet of devices, each device is a separate simulator.
+
+		Arguments:
+			sizes(tuple)     => Number of devices of each fleet (Default = (1, 10, 100))
+			repeats(int)     => Number of samples per size (Default = 5)
+			latency(float)   => Latency in seconds added by the server before each message (Default = 0.0)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	results: dict={}
+	servers: list
+	size: int
+	index: int
+	devices: object
+
+	for size in sizes:
+		servers=[simulator.netconfServer(latency=latency).start() for index in range(size)]
+		try:
+			with fleet.fleet([{"host": server.host, "port": server.port, "username": "admin", "password": "admin", "name": str(server.port)} for server in servers], sessionsPerDevice=1) as devices:
+				## The first fan-out opens the sessions
+				results["connect-{}".format(size)]=measure(servers, lambda: devices.getRouteMapBGPCommunity(routeMapName="BENCHMARK"), 1)
+				results["get-{}".format(size)]=measure(servers, lambda: devices.getRouteMapBGPCommunity(routeMapName="BENCHMARK"), repeats)
+		finally:
+			for server in servers:
+				server.stop()
+
+	return results
+
+
+def suiteDemo(repeats: int=3, latency: float=0.0) -> dict:
+	"""
+		Latency of the NETCONF and CLI calls of the main() demonstration, against a simulator reproducing the bug.
+
+		Arguments:
+			repeats(int)     => Number of samples (Default = 3)
+			latency(float)   => Latency in seconds added by the server before each message (Default = 0.0)
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	routeMapName: str="TEST_REPLICATION_BUG_NETCONF"
+	nc: object
+	sshSession: object
+	step: object
+
+	def demo() -> None:
+		## Initialization
+		nc.setBGPCommunityNewFormat(delete=True)
+		nc.deleteRouteMap(routeMapName=routeMapName)
+
+		## Demo #1 to #6, each step is followed by a NETCONF and a CLI read
+		for step in (
+			lambda: nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="655370"),
+			lambda: nc.setBGPCommunityNewFormat(),
+			lambda: nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10"),
+			lambda: nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10", delete=True),
+			lambda: (nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10"), nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="655370", delete=True), nc.setBGPCommunityNewFormat(delete=True)),
+			lambda: nc.setBGPCommunityNewFormat(),
+			lambda: nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10"),
+		):
+			step()
+			nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+			sshSession.getRouteMapConfig(routeMapName)
+
+	with simulator.netconfServer(latency=latency, encodingBug=True) as server:
+		with netconf(host=server.host, username="admin", password="admin", port=server.port) as nc, ssh(host=server.host, username="admin", password="admin", port=server.port) as sshSession:
+			return {"demo": measure([server], demo, repeats)}
+
+
+def getCommit() -> str:
+	"""
+		Return the git commit of the working tree, None outside of a git repository.
+
+		Arguments:
+			None
+
+		Returns:
+			str
+	"""
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def runSuite(quick: bool=False, latency: float=0.0, suites: list=None) -> dict:
+	"""
+		Run the benchmark suite of the route-map / community workflows.
+
+		Arguments:
+			quick(bool)      => If it is True, use smaller sizes and fewer samples (Default = False)
+			latency(float)   => Latency in seconds added by the server before each message (Default = 0.0)
+			suites(list)     => Names of the suites to run (see SUITES), None for all of them (Default = None)
+
+		Returns:
+			dict => {"commit": str, "python": str, "timestamp": float, "latency": float, "results": {suite: {scenario: dict}}}
+	"""
+
+	## Variables
+	runners: dict={
+		"latency": lambda: suiteLatency(iterations=10 if quick else 50, latency=latency),
+		"bulk": lambda: suiteBulk(sizes=(10, 100, 1000) if quick else (10, 100, 10000), repeats=2 if quick else 5, latency=latency),
+		"table": lambda: suiteTable(routeMaps=100 if quick else 1000, repeats=2 if quick else 5, latency=latency),
+		"fleet": lambda: suiteFleet(sizes=(1, 10) if quick else (1, 10, 100), repeats=2 if quick else 5, latency=latency),
+		"demo": lambda: suiteDemo(repeats=1 if quick else 3, latency=latency),
+	}
+	name: str
+
+	return {
+		"commit": getCommit(),
+		"python": sys.version.split()[0],
+		"timestamp": time.time(),
+		"latency": latency,
+		"results": {name: runners[name]() for name in SUITES if suites is None or name in suites},
+	}
+
+
+def compareResults(baseline: dict, current: dict, tolerance: float=0.2) -> list:
+	"""
+		Return the regressions between two outputs of runSuite(): a latency (p50, p95) slower by more than the
+		tolerance, or more RPCs or bytes per operation.
+
+		Arguments:
+			baseline(dict)    => Output of runSuite() for the reference commit.
+			current(dict)     => Output of runSuite() for the commit to check.
+			tolerance(float)  => Accepted relative increase of the latencies (Default = 0.2)
+
+		Returns:
+			list => [{"suite": str, "scenario": str, "metric": str, "baseline": float, "current": float}]
+	"""
+
+	## Variables
+	regressions: list=[]
+	suite: str
+	scenarios: dict
+	scenario: str
+	before: dict
+	after: dict
+	metric: str
+
+	for suite, scenarios in current["results"].items():
+		for scenario, after in scenarios.items():
+			before=baseline["results"].get(suite, {}).get(scenario)
+			if before is None:
+				continue
+			for metric in ("p50", "p95"):
+				if after[metric] > before[metric] * (1 + tolerance):
+					regressions.append({"suite": suite, "scenario": scenario, "metric": metric, "baseline": before[metric], "current": after[metric]})
+			for metric in ("rpc", "bytesSent", "bytesReceived"):
+				if after[metric] > before[metric]:
+					regressions.append({"suite": suite, "scenario": scenario, "metric": metric, "baseline": before[metric], "current": after[metric]})
+
+	return regressions
+
+
+def getList(text: str) -> list:
+	"""
+		Return the names of a comma separated list given on the command line.
+
+		Arguments:
+			text(str)  => The comma separated list.
+
+		Returns:
+			list
+	"""
+	return [name.strip() for name in text.split(",") if name.strip()]
+
+
+def getParser() -> object:
+	"""
+		Return the parser of the command line.
+
+		Arguments:
+			None
+
+		Returns:
+			object
+	"""
+
+	## Variables
+	only: object=argparse.ArgumentParser(add_help=False)
+	parser: object
+	commands: object
+	suite: object
+	compare: object
+
+	## "--only" is accepted before or after "suite", without default the value given before is not overwritten by the subparser
+	only.add_argument("--only", type=getList, default=argparse.SUPPRESS, metavar="NAMES", help="Comma separated comparisons to run among {}, or suites to run among {} with \"suite\" (Default = all)".format(", ".join(BENCHMARKS), ", ".join(SUITES)))
+
+	parser=argparse.ArgumentParser(description="Benchmarks of the \"netconf\" class against the local simulator (simulator.py), no device is needed. Without command, the optimisations are compared with the previous behaviour.", parents=[only])
+	commands=parser.add_subparsers(dest="command", metavar="{suite,compare}")
+	parser.add_argument("--parse-size", type=int, default=100, metavar="MB", help="Size of the reply of the parse comparison in MB (Default = 100)")
+
+	suite=commands.add_parser("suite", help="Run the workflow suite and print or write the JSON results", parents=[only])
+	suite.add_argument("--quick", action="store_true", help="Use smaller sizes and fewer samples")
+	suite.add_argument("--latency", type=float, default=0.0, metavar="SECONDS", help="Latency added by the simulator before each message (Default = 0.0)")
+	suite.add_argument("output", nargs="?", help="File receiving the JSON results (Default = standard output)")
+
+	compare=commands.add_parser("compare", help="List the regressions between two JSON results, the exit code is 1 if there is any")
+	compare.add_argument("--tolerance", type=float, default=0.2, help="Latency increase tolerated, as a fraction (Default = 0.2)")
+	compare.add_argument("baseline", help="JSON results of the reference commit")
+	compare.add_argument("current", help="JSON results to check")
+
+	return parser
+
+
+def main(*args: str) -> None:
+	"""
+		Run the benchmarks and display the results.
+
+		Arguments:
+			args(str) => The command line arguments, see getParser() or "--help".
+
+		Returns:
+			None
+	"""
+
+	## Variables
+	parser: object=getParser()
+	options: object=parser.parse_args(args)
+	results: dict
+	regressions: list
+	regression: dict
+	output: str
+	name: str
+
+	## The names are checked before anything runs, all the suites or comparisons run without "--only"
+	options.only=getattr(options, "only", list(SUITES if options.command == "suite" else BENCHMARKS))
+	for name in [name for name in options.only if name not in (SUITES if options.command == "suite" else BENCHMARKS)]:
+		parser.error("unknown benchmark {}".format(name))
+
+	## Hide the SSH errors logged when the sessions are torn down
+	logging.getLogger("paramiko").addHandler(logging.NullHandler())
+
+	## Workflow suite, the JSON results can be compared between commits
+	if options.command == "suite":
+		results=runSuite(quick=options.quick, latency=options.latency, suites=options.only)
+		output=json.dumps(results, indent=2, sort_keys=True)
+		if options.output:
+			with open(options.output, "w") as file:
+				file.write(output + "\n")
+		else:
+			print(output)
+		return None
+
+	## Regressions between two results of the suite, the exit code is 1 if there is any
+	if options.command == "compare":
+		with open(options.baseline) as baseline, open(options.current) as current:
+			regressions=compareResults(json.load(baseline), json.load(current), tolerance=options.tolerance)
+		for regression in regressions:
+			print("    {suite}/{scenario} {metric}: {baseline:.6g} => {current:.6g}".format(**regression))
+		sys.exit(1 if regressions else 0)
+
+	## Comparisons of the optimisations with the previous behaviour
+	if "session" in options.only:
+		print("\n ==== Session reuse ====\n")
+		results=benchmarkSession()
+		print("    Per-call connect : {:.3f}s".format(results["perCall"]))
+		print("    Reused session   : {:.3f}s".format(results["reused"]))
+		print("    Speed-up         : {:.1f}x".format(results["perCall"] / results["reused"]))
+
+	if "batch" in options.only:
+		print("\n ==== Batched edit-config ====\n")
+		results=benchmarkBatch()
+		print("    One RPC per community : {:.3f}s ({} RPC)".format(results["single"]["seconds"], results["single"]["rpc"]))
+		print("    Batch                 : {:.3f}s ({} RPC)".format(results["batch"]["seconds"], results["batch"]["rpc"]))
+		print("    Speed-up              : {:.1f}x".format(results["single"]["seconds"] / results["batch"]["seconds"]))
+
+	if "parse" in options.only:
+		print("\n ==== Parsing of a {} MB reply ====\n".format(options.parse_size))
+		results=benchmarkParse(size=options.parse_size * 1024 * 1024)
+		print("    xmltodict   : {:.3f}s, peak RSS +{:.0f} MB".format(results["xmltodict"]["seconds"], results["xmltodict"]["peakMB"]))
+		print("    Incremental : {:.3f}s, peak RSS +{:.0f} MB".format(results["stream"]["seconds"], results["stream"]["peakMB"]))
+
+	if "payload" in options.only:
+		print("\n ==== Payload building (100,000 community payloads) ====\n")
+		results=benchmarkPayload()
+		print("    Previous templates : {:.3f}s, {} bytes per payload".format(results["legacy"]["seconds"], results["legacy"]["bytes"]))
+		print("    Payload module     : {:.3f}s, {} bytes per payload".format(results["payload"]["seconds"], results["payload"]["bytes"]))
+		print("    Bulk mode          : {:.3f}s, {} bytes per payload".format(results["bulk"]["seconds"], results["bulk"]["bytes"]))
+	return None
+
+
+if __name__ == '__main__':
+	main(*sys.argv[1:])
@@ -0,0 +1,279 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Persistent cache of the capabilities and of the quirks of the devices.
+
+The capabilities advertised in the <hello> of a device, the revision of its YANG modules and the quirks detected on it
+(ex: the community encoding bug) are kept in a JSON file. An entry is keyed by host and port and tied to the software
+version of the device, given by the revision of the Cisco-IOS-XE-native module (or a fingerprint of the capabilities
+if the module is not advertised): when the version changes, the entry is rebuilt and the quirks are detected again.
+The "netconf" class answers supports() from the cache, so the code path of a device is known before any connection.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import os, json, time, hashlib, tempfile, threading
+from urllib.parse import urlparse, parse_qs
+from ncclient.capabilities import Capabilities
+
+## Default location of the cache
+CACHE_PATH: str=os.path.join(os.path.expanduser("~"), ".cache", "netconf-route-map", "capabilities.json")
+
+## Module giving the software version of IOS-XE
+VERSION_MODULE: str="Cisco-IOS-XE-native"
+
+## Capabilities recorded as features of the device
+FEATURES: dict={
+	"candidate": ":candidate",
+	"confirmed-commit": ":confirmed-commit",
+	"with-defaults": ":with-defaults",
+	"notification": ":notification",
+	"xpath": ":xpath",
+}
+
+
+def getModules(capabilities: list) -> dict:
+	"""
+		Return the YANG modules advertised in the capabilities with their revision.
+
+		Arguments:
+			capabilities(list)  => Capability URIs of the <hello>
+
+		Returns:
+			dict => {module: revision or None}
+	"""
+
+	## Variables
+	modules: dict={}
+	capability: str
+	query: dict
+
+	for capability in capabilities:
+		query=parse_qs(urlparse(capability).query)
+		if "module" in query:
+			modules[query["module"][0]]=query.get("revision", [None])[0]
+
+	return modules
+
+
+def getVersion(capabilities: list) -> str:
+	"""
+		Return the software version of a device: the revision of its Cisco-IOS-XE-native module, or a fingerprint of
+		its capabilities if the module is not advertised.
+
+		Arguments:
+			capabilities(list)  => Capability URIs of the <hello>
+
+		Returns:
+			str
+	"""
+
+	## Variables
+	revision: str=getModules(capabilities).get(VERSION_MODULE)
+
+	if revision:
+		return VERSION_MODULE + "@" + revision
+	return "sha1:" + hashlib.sha1("\n".join(sorted(capabilities)).encode()).hexdigest()
+
+
+class capabilityCache(object):
+	"""
+		JSON file with an entry per device: {"version", "capabilities", "modules", "features", "quirks", "updated"}
+	"""
+
+	## Class variables
+	path: str
+	entries: dict
+	lock: object
+
+	def __init__(self, path: str=CACHE_PATH) -> object:
+		"""
+			Constructor that return an instantiation of the object. The file is read once, then written after every change.
+
+			Arguments:
+				path(str)  => Path of the JSON file (Default = ~/.cache/netconf-route-map/capabilities.json)
+
+			Returns:
+				object
+		"""
+		self.path=path
+		self.entries={}
+		self.lock=threading.Lock()
+
+		## A missing or corrupted file is an empty cache
+		try:
+			with open(path) as cache:
+				self.entries=json.load(cache)
+		except (OSError, ValueError):
+			pass
+
+
+	def getKey(self, host: str, port: int) -> str:
+		return "{}:{}".format(host, port)
+
+
+	def save(self) -> None:
+		"""
+			Write the cache to the file, through a temporary file so a reader never sees a partial file. The lock
+			must be held by the caller.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		directory: str=os.path.dirname(os.path.abspath(self.path))
+		descriptor: int
+		temporary: str
+
+		os.makedirs(directory, exist_ok=True)
+		descriptor, temporary=tempfile.mkstemp(dir=directory, prefix=".capabilities-")
+		with os.fdopen(descriptor, "w") as cache:
+			json.dump(self.entries, cache, indent=1, sort_keys=True)
+		os.replace(temporary, self.path)
+		return None
+
+
+	def get(self, host: str, port: int) -> dict:
+		"""
+			Return the entry of a device, None if the device is not in the cache.
+
+			Arguments:
+				host(str)  => FQDN or IP address of the device.
+				port(int)  => NETCONF port of the device.
+
+			Returns:
+				dict
+		"""
+		with self.lock:
+			return self.entries.get(self.getKey(host, port))
+
+
+	def getCapabilities(self, host: str, port: int) -> object:
+		"""
+			Return the cached capabilities of a device as an ncclient Capabilities object (which understands the
+			abbreviations like ":candidate"), None if the device is not in the cache.
+
+			Arguments:
+				host(str)  => FQDN or IP address of the device.
+				port(int)  => NETCONF port of the device.
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		entry: dict=self.get(host, port)
+
+		if entry is None:
+			return None
+		return Capabilities(entry["capabilities"])
+
+
+	def update(self, host: str, port: int, capabilities: list) -> dict:
+		"""
+			Record the capabilities of a device after a <hello>. The file is written only if the capabilities changed,
+			and the quirks are dropped if the software version changed.
+
+			Arguments:
+				host(str)           => FQDN or IP address of the device.
+				port(int)           => NETCONF port of the device.
+				capabilities(list)  => Capability URIs of the <hello>
+
+			Returns:
+				dict => The entry of the device.
+		"""
+
+		## Variables
+		key: str=self.getKey(host, port)
+		version: str=getVersion(capabilities)
+		entry: dict
+		advertised: object=Capabilities(capabilities)
+		name: str
+		capability: str
+
+		with self.lock:
+			entry=self.entries.get(key)
+			if entry is not None and entry["capabilities"] == sorted(capabilities):
+				return entry
+
+			entry={
+				"version": version,
+				"capabilities": sorted(capabilities),
+				"modules": getModules(capabilities),
+				"features": {name: capability in advertised for name, capability in FEATURES.items()},
+				"quirks": entry["quirks"] if entry is not None and entry["version"] == version else {},
+				"updated": time.time(),
+			}
+			self.entries[key]=entry
+			self.save()
+
+		return entry
+
+
+	def getQuirk(self, host: str, port: int, name: str) -> object:
+		"""
+			Return a quirk detected on a device, None if it has not been detected yet.
+
+			Arguments:
+				host(str)  => FQDN or IP address of the device.
+				port(int)  => NETCONF port of the device.
+				name(str)  => Name of the quirk (ex: "encodingBug")
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		entry: dict=self.get(host, port)
+
+		if entry is None:
+			return None
+		return entry["quirks"].get(name)
+
+
+	def setQuirk(self, host: str, port: int, name: str, value: object) -> None:
+		"""
+			Record a quirk detected on a device, the device must already be in the cache.
+
+			Arguments:
+				host(str)       => FQDN or IP address of the device.
+				port(int)       => NETCONF port of the device.
+				name(str)       => Name of the quirk (ex: "encodingBug")
+				value(object)   => Value of the quirk, any JSON value.
+
+			Returns:
+				None
+		"""
+		with self.lock:
+			if self.getKey(host, port) not in self.entries:
+				raise ValueError("The device {}:{} is not in the capability cache".format(host, port))
+			self.entries[self.getKey(host, port)]["quirks"][name]=value
+			self.save()
+		return None
+
+
+	def invalidate(self, host: str, port: int) -> None:
+		"""
+			Drop the entry of a device.
+
+			Arguments:
+				host(str)  => FQDN or IP address of the device.
+				port(int)  => NETCONF port of the device.
+
+			Returns:
+				None
+		"""
+		with self.lock:
+			if self.entries.pop(self.getKey(host, port), None) is not None:
+				self.save()
+		return None
@@ -0,0 +1,244 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Parse, validate and normalise the BGP standard communities.
+
+A standard community is a 32-bit value which IOS-XE displays either as a decimal number ("655370") or, with
+"ip bgp-community new-format", as "AA:NN" ("10:10"). Both encodings are converted to the same 32-bit integer so the
+values can be compared and deduplicated. The bulk functions work on NumPy arrays to convert millions of values in a
+single call.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import numpy
+
+## Well-known communities (RFC 1997 and RFC 8326)
+WELL_KNOWN: dict={
+	"internet": 0x00000000,
+	"gshut": 0xFFFF0000,
+	"no-export": 0xFFFFFF01,
+	"no-advertise": 0xFFFFFF02,
+	"local-AS": 0xFFFFFF03,
+}
+WELL_KNOWN_NAMES: dict={value: name for name, value in WELL_KNOWN.items()}
+
+## Highest 32-bit value
+MAXIMUM: int=0xFFFFFFFF
+
+## Powers of ten used by the bulk parsing (the float64 values are exact up to 15 digits)
+POWERS: object=10.0 ** numpy.arange(16)
+
+
+def parseCommunity(BGPCommunity: str) -> int:
+	"""
+		Return the 32-bit value of a community.
+
+		Arguments:
+			BGPCommunity(str)  => Community as "AA:NN", decimal or well-known name.
+
+		Returns:
+			int
+	"""
+
+	## Variables
+	value: str=str(BGPCommunity).strip()
+	high: str
+	low: str
+
+	## Well-known community
+	if value in WELL_KNOWN:
+		return WELL_KNOWN[value]
+
+	## New-format "AA:NN"
+	if ":" in value:
+		high, low=value.split(":", 1)
+		if not (high.isdigit() and low.isdigit()) or int(high) > 0xFFFF or int(low) > 0xFFFF:
+			raise ValueError("Invalid BGP community '{}'".format(BGPCommunity))
+		return (int(high) << 16) | int(low)
+
+	## Decimal
+	if not value.isdigit() or int(value) > MAXIMUM:
+		raise ValueError("Invalid BGP community '{}'".format(BGPCommunity))
+	return int(value)
+
+
+def formatCommunity(value: int, newFormat: bool=True) -> str:
+	"""
+		Return the text of a community, the well-known communities are returned by name.
+
+		Arguments:
+			value(int)       => 32-bit value of the community.
+			newFormat(bool)  => If it is True, return "AA:NN", otherwise the decimal value (Default = True)
+
+		Returns:
+			str
+	"""
+	if value in WELL_KNOWN_NAMES:
+		return WELL_KNOWN_NAMES[value]
+	if newFormat:
+		return "{}:{}".format(value >> 16, value & 0xFFFF)
+	return str(value)
+
+
+def canonicalCommunity(BGPCommunity: str, newFormat: bool=True) -> str:
+	"""
+		Return the canonical text of a community.
+
+		Arguments:
+			BGPCommunity(str)  => Community as "AA:NN", decimal or well-known name.
+			newFormat(bool)    => If it is True, return "AA:NN", otherwise the decimal value (Default = True)
+
+		Returns:
+			str
+	"""
+	return formatCommunity(parseCommunity(BGPCommunity), newFormat)
+
+
+def parseCommunities(BGPCommunities: object) -> object:
+	"""
+		Bulk version of parseCommunity(): return the 32-bit values of many communities at once.
+
+		The texts are joined in a single buffer of ASCII codes and the numbers are computed with array operations on
+		the whole buffer. The few texts which are not plain numbers (well-known names, spaces) are parsed one by one.
+
+		Arguments:
+			BGPCommunities(object)  => List or NumPy array of communities ("AA:NN", decimal or well-known name)
+
+		Returns:
+			numpy.ndarray => uint32 values, in the same order
+	"""
+
+	## Variables
+	count: int=len(BGPCommunities)
+	data: object=None
+	separator: object
+	colon: object
+	isDigit: object
+	token: object
+	colons: object
+	starts: object
+	colonCount: object
+	keys: object
+	lengths: object
+	rank: object
+	exponent: object
+	values: object
+	high: object
+	low: object
+	newFormat: object
+	valid: object
+	result: object
+	index: int
+
+	if count == 0:
+		return numpy.zeros(0, dtype=numpy.uint32)
+
+	## All the communities in a single buffer, one per line
+	try:
+		data=numpy.frombuffer(("\n".join(BGPCommunities) + "\n").encode("ascii"), dtype=numpy.uint8)
+	except (TypeError, UnicodeEncodeError):
+		pass
+	if data is None or numpy.count_nonzero(data == 10) != count:
+		## Not only ASCII texts, parse them one by one
+		return numpy.array([parseCommunity(BGPCommunity) for BGPCommunity in BGPCommunities], dtype=numpy.uint32)
+
+	## Index of the community of each character and position of the colons
+	separator=data == 10
+	colon=data == 58
+	isDigit=(data >= 48) & (data <= 57)
+	token=numpy.cumsum(separator, dtype=numpy.int32) - separator
+	colons=numpy.cumsum(colon, dtype=numpy.int32)
+	starts=numpy.concatenate(([0], colons[separator][:-1]))
+	colonCount=colons[separator] - starts
+
+	## Each community has two parts (before and after the colon), the value of a part is the sum of its digits
+	## multiplied by their power of ten
+	keys=(token * 2 + ((colons - starts[token]) > 0))[isDigit]
+	lengths=numpy.bincount(keys, minlength=2 * count)
+	rank=numpy.arange(keys.size) - (numpy.cumsum(lengths) - lengths)[keys]
+	exponent=numpy.minimum(lengths[keys] - rank - 1, len(POWERS) - 1)
+	values=numpy.bincount(keys, weights=(data[isDigit] - 48) * POWERS[exponent], minlength=2 * count)
+	high=values[0::2]
+	low=values[1::2]
+
+	## Validate the values
+	newFormat=colonCount == 1
+	valid=(numpy.bincount(token[~(isDigit | colon | separator)], minlength=count) == 0) & (colonCount <= 1)
+	valid&=(lengths[0::2] > 0) & (lengths[0::2] < len(POWERS)) & (lengths[1::2] < len(POWERS))
+	valid&=numpy.where(newFormat, (lengths[1::2] > 0) & (high <= 0xFFFF) & (low <= 0xFFFF), high <= MAXIMUM)
+	result=numpy.where(valid, numpy.where(newFormat, high * 65536 + low, high), 0).astype(numpy.uint32)
+
+	## Parse the other texts one by one (raise ValueError if they are not valid)
+	for index in numpy.flatnonzero(~valid):
+		result[index]=parseCommunity(BGPCommunities[index])
+
+	return result
+
+
+def formatCommunities(values: object, newFormat: bool=True) -> list:
+	"""
+		Bulk version of formatCommunity(): return the text of many communities at once.
+
+		Arguments:
+			values(object)   => List or NumPy array of 32-bit values.
+			newFormat(bool)  => If it is True, return "AA:NN", otherwise the decimal value (Default = True)
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	array: object=numpy.asarray(values, dtype=numpy.uint32)
+	texts: list
+	index: int
+
+	if newFormat:
+		texts=list(map("{}:{}".format, (array >> 16).tolist(), (array & 0xFFFF).tolist()))
+	else:
+		texts=list(map(str, array.tolist()))
+
+	## Well-known communities are returned by name
+	for index in numpy.flatnonzero(numpy.isin(array, list(WELL_KNOWN_NAMES))):
+		texts[index]=WELL_KNOWN_NAMES[int(array[index])]
+
+	return texts
+
+
+def uniqueCommunities(BGPCommunities: object) -> object:
+	"""
+		Return the sorted and deduplicated 32-bit values of many communities, the equivalent encodings of the same
+		community ("10:10" and "655370") are counted once.
+
+		Arguments:
+			BGPCommunities(object)  => List or NumPy array of communities ("AA:NN", decimal or well-known name)
+
+		Returns:
+			numpy.ndarray => uint32 values
+	"""
+
+	## Variables
+	values: object=numpy.sort(parseCommunities(BGPCommunities))
+
+	## Keep the first value of each run of equal values
+	return numpy.concatenate((values[:1], values[1:][values[1:] != values[:-1]]))
+
+
+def canonicalCommunities(BGPCommunities: object, newFormat: bool=True) -> list:
+	"""
+		Return the sorted, deduplicated and canonical text of many communities.
+
+		Arguments:
+			BGPCommunities(object)  => List or NumPy array of communities ("AA:NN", decimal or well-known name)
+			newFormat(bool)         => If it is True, return "AA:NN", otherwise the decimal value (Default = True)
+
+		Returns:
+			list
+	"""
+	return formatCommunities(uniqueCommunities(BGPCommunities), newFormat)
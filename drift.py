@@ -0,0 +1,179 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Detect the differences between the route-maps seen through NETCONF and the route-maps shown by the CLI.
+
+This is the comparison done by eye in main(): both views are collected at the same time, parsed into the same
+route-map index, the communities are normalised (so "655370" and "10:10" are the same value) and the differences are
+returned as a list of dict which can be dumped as JSON.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+from concurrent.futures import ThreadPoolExecutor
+import routemap, community
+from run import netconf, ssh
+
+
+def compareRouteMaps(netconfRouteMaps: dict, cliRouteMaps: dict) -> list:
+	"""
+		Return the differences between two route-map indexes.
+
+		Arguments:
+			netconfRouteMaps(dict)  => Index of the NETCONF view (see routemap.parseRouteMaps)
+			cliRouteMaps(dict)      => Index of the CLI view (see routemap.parseRouteMapConfig)
+
+		Returns:
+			list => [{"routeMapName": str, "routeMapSequence": int, "type": str, "netconf": object, "cli": object}]
+			        The type is one of "missing-in-cli", "missing-in-netconf", "operation", "communities" or
+			        "duplicate-communities" (equivalent values listed several times by NETCONF).
+	"""
+
+	## Variables
+	differences: list=[]
+	routeMapName: str
+	routeMapSequence: int
+	netconfSequence: dict
+	cliSequence: dict
+	netconfCommunities: list
+	cliCommunities: list
+
+	for routeMapName in sorted(set(netconfRouteMaps) | set(cliRouteMaps)):
+		for routeMapSequence in sorted(set(netconfRouteMaps.get(routeMapName, {})) | set(cliRouteMaps.get(routeMapName, {}))):
+			netconfSequence=netconfRouteMaps.get(routeMapName, {}).get(routeMapSequence)
+			cliSequence=cliRouteMaps.get(routeMapName, {}).get(routeMapSequence)
+
+			## Sequence present on one side only
+			if cliSequence is None or netconfSequence is None:
+				differences.append({
+					"routeMapName": routeMapName,
+					"routeMapSequence": routeMapSequence,
+					"type": "missing-in-cli" if cliSequence is None else "missing-in-netconf",
+					"netconf": netconfSequence and netconfSequence["communities"],
+					"cli": cliSequence and cliSequence["communities"],
+				})
+				continue
+
+			## Action of the sequence
+			if netconfSequence["operation"] != cliSequence["operation"]:
+				differences.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "operation", "netconf": netconfSequence["operation"], "cli": cliSequence["operation"]})
+
+			## Communities, compared once normalised
+			netconfCommunities=community.canonicalCommunities(netconfSequence["communities"])
+			cliCommunities=community.canonicalCommunities(cliSequence["communities"])
+			if netconfCommunities != cliCommunities:
+				differences.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "communities", "netconf": netconfCommunities, "cli": cliCommunities})
+			if len(netconfCommunities) != len(netconfSequence["communities"]):
+				differences.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "duplicate-communities", "netconf": netconfSequence["communities"], "cli": cliSequence["communities"]})
+
+	return differences
+
+
+def collect(nc: object, sshSession: object, routeMapName: str="") -> tuple:
+	"""
+		Read the route-maps through NETCONF and through the CLI at the same time.
+
+		Arguments:
+			nc(object)          => The "netconf" object.
+			sshSession(object)  => The "ssh" object.
+			routeMapName(str)   => Route-map to read, an empty value reads all the route-maps (Default = "")
+
+		Returns:
+			tuple => (netconfRouteMaps, cliRouteMaps)
+	"""
+
+	## Variables
+	netconfFuture: object
+	cliFuture: object
+
+	with ThreadPoolExecutor(max_workers=2) as executor:
+		if routeMapName:
+			netconfFuture=executor.submit(lambda: routemap.parseRouteMaps(nc.getRouteMapByName(routeMapName)))
+		else:
+			netconfFuture=executor.submit(lambda: nc.getRouteMapTable().load())
+		cliFuture=executor.submit(lambda: routemap.parseRouteMapConfig(sshSession.getRouteMapConfig(routeMapName)))
+		return netconfFuture.result(), cliFuture.result()
+
+
+def detectDrift(nc: object, sshSession: object, routeMapName: str="") -> list:
+	"""
+		Return the differences between the NETCONF and the CLI views of a device.
+
+		Arguments:
+			nc(object)          => The "netconf" object.
+			sshSession(object)  => The "ssh" object.
+			routeMapName(str)   => Route-map to compare, an empty value compares all the route-maps (Default = "")
+
+		Returns:
+			list => See compareRouteMaps()
+	"""
+
+	## Variables
+	netconfRouteMaps: dict
+	cliRouteMaps: dict
+
+	netconfRouteMaps, cliRouteMaps=collect(nc, sshSession, routeMapName)
+
+	## The CLI section may contain other route-maps starting with the same name
+	if routeMapName:
+		cliRouteMaps={name: sequences for name, sequences in cliRouteMaps.items() if name == routeMapName}
+
+	return compareRouteMaps(netconfRouteMaps, cliRouteMaps)
+
+
+def detectDeviceDrift(device: dict, routeMapName: str="", pool: object=None) -> dict:
+	"""
+		Connect to a device, compare its NETCONF and CLI views and close the connections.
+
+		Arguments:
+			device(dict)       => {"netconf": arguments of "netconf", "ssh": arguments of "ssh"}
+			routeMapName(str)  => Route-map to compare, an empty value compares all the route-maps (Default = "")
+			pool(object)       => "sshpool.sshPool" object keeping the CLI sessions warm between calls (Default = None)
+
+		Returns:
+			dict => {"differences": list, "error": str or None}
+	"""
+
+	## Variables
+	nc: object=netconf(**device["netconf"])
+	sshSession: object=None
+
+	## The NETCONF session is opened by the first request, in parallel with the CLI request
+	try:
+		sshSession=ssh(pool=pool, **device["ssh"])
+		return {"differences": detectDrift(nc, sshSession, routeMapName), "error": None}
+	except Exception as error:
+		return {"differences": None, "error": repr(error)}
+	finally:
+		nc.close()
+		if sshSession is not None:
+			sshSession.close()
+
+
+def detectFleetDrift(devices: list, routeMapName: str="", workers: int=16, pool: object=None) -> dict:
+	"""
+		Compare the NETCONF and CLI views of every device of an inventory with a pool of workers.
+
+		Arguments:
+			devices(list)      => List of {"name": str, "netconf": arguments of "netconf", "ssh": arguments of "ssh"}
+			routeMapName(str)  => Route-map to compare, an empty value compares all the route-maps (Default = "")
+			workers(int)       => Number of devices processed at the same time (Default = 16)
+			pool(object)       => "sshpool.sshPool" object keeping the CLI sessions warm between calls (Default = None)
+
+		Returns:
+			dict => {name: {"differences": list, "error": str or None}}
+	"""
+
+	## Variables
+	futures: dict
+	device: dict
+
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		futures={device.get("name", device["netconf"]["host"]): executor.submit(detectDeviceDrift, device, routeMapName, pool) for device in devices}
+		return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,343 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Run the "netconf" operations on a fleet of devices in parallel.
+
+Each device has a pool of live NETCONF sessions and the number of requests running at the same time across the fleet
+is bounded by the number of workers. The result of every device is returned, an error on one device does not stop
+the other ones.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import threading, queue, contextlib, retry, scheduler
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from run import netconf
+
+
+class netconfPool(object):
+	"""
+		Pool of NETCONF sessions to a single device.
+	"""
+
+	## Class variables
+	device: dict
+	size: int
+	idle: object
+	slots: object
+	sessions: list
+	lock: object
+	breaker: object
+
+	def __init__(self, device: dict, size: int=2, breaker: object=None) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				device(dict)  => Arguments given to the "netconf" constructor (host, username, password, port, ...)
+				size(int)     => Maximum number of live sessions to the device (Default = 2)
+				breaker(object) => "retry.circuitBreaker" object shared by the sessions, None to disable (Default = None)
+
+			Returns:
+				object
+		"""
+		self.device=device
+		self.size=size
+		self.idle=queue.LifoQueue()
+		self.slots=threading.BoundedSemaphore(size)
+		self.sessions=[]
+		self.lock=threading.Lock()
+		self.breaker=breaker
+
+
+	def acquire(self, timeout: float=None) -> object:
+		"""
+			Return a "netconf" object of the pool, wait if all the sessions are in use.
+
+			Arguments:
+				timeout(float)  => Seconds to wait for a free session before raising retry.deadlineExceededError, None to wait forever (Default = None)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		nc: object
+
+		if not self.slots.acquire(timeout=timeout):
+			raise retry.deadlineExceededError("No session of the pool was free before the deadline")
+
+		## Reuse an idle session, otherwise open a new one
+		try:
+			return self.idle.get_nowait()
+		except queue.Empty:
+			pass
+		try:
+			nc=netconf(circuitBreaker=self.breaker, **self.device)
+		except Exception:
+			self.slots.release()
+			raise
+		with self.lock:
+			self.sessions.append(nc)
+		return nc
+
+
+	def release(self, nc: object) -> None:
+		"""
+			Give back a "netconf" object to the pool.
+
+			Arguments:
+				nc(object)  => The "netconf" object returned by acquire().
+
+			Returns:
+				None
+		"""
+		self.idle.put(nc)
+		self.slots.release()
+		return None
+
+
+	@contextlib.contextmanager
+	def session(self, timeout: float=None) -> object:
+		"""
+			Context manager returning a "netconf" object of the pool and giving it back at the end of the block.
+
+			Arguments:
+				timeout(float)  => Seconds to wait for a free session, None to wait forever (Default = None)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		nc: object=self.acquire(timeout)
+
+		try:
+			yield nc
+		finally:
+			self.release(nc)
+
+
+	def close(self) -> None:
+		"""
+			Close all the sessions of the pool.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		nc: object
+
+		with self.lock:
+			for nc in self.sessions:
+				nc.close()
+
+		## End the function
+		return None
+
+
+class fleet(object):
+	"""
+		Execute the "netconf" operations on several devices in parallel.
+	"""
+
+	## Class variables
+	pools: dict
+	workers: int
+	executor: object
+
+	def __init__(self, devices: list, sessionsPerDevice: int=2, workers: int=32, retryPolicy: object=None, failureThreshold: int=5, resetTimeout: float=30.0, lockWrites: bool=True) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				devices(list)            => List of dict with the arguments of the "netconf" constructor. The optional key "name" identifies the device in the results (Default = host)
+				sessionsPerDevice(int)   => Maximum number of live sessions per device (Default = 2)
+				workers(int)             => Maximum number of requests running at the same time across the fleet (Default = 32)
+				retryPolicy(object)      => "retry.retryPolicy" object of the sessions, None for retry.DEFAULT_POLICY (Default = None)
+				failureThreshold(int)    => Failures in a row opening the circuit breaker of a device, None to disable the circuit breakers (Default = 5)
+				resetTimeout(float)      => Seconds before a probe is sent to a device with an open circuit (Default = 30.0)
+				lockWrites(bool)         => If it is True, the writes of the sessions of a device go through a "scheduler.writeScheduler": the concurrent writes are coalesced and sent inside <lock>/<unlock> (Default = True)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		device: dict
+		name: str
+
+		self.pools={}
+		for device in devices:
+			device=dict(device)
+			name=device.pop("name", device["host"])
+			device.setdefault("retryPolicy", retryPolicy)
+			if lockWrites:
+				device.setdefault("writeScheduler", scheduler.writeScheduler(name))
+			self.pools[name]=netconfPool(device, size=sessionsPerDevice, breaker=retry.circuitBreaker(name, failureThreshold, resetTimeout) if failureThreshold is not None else None)
+		self.workers=workers
+		self.executor=ThreadPoolExecutor(max_workers=workers)
+
+
+	def __enter__(self) -> object:
+		return self
+
+
+	def __exit__(self, *args: object) -> None:
+		self.close()
+
+
+	def close(self) -> None:
+		"""
+			Stop the workers and close all the sessions.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		pool: object
+
+		self.executor.shutdown(wait=True)
+		for pool in self.pools.values():
+			pool.close()
+
+		## End the function
+		return None
+
+
+	def execute(self, name: str, request: object, deadline: object=None) -> dict:
+		"""
+			Execute a request on one device and return its result. A device whose circuit is open or which is still
+			waiting for a worker or a session when the deadline expires fails right away.
+
+			Arguments:
+				name(str)          => Name of the device.
+				request(object)    => Function receiving the "netconf" object as argument.
+				deadline(object)   => "retry.deadline" object shared by the devices of the run, None for none (Default = None)
+
+			Returns:
+				dict => {"result": object, "error": Exception or None}
+		"""
+		try:
+			if deadline is not None:
+				deadline.check()
+			with self.pools[name].session(deadline.remaining() if deadline is not None else None) as nc:
+				nc.setDeadline(deadline)
+				try:
+					return {"result": request(nc), "error": None}
+				finally:
+					nc.setDeadline(None)
+		except Exception as error:
+			return {"result": None, "error": error}
+
+
+	def run(self, request: object, devices: list=None, timeout: float=None) -> dict:
+		"""
+			Execute a request on every device in parallel. The function returns once all the devices are done.
+
+			Arguments:
+				request(object)  => Function receiving the "netconf" object as argument.
+				devices(list)    => Name of the devices to target, None for the whole fleet (Default = None)
+				timeout(float)   => Seconds given to the whole run, the RPC timeouts and the retries of every device are bounded by it (Default = None)
+
+			Returns:
+				dict => {name: {"result": object, "error": Exception or None}}
+		"""
+
+		## Variables
+		futures: dict
+		name: str
+		deadline: object=retry.deadline(timeout) if timeout is not None else None
+
+		if devices is None:
+			devices=list(self.pools)
+
+		futures={name: self.executor.submit(self.execute, name, request, deadline) for name in devices}
+		return {name: future.result() for name, future in futures.items()}
+
+
+	def stream(self, request: object, devices: list=None, timeout: float=None) -> object:
+		"""
+			Execute a request on every device in parallel and yield the result of each device as soon as it is done.
+
+			Arguments:
+				request(object)  => Function receiving the "netconf" object as argument.
+				devices(list)    => Name of the devices to target, None for the whole fleet (Default = None)
+				timeout(float)   => Seconds given to the whole run (Default = None)
+
+			Returns:
+				object => Generator of (name, {"result": object, "error": Exception or None})
+		"""
+
+		## Variables
+		futures: dict
+		future: object
+		name: str
+		deadline: object=retry.deadline(timeout) if timeout is not None else None
+
+		if devices is None:
+			devices=list(self.pools)
+
+		futures={self.executor.submit(self.execute, name, request, deadline): name for name in devices}
+		for future in as_completed(futures):
+			yield futures[future], future.result()
+
+
+	def setRouteMapBGPCommunity(self, devices: list=None, timeout: float=None, **kwargs: object) -> dict:
+		"""
+			Call "netconf.setRouteMapBGPCommunity" on every device in parallel.
+
+			Arguments:
+				devices(list)   => Name of the devices to target, None for the whole fleet (Default = None)
+				timeout(float)  => Seconds given to the whole run (Default = None)
+				kwargs(object)  => Arguments of "netconf.setRouteMapBGPCommunity"
+
+			Returns:
+				dict => {name: {"result": None, "error": Exception or None}}
+		"""
+		return self.run(lambda nc: nc.setRouteMapBGPCommunity(**kwargs), devices=devices, timeout=timeout)
+
+
+	def getRouteMapBGPCommunity(self, devices: list=None, timeout: float=None, **kwargs: object) -> dict:
+		"""
+			Call "netconf.getRouteMapBGPCommunity" on every device in parallel.
+
+			Arguments:
+				devices(list)   => Name of the devices to target, None for the whole fleet (Default = None)
+				timeout(float)  => Seconds given to the whole run (Default = None)
+				kwargs(object)  => Arguments of "netconf.getRouteMapBGPCommunity"
+
+			Returns:
+				dict => {name: {"result": list, "error": Exception or None}}
+		"""
+		return self.run(lambda nc: nc.getRouteMapBGPCommunity(**kwargs), devices=devices, timeout=timeout)
+
+
+	def syncRouteMap(self, desiredState: dict, devices: list=None, timeout: float=None, **kwargs: object) -> dict:
+		"""
+			Call "netconf.syncRouteMap" on every device in parallel, the compliant devices only cost one read.
+
+			Arguments:
+				desiredState(dict)  => Desired route-maps (see "netconf.syncRouteMap")
+				devices(list)       => Name of the devices to target, None for the whole fleet (Default = None)
+				timeout(float)      => Seconds given to the whole run (Default = None)
+				kwargs(object)      => Other arguments of "netconf.syncRouteMap" (prune, dryRun)
+
+			Returns:
+				dict => {name: {"result": list of changes, "error": Exception or None}}
+		"""
+		return self.run(lambda nc: nc.syncRouteMap(desiredState, **kwargs), devices=devices, timeout=timeout)
@@ -0,0 +1,401 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Timing and tracing of the "netconf" and "ssh" classes.
+
+The classes report the duration of each phase (connect, rpc, parse, command) as spans and the RPCs and the bytes
+exchanged as counters to an "instrumentation" object, which forwards them to its hooks. The hooks provided here keep
+Prometheus-style metrics (metricsRegistry) or create OpenTelemetry-style spans (tracerHook). Without instrumentation,
+the classes use DISABLED, which does nothing and only costs a method call per phase.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import time, threading, contextlib
+from ncclient.transport.session import SessionListener
+
+## Upper bounds of the latency histograms, in seconds
+BUCKETS: tuple=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class span(object):
+	"""
+		Measure a phase and report it to the hooks at the end of the "with" block.
+	"""
+
+	## Class variables
+	instrumentation: object
+	name: str
+	attributes: dict
+	start: int
+	counter: float
+
+	def __init__(self, instrumentation: object, name: str, attributes: dict) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				instrumentation(object)  => The "instrumentation" object receiving the span.
+				name(str)                => Name of the phase (ex: "netconf.rpc")
+				attributes(dict)         => Attributes of the span (ex: {"host": "10.0.0.1"})
+
+			Returns:
+				object
+		"""
+		self.instrumentation=instrumentation
+		self.name=name
+		self.attributes=attributes
+
+
+	def __enter__(self) -> object:
+		self.start=time.time_ns()
+		self.counter=time.perf_counter()
+		return self
+
+
+	def __exit__(self, errorType: object, error: object, traceback: object) -> None:
+		self.instrumentation.report(self.name, self.start, time.perf_counter() - self.counter, self.attributes, error)
+
+
+class instrumentation(object):
+	"""
+		Forward the spans and the counters of the "netconf" and "ssh" objects to a list of hooks.
+
+		A hook is any object with the methods onSpan(name, start, seconds, attributes, error) and
+		onCount(name, value, attributes), where start is the start time in nanoseconds since the epoch.
+	"""
+
+	## Class variables
+	hooks: list
+
+	def __init__(self, hooks: list=[]) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				hooks(list)  => The hooks receiving the spans and the counters (Default = [])
+
+			Returns:
+				object
+		"""
+		self.hooks=list(hooks)
+
+
+	def addHook(self, hook: object) -> object:
+		"""
+			Add a hook and return it.
+
+			Arguments:
+				hook(object)  => The hook.
+
+			Returns:
+				object
+		"""
+		self.hooks.append(hook)
+		return hook
+
+
+	def enabled(self) -> bool:
+		return bool(self.hooks)
+
+
+	def span(self, name: str, **attributes: object) -> object:
+		"""
+			Return a context manager measuring the phase run inside the "with" block.
+
+			Arguments:
+				name(str)           => Name of the phase.
+				attributes(object)  => Attributes of the span.
+
+			Returns:
+				object
+		"""
+		return span(self, name, attributes)
+
+
+	def report(self, name: str, start: int, seconds: float, attributes: dict, error: object=None) -> None:
+		"""
+			Send a span to the hooks.
+
+			Arguments:
+				name(str)          => Name of the phase.
+				start(int)         => Start time in nanoseconds since the epoch.
+				seconds(float)     => Duration of the phase.
+				attributes(dict)   => Attributes of the span.
+				error(object)      => Exception raised by the phase, None if it succeeded (Default = None)
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		hook: object
+
+		for hook in self.hooks:
+			hook.onSpan(name, start, seconds, attributes, error)
+		return None
+
+
+	def count(self, name: str, value: float=1, **attributes: object) -> None:
+		"""
+			Send a counter increment to the hooks.
+
+			Arguments:
+				name(str)           => Name of the counter (ex: "netconf.bytesSent")
+				value(float)        => Increment (Default = 1)
+				attributes(object)  => Attributes of the counter.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		hook: object
+
+		for hook in self.hooks:
+			hook.onCount(name, value, attributes)
+		return None
+
+
+class disabledInstrumentation(instrumentation):
+	"""
+		Instrumentation used when none is given: the spans are a shared no-op context manager.
+	"""
+
+	## Shared no-op span
+	NULL_SPAN: object=contextlib.nullcontext()
+
+	def enabled(self) -> bool:
+		return False
+
+	def addHook(self, hook: object) -> object:
+		raise ValueError("DISABLED is shared by all the objects, create an instrumentation object to add hooks")
+
+	def span(self, name: str, **attributes: object) -> object:
+		return self.NULL_SPAN
+
+	def count(self, name: str, value: float=1, **attributes: object) -> None:
+		return None
+
+
+## Instrumentation of the objects created without one
+DISABLED: object=disabledInstrumentation()
+
+
+class byteCounter(SessionListener):
+	"""
+		Count the NETCONF messages and bytes of an ncclient session.
+	"""
+
+	## Class variables
+	instrumentation: object
+	host: str
+	send: object
+
+	def __init__(self, instrumentation: object, session: object, host: str) -> object:
+		"""
+			Constructor that return an instantiation of the object. The object listens to the received messages and
+			wraps the send() method of the session.
+
+			Arguments:
+				instrumentation(object)  => The "instrumentation" object receiving the counters.
+				session(object)          => The ncclient session.
+				host(str)                => Host of the session, added as attribute.
+
+			Returns:
+				object
+		"""
+		self.instrumentation=instrumentation
+		self.host=host
+		self.send=session.send
+		session.send=self.onSend
+		session.add_listener(self)
+
+
+	def onSend(self, message: str) -> None:
+		self.instrumentation.count("netconf.rpc", 1, host=self.host)
+		self.instrumentation.count("netconf.bytesSent", len(message), host=self.host)
+		self.send(message)
+
+
+	def callback(self, root: tuple, raw: str) -> None:
+		self.instrumentation.count("netconf.bytesReceived", len(raw), host=self.host)
+
+
+	def errback(self, ex: object) -> None:
+		self.instrumentation.count("netconf.error", 1, host=self.host)
+
+
+class metricsRegistry(object):
+	"""
+		Hook keeping Prometheus-style metrics: a counter per counter name and a latency histogram per phase, labelled
+		by their attributes.
+	"""
+
+	## Class variables
+	counters: dict
+	histograms: dict
+	lock: object
+
+	def __init__(self) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				None
+
+			Returns:
+				object
+		"""
+		self.counters={}
+		self.histograms={}
+		self.lock=threading.Lock()
+
+
+	def onSpan(self, name: str, start: int, seconds: float, attributes: dict, error: object) -> None:
+
+		## Variables
+		key: tuple=(name, tuple(sorted(attributes.items())) + (("error", error is not None),))
+		histogram: dict
+		index: int
+
+		with self.lock:
+			histogram=self.histograms.setdefault(key, {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0})
+			histogram["count"]+=1
+			histogram["sum"]+=seconds
+			for index in range(len(BUCKETS)):
+				if seconds <= BUCKETS[index]:
+					histogram["buckets"][index]+=1
+		return None
+
+
+	def onCount(self, name: str, value: float, attributes: dict) -> None:
+
+		## Variables
+		key: tuple=(name, tuple(sorted(attributes.items())))
+
+		with self.lock:
+			self.counters[key]=self.counters.get(key, 0) + value
+		return None
+
+
+	def getCounter(self, name: str, **attributes: object) -> float:
+		"""
+			Return the sum of a counter for all the label values matching the attributes.
+
+			Arguments:
+				name(str)           => Name of the counter.
+				attributes(object)  => Labels to match.
+
+			Returns:
+				float
+		"""
+		with self.lock:
+			return sum([value for (counterName, labels), value in self.counters.items() if counterName == name and set(attributes.items()) <= set(labels)])
+
+
+	def getHistogram(self, name: str, **attributes: object) -> dict:
+		"""
+			Return the number of spans and their total duration for all the label values matching the attributes.
+
+			Arguments:
+				name(str)           => Name of the phase.
+				attributes(object)  => Labels to match.
+
+			Returns:
+				dict => {"count": int, "sum": float}
+		"""
+
+		## Variables
+		result: dict={"count": 0, "sum": 0.0}
+		histogramName: str
+		labels: tuple
+		histogram: dict
+
+		with self.lock:
+			for (histogramName, labels), histogram in self.histograms.items():
+				if histogramName == name and set(attributes.items()) <= set(labels):
+					result["count"]+=histogram["count"]
+					result["sum"]+=histogram["sum"]
+		return result
+
+
+	def render(self) -> str:
+		"""
+			Return the metrics in the Prometheus text exposition format.
+
+			Arguments:
+				None
+
+			Returns:
+				str
+		"""
+
+		## Variables
+		lines: list=[]
+		name: str
+		labels: tuple
+		value: float
+		histogram: dict
+		index: int
+
+		def formatName(name: str) -> str:
+			return name.replace(".", "_")
+
+		def formatLabels(labels: tuple, extra: tuple=()) -> str:
+			return "{" + ",".join('{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"')) for key, value in labels + extra) + "}"
+
+		with self.lock:
+			for (name, labels), value in sorted(self.counters.items(), key=str):
+				lines.append("{}_total{} {}".format(formatName(name), formatLabels(labels), value))
+			for (name, labels), histogram in sorted(self.histograms.items(), key=str):
+				for index in range(len(BUCKETS)):
+					lines.append("{}_seconds_bucket{} {}".format(formatName(name), formatLabels(labels, (("le", BUCKETS[index]),)), histogram["buckets"][index]))
+				lines.append("{}_seconds_bucket{} {}".format(formatName(name), formatLabels(labels, (("le", "+Inf"),)), histogram["count"]))
+				lines.append("{}_seconds_sum{} {}".format(formatName(name), formatLabels(labels), histogram["sum"]))
+				lines.append("{}_seconds_count{} {}".format(formatName(name), formatLabels(labels), histogram["count"]))
+
+		return "\n".join(lines) + "\n"
+
+
+class tracerHook(object):
+	"""
+		Hook creating a span per phase with an OpenTelemetry-style tracer (tracer.start_span(name, start_time=...,
+		attributes=...) and span.end(end_time=...)). The tracer is not imported here, any compatible object works.
+	"""
+
+	## Class variables
+	tracer: object
+
+	def __init__(self, tracer: object) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				tracer(object)  => The tracer (ex: opentelemetry.trace.get_tracer(__name__))
+
+			Returns:
+				object
+		"""
+		self.tracer=tracer
+
+
+	def onSpan(self, name: str, start: int, seconds: float, attributes: dict, error: object) -> None:
+
+		## Variables
+		tracerSpan: object=self.tracer.start_span(name, start_time=start, attributes={key: str(value) for key, value in attributes.items()})
+
+		if error is not None:
+			tracerSpan.record_exception(error)
+		tracerSpan.end(end_time=start + int(seconds * 1e9))
+		return None
+
+
+	def onCount(self, name: str, value: float, attributes: dict) -> None:
+		return None
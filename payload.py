@@ -0,0 +1,458 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Build the NETCONF filters and <config> payloads used by the "netconf" class.
+
+Each payload is built once as an lxml tree, serialized without any indentation and kept as a template. Building a
+payload is then a single substitution of the escaped values in the cached template, which is cheap enough to build
+thousands of payloads at once.
+
+The filters select only the nodes needed by each read (ex: the <community-list> of a sequence, the <new-format>
+leaf), as a subtree filter or, when the device supports ":xpath", as an XPath expression.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import functools
+from lxml import etree
+from xml.sax.saxutils import escape
+
+## YANG namespaces
+NATIVE_NAMESPACE: str="http://cisco.com/ns/yang/Cisco-IOS-XE-native"
+ROUTE_MAP_NAMESPACE: str="http://cisco.com/ns/yang/Cisco-IOS-XE-route-map"
+
+## Prefixes of the namespaces in the XPath filters
+XPATH_NAMESPACES: dict={"ios": NATIVE_NAMESPACE, "ios-route-map": ROUTE_MAP_NAMESPACE}
+
+## Fields of a sequence which can be selected by a filter (path from the <route-map-without-order-seq> node)
+SEQUENCE_NUMBER: str="seq_no"
+SEQUENCE_OPERATION: str="operation"
+COMMUNITY_LIST: str="set/community/community-well-known/community-list"
+
+
+def compileTemplate(root: object) -> str:
+	"""
+		Serialize a tree into a compact template. The values to substitute are written as {name} in the tree.
+
+		Arguments:
+			root(object)  => The lxml element.
+
+		Returns:
+			str
+	"""
+	return etree.tostring(root).decode()
+
+
+def buildNative(rootName: str) -> tuple:
+	"""
+		Return a <filter> or <config> root with its <native> child.
+
+		Arguments:
+			rootName(str)  => "filter" or "config"
+
+		Returns:
+			tuple => (root, native)
+	"""
+
+	## Variables
+	root: object=etree.Element(rootName)
+
+	return root, etree.SubElement(root, "{%s}native" % NATIVE_NAMESPACE, nsmap={None: NATIVE_NAMESPACE})
+
+
+def buildRouteMap(parent: object, sequence: bool=True, operation: bool=False) -> tuple:
+	"""
+		Add a <route-map> (and its sequence) to a node.
+
+		Arguments:
+			parent(object)   => The <native> node.
+			sequence(bool)   => If it is True, add the <route-map-without-order-seq> node (Default = True)
+			operation(bool)  => If it is True, add the "operation" attribute to <route-map> (Default = False)
+
+		Returns:
+			tuple => (routeMap, sequence or None)
+	"""
+
+	## Variables
+	routeMap: object=etree.SubElement(parent, "{%s}route-map" % NATIVE_NAMESPACE)
+	routeMapSequence: object=None
+
+	if operation:
+		routeMap.set("operation", "{operation}")
+	etree.SubElement(routeMap, "{%s}name" % NATIVE_NAMESPACE).text="{routeMapName}"
+	if sequence:
+		routeMapSequence=etree.SubElement(routeMap, "{%s}route-map-without-order-seq" % ROUTE_MAP_NAMESPACE, nsmap={None: ROUTE_MAP_NAMESPACE})
+		etree.SubElement(routeMapSequence, "{%s}seq_no" % ROUTE_MAP_NAMESPACE).text="{routeMapSequence}"
+
+	return routeMap, routeMapSequence
+
+
+def buildTemplates() -> dict:
+	"""
+		Build all the templates.
+
+		Arguments:
+			None
+
+		Returns:
+			dict
+	"""
+
+	## Variables
+	templates: dict={}
+	root: object
+	native: object
+	node: object
+	sequence: object
+
+	## Filter of the whole route-map table
+	root, native=buildNative("filter")
+	etree.SubElement(native, "{%s}route-map" % NATIVE_NAMESPACE)
+	templates["routeMapTableFilter"]=compileTemplate(root)
+
+	## Configuration of a route-map
+	root, native=buildNative("config")
+	node, sequence=buildRouteMap(native, operation=True)
+	etree.SubElement(sequence, "{%s}operation" % ROUTE_MAP_NAMESPACE).text="{routeMapOperation}"
+	templates["routeMapConfig"]=compileTemplate(root)
+
+	## Configuration of a single sequence of a route-map
+	root, native=buildNative("config")
+	node, sequence=buildRouteMap(native)
+	sequence.set("operation", "{operation}")
+	etree.SubElement(sequence, "{%s}operation" % ROUTE_MAP_NAMESPACE).text="{routeMapOperation}"
+	templates["sequenceConfig"]=compileTemplate(root)
+
+	## Configuration of the BGP communities of a route-map sequence, the communities are inserted in place of {communities}
+	root, native=buildNative("config")
+	node, sequence=buildRouteMap(native)
+	node=etree.SubElement(sequence, "{%s}set" % ROUTE_MAP_NAMESPACE)
+	node=etree.SubElement(node, "{%s}community" % ROUTE_MAP_NAMESPACE)
+	node=etree.SubElement(node, "{%s}community-well-known" % ROUTE_MAP_NAMESPACE)
+	node.text="{communities}"
+	templates["communitiesConfig"]=compileTemplate(root)
+
+	## A single community value
+	node=etree.Element("{%s}community-list" % ROUTE_MAP_NAMESPACE, nsmap={None: ROUTE_MAP_NAMESPACE})
+	node.set("operation", "{operation}")
+	node.text="{BGPCommunity}"
+	templates["community"]=compileTemplate(node).replace(' xmlns="%s"' % ROUTE_MAP_NAMESPACE, "")
+
+	## Configuration of a single BGP community of a route-map sequence
+	templates["communityConfig"]=templates["communitiesConfig"].replace("{communities}", templates["community"])
+
+	## Configuration of the bgp-community new-format
+	root, native=buildNative("config")
+	node=etree.SubElement(etree.SubElement(etree.SubElement(native, "{%s}ip" % NATIVE_NAMESPACE), "{%s}bgp-community" % NATIVE_NAMESPACE), "{%s}new-format" % NATIVE_NAMESPACE)
+	node.set("operation", "{operation}")
+	templates["newFormatConfig"]=compileTemplate(root)
+
+	return templates
+
+
+## Cached templates
+TEMPLATES: dict=buildTemplates()
+
+
+@functools.lru_cache(maxsize=None)
+def buildFilter(routeMapName: bool, routeMapSequence: bool, fields: tuple, routeMaps: bool, newFormat: bool) -> str:
+	"""
+		Build the template of the tightest subtree filter of a query, the values to substitute are {routeMapName} and
+		{routeMapSequence}. The keys of the route-maps and of the sequences are always selected. Each template is
+		built once.
+
+		Arguments:
+			routeMapName(bool)      => If it is True, a single route-map is selected.
+			routeMapSequence(bool)  => If it is True, a single sequence is selected.
+			fields(tuple)           => Fields of the sequences to select (ex: COMMUNITY_LIST), empty for the whole sequences.
+			routeMaps(bool)         => If it is True, the route-maps are selected.
+			newFormat(bool)         => If it is True, the bgp-community new-format is selected.
+
+		Returns:
+			str
+	"""
+
+	## Variables
+	root: object
+	native: object
+	routeMap: object
+	sequence: object
+	node: object
+	child: object
+	field: str
+	step: str
+
+	root, native=buildNative("filter")
+	if newFormat:
+		etree.SubElement(etree.SubElement(etree.SubElement(native, "{%s}ip" % NATIVE_NAMESPACE), "{%s}bgp-community" % NATIVE_NAMESPACE), "{%s}new-format" % NATIVE_NAMESPACE)
+	if routeMaps:
+		routeMap=etree.SubElement(native, "{%s}route-map" % NATIVE_NAMESPACE)
+		## The keys are always selected, a server MAY leave out the keys of a list which are not (RFC 6241, section 6.2.5)
+		if routeMapName or routeMapSequence or fields:
+			etree.SubElement(routeMap, "{%s}name" % NATIVE_NAMESPACE).text="{routeMapName}" if routeMapName else None
+		if routeMapSequence or fields:
+			sequence=etree.SubElement(routeMap, "{%s}route-map-without-order-seq" % ROUTE_MAP_NAMESPACE, nsmap={None: ROUTE_MAP_NAMESPACE})
+			etree.SubElement(sequence, "{%s}seq_no" % ROUTE_MAP_NAMESPACE).text="{routeMapSequence}" if routeMapSequence else None
+			for field in fields:
+				## The sequence number is already a content match node
+				if field == SEQUENCE_NUMBER and routeMapSequence:
+					continue
+				## The fields share their common containers
+				node=sequence
+				for step in field.split("/"):
+					child=node.find("{%s}%s" % (ROUTE_MAP_NAMESPACE, step))
+					node=child if child is not None else etree.SubElement(node, "{%s}%s" % (ROUTE_MAP_NAMESPACE, step))
+
+	return compileTemplate(root)
+
+
+@functools.lru_cache(maxsize=None)
+def buildXPath(routeMapName: bool, routeMapSequence: bool, fields: tuple, routeMaps: bool, newFormat: bool) -> str:
+	"""
+		Build the template of the XPath expression of a query, same arguments and selection (keys included) as
+		buildFilter().
+
+		Arguments:
+			routeMapName(bool)      => If it is True, a single route-map is selected.
+			routeMapSequence(bool)  => If it is True, a single sequence is selected.
+			fields(tuple)           => Fields of the sequences to select, empty for the whole sequences.
+			routeMaps(bool)         => If it is True, the route-maps are selected.
+			newFormat(bool)         => If it is True, the bgp-community new-format is selected.
+
+		Returns:
+			str
+	"""
+
+	## Variables
+	paths: list=[]
+	path: str
+	field: str
+
+	if newFormat:
+		paths.append("/ios:native/ios:ip/ios:bgp-community/ios:new-format")
+	if routeMaps:
+		path="/ios:native/ios:route-map"
+		if routeMapName:
+			path+="[ios:name={routeMapName}]"
+		## The keys are always selected, a server MAY leave out the keys which are not
+		if routeMapSequence or fields:
+			paths.append(path + "/ios:name")
+			path+="/ios-route-map:route-map-without-order-seq"
+			if routeMapSequence:
+				path+="[ios-route-map:seq_no={routeMapSequence}]"
+			if fields and SEQUENCE_NUMBER not in fields:
+				paths.append(path + "/ios-route-map:seq_no")
+		if fields:
+			paths.extend([path + "/" + "/".join("ios-route-map:" + step for step in field.split("/")) for field in fields])
+		else:
+			paths.append(path)
+
+	return " | ".join(paths)
+
+
+def getXPathLiteral(value: str) -> str:
+	"""
+		Return a value as an XPath string literal.
+
+		Arguments:
+			value(str)  => The value.
+
+		Returns:
+			str
+	"""
+
+	## Variables
+	text: str=str(value)
+
+	if "'" not in text:
+		return "'" + text + "'"
+	if '"' not in text:
+		return '"' + text + '"'
+	return "concat('" + text.replace("'", "', \"'\", '") + "')"
+
+
+def getFilter(routeMapName: str=None, routeMapSequence: int=None, fields: list=None, routeMaps: bool=True, newFormat: bool=False, xpath: bool=False) -> object:
+	"""
+		Return the tightest filter of a read: only the route-map, the sequence and the fields requested are selected,
+		so the device serializes (and the client parses) nothing else.
+
+		Arguments:
+			routeMapName(str)      => Name of the route-map, None for all the route-maps (Default = None)
+			routeMapSequence(int)  => Sequence number, None for all the sequences (Default = None)
+			fields(list)           => Fields of the sequences (SEQUENCE_NUMBER, SEQUENCE_OPERATION, COMMUNITY_LIST, ...), None for the whole sequences (Default = None)
+			routeMaps(bool)        => If it is False, no route-map is selected (Default = True)
+			newFormat(bool)        => If it is True, the bgp-community new-format is selected too (Default = False)
+			xpath(bool)            => If it is True, return an XPath filter, the device must support ":xpath" (Default = False)
+
+		Returns:
+			object => The subtree filter (str) or the XPath filter ("xpath", (namespaces, select)) given to ncclient
+	"""
+
+	## Variables
+	key: tuple=(routeMapName is not None, routeMapSequence is not None, tuple(fields or ()), routeMaps, newFormat)
+
+	if xpath:
+		return ("xpath", (XPATH_NAMESPACES, buildXPath(*key).format(
+			routeMapName=getXPathLiteral(routeMapName) if routeMapName is not None else "",
+			routeMapSequence=int(routeMapSequence) if routeMapSequence is not None else "",
+		)))
+	return buildFilter(*key).format(
+		routeMapName=escape(str(routeMapName)) if routeMapName is not None else "",
+		routeMapSequence=int(routeMapSequence) if routeMapSequence is not None else "",
+	)
+
+
+def getOperation(delete: bool) -> str:
+	"""
+		Return the value of the "operation" attribute.
+
+		Arguments:
+			delete(bool)  => If it is True, "remove", otherwise "merge"
+
+		Returns:
+			str
+	"""
+	if delete:
+		return "remove"
+	return "merge"
+
+
+def getRouteMapTableFilter() -> str:
+	"""
+		Return the filter reading the whole route-map table.
+
+		Arguments:
+			None
+
+		Returns:
+			str
+	"""
+	return TEMPLATES["routeMapTableFilter"]
+
+
+def getRouteMapConfig(routeMapName: str, routeMapSequence: int=10, routeMapOperation: str="permit", delete: bool=False) -> str:
+	"""
+		Return the configuration creating (or deleting) a route-map.
+
+		Arguments:
+			routeMapName(str)       => Name of the route-map.
+			routeMapSequence(int)   => Sequence number (Default = 10)
+			routeMapOperation(str)  => Action of the route-map [permit|deny] (Default = permit)
+			delete(bool)            => If it is True, the route-map is removed (Default = False)
+
+		Returns:
+			str
+	"""
+
+	## Verify if the operation is valide (permit or deny)
+	if (routeMapOperation != "permit" and routeMapOperation != "deny"):
+		raise ValueError("routeMapOperation must be either 'permit' or 'deny'")
+
+	return TEMPLATES["routeMapConfig"].format(routeMapName=escape(str(routeMapName)), routeMapSequence=int(routeMapSequence), routeMapOperation=routeMapOperation, operation=getOperation(delete))
+
+
+def getSequenceConfig(routeMapName: str, routeMapSequence: int=10, routeMapOperation: str="permit", delete: bool=False) -> str:
+	"""
+		Return the configuration creating (or deleting) a single sequence of a route-map, the other sequences are
+		not touched.
+
+		Arguments:
+			routeMapName(str)       => Name of the route-map.
+			routeMapSequence(int)   => Sequence number (Default = 10)
+			routeMapOperation(str)  => Action of the sequence [permit|deny] (Default = permit)
+			delete(bool)            => If it is True, the sequence is removed (Default = False)
+
+		Returns:
+			str
+	"""
+
+	## Verify if the operation is valide (permit or deny)
+	if (routeMapOperation != "permit" and routeMapOperation != "deny"):
+		raise ValueError("routeMapOperation must be either 'permit' or 'deny'")
+
+	return TEMPLATES["sequenceConfig"].format(routeMapName=escape(str(routeMapName)), routeMapSequence=int(routeMapSequence), routeMapOperation=routeMapOperation, operation=getOperation(delete))
+
+
+def getCommunitiesConfig(routeMapName: str, routeMapSequence: int=10, BGPCommunities: list=None, delete: bool=False) -> str:
+	"""
+		Return a single configuration adding (or removing) several BGP communities to a route-map sequence.
+
+		Arguments:
+			routeMapName(str)      => Name of the route-map.
+			routeMapSequence(int)  => Sequence number (Default = 10)
+			BGPCommunities(list)   => BGP communities to manipulate, None for none (Default = None)
+			delete(bool)           => If it is True, the BGP communities are removed (Default = False)
+
+		Returns:
+			str
+	"""
+
+	## Variables
+	community: str=TEMPLATES["community"].replace("{operation}", getOperation(delete))
+	prefix: str
+	suffix: str
+	BGPCommunity: str
+
+	## The template is split before the substitution, the route-map name can contain "{communities}"
+	prefix, suffix=[part.format(routeMapName=escape(str(routeMapName)), routeMapSequence=int(routeMapSequence)) for part in TEMPLATES["communitiesConfig"].split("{communities}")]
+	return prefix + "".join([community.replace("{BGPCommunity}", escape(str(BGPCommunity))) for BGPCommunity in BGPCommunities or []]) + suffix
+
+
+def getCommunityConfig(routeMapName: str, routeMapSequence: int=10, BGPCommunity: str="1:1", delete: bool=False) -> str:
+	"""
+		Return the configuration adding (or removing) a BGP community to a route-map sequence.
+
+		Arguments:
+			routeMapName(str)      => Name of the route-map.
+			routeMapSequence(int)  => Sequence number (Default = 10)
+			BGPCommunity(str)      => BGP community to manipulate (Default = "1:1")
+			delete(bool)           => If it is True, the BGP community is removed (Default = False)
+
+		Returns:
+			str
+	"""
+	return TEMPLATES["communityConfig"].format(routeMapName=escape(str(routeMapName)), routeMapSequence=int(routeMapSequence), BGPCommunity=escape(str(BGPCommunity)), operation=getOperation(delete))
+
+
+def getCommunityConfigs(routeMapName: str, routeMapSequence: int=10, BGPCommunities: list=None, delete: bool=False) -> list:
+	"""
+		Bulk mode of getCommunityConfig(): return one configuration per BGP community. The parts shared by all the
+		payloads are built only once.
+
+		Arguments:
+			routeMapName(str)      => Name of the route-map.
+			routeMapSequence(int)  => Sequence number (Default = 10)
+			BGPCommunities(list)   => BGP communities to manipulate, None for none (Default = None)
+			delete(bool)           => If it is True, the BGP communities are removed (Default = False)
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	prefix: str
+	suffix: str
+	BGPCommunity: str
+
+	## The template is split before the substitution, the route-map name can contain "{BGPCommunity}"
+	prefix, suffix=[part.format(routeMapName=escape(str(routeMapName)), routeMapSequence=int(routeMapSequence), operation=getOperation(delete)) for part in TEMPLATES["communityConfig"].split("{BGPCommunity}")]
+	return [prefix + escape(str(BGPCommunity)) + suffix for BGPCommunity in BGPCommunities or []]
+
+
+def getNewFormatConfig(delete: bool=False) -> str:
+	"""
+		Return the configuration adding (or removing) the bgp-community new-format.
+
+		Arguments:
+			delete(bool)  => If it is True, the new-format is removed (Default = False)
+
+		Returns:
+			str
+	"""
+	return TEMPLATES["newFormatConfig"].format(operation=getOperation(delete))
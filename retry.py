@@ -0,0 +1,441 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Retry policy, circuit breaker and deadline of the requests sent to the devices.
+
+The errors are classified as retryable (transport dropped, timeout, NETCONF "lock-denied", "in-use" or
+"resource-denied") or fatal (authentication, invalid configuration, ...). A retryable error is retried after an
+exponential backoff with full jitter, so many sessions failing at the same time do not retry together. The circuit
+breaker of a device opens after several failures in a row: the requests then fail right away, without waiting for
+the timeouts of a dead device, until a probe succeeds after the reset timeout. A deadline shared by many requests
+(ex: all the devices of a fleet run) bounds the waits and the RPC timeouts, and stops the retries once it expired.
+The writes which are not idempotent (<edit-config>, <commit>, ...) are only sent again after an <rpc-error> telling
+that they were not applied: after a timeout or a dropped transport, the device may have applied them.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import time, random, asyncio, threading, paramiko, netmiko
+from ncclient.transport.errors import TransportError, AuthenticationError
+from ncclient.operations.errors import TimeoutExpiredError
+from ncclient.operations.rpc import RPCError
+
+## NETCONF error-tags of a temporary condition (RFC 6241, appendix A)
+RETRYABLE_ERROR_TAGS: tuple=("lock-denied", "in-use", "resource-denied")
+
+## Errors of a session which can be reopened
+TRANSIENT_ERRORS: tuple=(TransportError, TimeoutExpiredError, OSError, EOFError, paramiko.SSHException, netmiko.exceptions.ReadException, netmiko.exceptions.WriteException, netmiko.exceptions.NetmikoTimeoutException)
+
+## Errors which fail the same way on every attempt
+FATAL_ERRORS: tuple=(AuthenticationError, netmiko.exceptions.NetmikoAuthenticationException)
+
+
+class circuitOpenError(RuntimeError):
+	"""
+		The circuit breaker of the device is open, the request has not been sent.
+	"""
+
+
+class deadlineExceededError(RuntimeError):
+	"""
+		The deadline expired before the request could be sent (or sent again).
+	"""
+
+
+def isRetryable(error: Exception) -> bool:
+	"""
+		Return True if the request may succeed if it is sent again.
+
+		Arguments:
+			error(Exception)  => The error raised by the request.
+
+		Returns:
+			bool
+	"""
+	if isinstance(error, (circuitOpenError, deadlineExceededError) + FATAL_ERRORS):
+		return False
+	if isinstance(error, RPCError):
+		return error.tag in RETRYABLE_ERROR_TAGS
+	return isinstance(error, TRANSIENT_ERRORS)
+
+
+def isResendable(error: Exception) -> bool:
+	"""
+		Return True if a request which is not idempotent (<edit-config>, <commit>, ...) may be sent again after the
+		error. Only an <rpc-error> tells that the device did not apply it; after a timeout or a dropped transport,
+		the request may have been applied and sending it again could apply it twice.
+
+		Arguments:
+			error(Exception)  => The error raised by the request.
+
+		Returns:
+			bool
+	"""
+	return isinstance(error, RPCError)
+
+
+def isDeviceFailure(error: Exception) -> bool:
+	"""
+		Return True if the error shows that the device (or the path to it) is failing, which counts for the circuit
+		breaker. An <rpc-error> is an answer of the device, so it is not a failure.
+
+		Arguments:
+			error(Exception)  => The error raised by the request.
+
+		Returns:
+			bool
+	"""
+	return isinstance(error, TRANSIENT_ERRORS) and not isinstance(error, FATAL_ERRORS)
+
+
+class deadline(object):
+	"""
+		Point in time after which no request is sent anymore.
+	"""
+
+	## Class variables
+	expires: float
+
+	def __init__(self, seconds: float=None) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				seconds(float)  => Seconds from now, None for no deadline (Default = None)
+
+			Returns:
+				object
+		"""
+		self.expires=time.monotonic() + seconds if seconds is not None else None
+
+
+	def remaining(self) -> float:
+		"""
+			Return the seconds left, None if there is no deadline.
+
+			Arguments:
+				None
+
+			Returns:
+				float
+		"""
+		if self.expires is None:
+			return None
+		return max(self.expires - time.monotonic(), 0.0)
+
+
+	def limit(self, timeout: float) -> float:
+		"""
+			Return the timeout reduced to the seconds left.
+
+			Arguments:
+				timeout(float)  => The timeout.
+
+			Returns:
+				float
+		"""
+		if self.expires is None:
+			return timeout
+		return min(timeout, self.remaining())
+
+
+	def check(self) -> None:
+		"""
+			Raise deadlineExceededError if the deadline expired.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		if self.expires is not None and time.monotonic() >= self.expires:
+			raise deadlineExceededError("The deadline expired")
+		return None
+
+
+class circuitBreaker(object):
+	"""
+		Circuit breaker of a device: "closed" (the requests are sent), "open" (the requests fail right away) or
+		"half-open" (a single probe request is sent to know if the device is back).
+	"""
+
+	## Class variables
+	name: str
+	failureThreshold: int
+	resetTimeout: float
+	state: str
+	failures: int
+	openedAt: float
+	lock: object
+
+	def __init__(self, name: str="", failureThreshold: int=5, resetTimeout: float=30.0) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				name(str)               => Name of the device, used in the errors (Default = "")
+				failureThreshold(int)   => Failures in a row opening the circuit (Default = 5)
+				resetTimeout(float)     => Seconds before a probe is sent to an open circuit (Default = 30.0)
+
+			Returns:
+				object
+		"""
+		self.name=name
+		self.failureThreshold=failureThreshold
+		self.resetTimeout=resetTimeout
+		self.state="closed"
+		self.failures=0
+		self.openedAt=0.0
+		self.lock=threading.Lock()
+
+
+	def allow(self) -> None:
+		"""
+			Raise circuitOpenError if the request must not be sent. After the reset timeout, the first request is
+			let through as a probe and the other ones still fail until the probe ends.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		waiting: float
+
+		with self.lock:
+			if self.state == "closed":
+				return None
+			waiting=self.openedAt + self.resetTimeout - time.monotonic()
+			if self.state == "open" and waiting <= 0:
+				self.state="half-open"
+				return None
+			raise circuitOpenError("The circuit of {} is open after {} failures, next probe in {:.1f} seconds".format(self.name, self.failures, max(waiting, 0.0)))
+
+
+	def success(self) -> None:
+		"""
+			Record an answer of the device, the circuit is closed.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		with self.lock:
+			self.state="closed"
+			self.failures=0
+		return None
+
+
+	def failure(self) -> None:
+		"""
+			Record a failure of the device, the circuit opens after failureThreshold failures in a row or if the
+			probe failed.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		with self.lock:
+			self.failures+=1
+			if self.state == "half-open" or self.failures >= self.failureThreshold:
+				self.state="open"
+				self.openedAt=time.monotonic()
+		return None
+
+
+class retryPolicy(object):
+	"""
+		Send a request again after a retryable error, with an exponential backoff and full jitter.
+	"""
+
+	## Class variables
+	attempts: int
+	baseDelay: float
+	maxDelay: float
+	multiplier: float
+	jitter: bool
+	classifier: object
+
+	def __init__(self, attempts: int=3, baseDelay: float=0.1, maxDelay: float=5.0, multiplier: float=2.0, jitter: bool=True, classifier: object=isRetryable) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				attempts(int)        => Maximum number of attempts, 1 to never retry (Default = 3)
+				baseDelay(float)     => Delay in seconds before the first retry (Default = 0.1)
+				maxDelay(float)      => Maximum delay in seconds between two attempts (Default = 5.0)
+				multiplier(float)    => Factor applied to the delay after each attempt (Default = 2.0)
+				jitter(bool)         => If it is True, the delay is drawn between 0 and its value (Default = True)
+				classifier(object)   => Function returning True if an error is retryable (Default = isRetryable)
+
+			Returns:
+				object
+		"""
+		self.attempts=max(int(attempts), 1)
+		self.baseDelay=baseDelay
+		self.maxDelay=maxDelay
+		self.multiplier=multiplier
+		self.jitter=jitter
+		self.classifier=classifier
+
+
+	def getDelay(self, attempt: int) -> float:
+		"""
+			Return the delay before the next attempt.
+
+			Arguments:
+				attempt(int)  => Number of the failed attempt, starting at 0.
+
+			Returns:
+				float
+		"""
+
+		## Variables
+		delay: float=min(self.baseDelay * self.multiplier ** attempt, self.maxDelay)
+
+		if self.jitter:
+			return random.uniform(0.0, delay)
+		return delay
+
+
+	def prepare(self, breaker: object, deadline: object) -> None:
+		"""
+			Check the deadline and the circuit breaker before an attempt.
+
+			Arguments:
+				breaker(object)   => The "circuitBreaker" object, None for none.
+				deadline(object)  => The "deadline" object, None for none.
+
+			Returns:
+				None
+		"""
+		if deadline is not None:
+			deadline.check()
+		if breaker is not None:
+			breaker.allow()
+		return None
+
+
+	def handle(self, error: Exception, attempt: int, breaker: object, deadline: object, idempotent: bool=True) -> float:
+		"""
+			Record the error of an attempt and return the delay before the next one. The error is raised again if it
+			is fatal, if it was the last attempt, if the deadline expires before the next attempt or if the request is
+			not idempotent and the error does not tell that it was not applied (see isResendable).
+
+			Arguments:
+				error(Exception)   => The error raised by the attempt.
+				attempt(int)       => Number of the attempt, starting at 0.
+				breaker(object)    => The "circuitBreaker" object, None for none.
+				deadline(object)   => The "deadline" object, None for none.
+				idempotent(bool)   => If it is False, the request is only sent again if isResendable() (Default = True)
+
+			Returns:
+				float
+		"""
+
+		## Variables
+		delay: float
+
+		## Any other error than a failure of the device closes the circuit, ex: an <rpc-error> is an answer
+		if breaker is not None:
+			if isDeviceFailure(error):
+				breaker.failure()
+			else:
+				breaker.success()
+
+		if attempt + 1 >= self.attempts or not self.classifier(error) or not (idempotent or isResendable(error)):
+			raise error
+
+		delay=self.getDelay(attempt)
+		if deadline is not None and deadline.remaining() is not None and deadline.remaining() <= delay:
+			raise error
+		return delay
+
+
+	def call(self, request: object, breaker: object=None, deadline: object=None, reset: object=None, idempotent: bool=True) -> object:
+		"""
+			Call the request until it succeeds, a fatal error is raised or the attempts are exhausted.
+
+			Arguments:
+				request(object)   => Function without argument sending the request.
+				breaker(object)   => The "circuitBreaker" of the device, None for none (Default = None)
+				deadline(object)  => The "deadline" of the request, None for none (Default = None)
+				reset(object)     => Function receiving the error, called after every failed attempt, retried or not (ex: close the dead session) (Default = None)
+				idempotent(bool)  => If it is False (ex: <edit-config>, <commit>), the request is not sent again after a timeout or a dropped transport (Default = True)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		attempt: int
+		result: object
+		delay: float
+
+		for attempt in range(self.attempts):
+			self.prepare(breaker, deadline)
+			try:
+				result=request()
+			except Exception as error:
+				## The session is reset even if the error is raised, so a session in an unknown state is not reused
+				if reset is not None:
+					reset(error)
+				delay=self.handle(error, attempt, breaker, deadline, idempotent)
+				time.sleep(delay)
+				continue
+			if breaker is not None:
+				breaker.success()
+			return result
+
+
+	async def callAsync(self, request: object, breaker: object=None, deadline: object=None, reset: object=None, idempotent: bool=True) -> object:
+		"""
+			Asyncio version of call(), the request and the reset are coroutine functions.
+
+			Arguments:
+				request(object)   => Coroutine function without argument sending the request.
+				breaker(object)   => The "circuitBreaker" of the device, None for none (Default = None)
+				deadline(object)  => The "deadline" of the request, None for none (Default = None)
+				reset(object)     => Coroutine function receiving the error, awaited after every failed attempt, retried or not (Default = None)
+				idempotent(bool)  => If it is False (ex: <edit-config>, <commit>), the request is not sent again after a timeout or a dropped transport (Default = True)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		attempt: int
+		result: object
+		delay: float
+
+		for attempt in range(self.attempts):
+			self.prepare(breaker, deadline)
+			try:
+				result=await request()
+			except Exception as error:
+				## The session is reset even if the error is raised, so a session in an unknown state is not reused
+				if reset is not None:
+					await reset(error)
+				delay=self.handle(error, attempt, breaker, deadline, idempotent)
+				await asyncio.sleep(delay)
+				continue
+			if breaker is not None:
+				breaker.success()
+			return result
+
+
+## Policy of the objects created without one: two retries, after at most 0.1 then 0.2 seconds
+DEFAULT_POLICY: object=retryPolicy(attempts=3, baseDelay=0.1, maxDelay=1.0)
@@ -0,0 +1,255 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+In-memory index of the route-map table of a device.
+
+The whole <native><route-map> subtree is read with a single <get-config> and indexed by route-map name and sequence
+number, so the lookups do not need any other request to the device.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import time, re, xmlstream
+
+## Lines of the CLI configuration, matched in a single pass over the output: a route-map sequence, a "set" or "match"
+## clause of the sequence, "ip bgp-community new-format", any other top-level line or any other line (each match
+## takes a whole line, so the scan never restarts inside a line)
+CLI_LINE: object=re.compile(
+	r"^(?:route-map[ \t]+(?P<name>\S+)[ \t]+(?P<operation>permit|deny)[ \t]+(?P<sequence>\d+)[ \t\r]*$"
+	r"|[ \t]+(?P<clause>set|match)[ \t]+(?P<key>\S+)(?P<value>[^\n]*)"
+	r"|(?P<newFormat>ip[ \t]+bgp-community[ \t]+new-format)[ \t\r]*$"
+	r"|(?P<other>\S)[^\n]*"
+	r"|[^\n]*)",
+	re.MULTILINE
+)
+
+
+def parseRouteMaps(xml: str) -> dict:
+	"""
+		Parse a <get-config> reply of the route-map table and return the index.
+
+		Arguments:
+			xml(str)  => The <data> of the reply.
+
+		Returns:
+			dict => {routeMapName: {seq_no: {"operation": str, "set": dict, "match": dict, "communities": list}}}
+	"""
+	return dict(xmlstream.iterRouteMaps(xml))
+
+
+def parseRunningConfig(text: str) -> tuple:
+	"""
+		Parse CLI outputs of the running configuration ("show running-config | section route-map", "| include
+		bgp-community", ...) into the same index as parseRouteMaps(). The outputs of several commands can be parsed
+		at once by joining them.
+
+		Arguments:
+			text(str)  => The CLI output.
+
+		Returns:
+			tuple => (routeMaps(dict), newFormat(bool)), see parseRouteMaps() for the index
+	"""
+
+	## Variables
+	routeMaps: dict={}
+	newFormat: bool=False
+	sequence: dict=None
+	name: str
+	operation: str
+	number: str
+	clause: str
+	key: str
+	value: str
+	configured: str
+	other: str
+
+	## findall() returns plain tuples, cheaper than a match object per line
+	for name, operation, number, clause, key, value, configured, other in CLI_LINE.findall(text):
+		if name:
+			## New sequence
+			sequence={"operation": operation, "set": {}, "match": {}, "communities": []}
+			routeMaps.setdefault(name, {})[int(number)]=sequence
+		elif clause:
+			## "set" or "match" clause of the current sequence
+			if sequence is None:
+				continue
+			value=value.strip()
+			sequence[clause][key]=value
+			if clause == "set" and key == "community":
+				sequence["communities"]=[community for community in value.split() if community not in ("additive", "none")]
+		elif configured:
+			newFormat=True
+			sequence=None
+		elif other:
+			## Any other configuration ends the route-map
+			sequence=None
+
+	return routeMaps, newFormat
+
+
+def parseRouteMapConfig(text: str) -> dict:
+	"""
+		Parse the CLI output of "show running-config | section route-map" into the same index as parseRouteMaps().
+
+		Arguments:
+			text(str)  => The CLI output.
+
+		Returns:
+			dict => {routeMapName: {seq_no: {"operation": str, "set": dict, "match": dict, "communities": list}}}
+	"""
+	return parseRunningConfig(text)[0]
+
+
+class routeMapTable(object):
+	"""
+		Cache of the route-map table of a device.
+	"""
+
+	## Class variables
+	netconf: object
+	ttl: float
+	routeMaps: dict
+	loaded: float
+
+	def __init__(self, netconf: object, ttl: float=60.0) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				netconf(object)  => The "netconf" object used to read the table.
+				ttl(float)       => Seconds before the table is read again, None to keep it until invalidate() (Default = 60.0)
+
+			Returns:
+				object
+		"""
+		self.netconf=netconf
+		self.ttl=ttl
+		self.routeMaps=None
+		self.loaded=0.0
+
+
+	def load(self) -> dict:
+		"""
+			Read the whole route-map table from the device.
+
+			Arguments:
+				None
+
+			Returns:
+				dict
+		"""
+
+		## Variables
+		xml: str=self.netconf.getConfig()
+
+		with self.netconf.instrumentation.span("netconf.parse", host=self.netconf.host):
+			self.routeMaps=parseRouteMaps(xml)
+		self.loaded=time.monotonic()
+		return self.routeMaps
+
+
+	def invalidate(self) -> None:
+		"""
+			Drop the cached table, it will be read again on the next lookup.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		self.routeMaps=None
+		return None
+
+
+	def getIndex(self) -> dict:
+		"""
+			Return the index, the table is read if it is not cached or expired.
+
+			Arguments:
+				None
+
+			Returns:
+				dict
+		"""
+		if self.routeMaps is None or (self.ttl is not None and time.monotonic() - self.loaded > self.ttl):
+			return self.load()
+		return self.routeMaps
+
+
+	def __contains__(self, routeMapName: str) -> bool:
+		return routeMapName in self.getIndex()
+
+
+	def __iter__(self) -> object:
+		return iter(self.getIndex().items())
+
+
+	def __len__(self) -> int:
+		return len(self.getIndex())
+
+
+	def names(self) -> list:
+		"""
+			Return the name of all the route-maps.
+
+			Arguments:
+				None
+
+			Returns:
+				list
+		"""
+		return list(self.getIndex())
+
+
+	def getRouteMap(self, routeMapName: str) -> dict:
+		"""
+			Return the sequences of a route-map, an empty dict if the route-map does not exist.
+
+			Arguments:
+				routeMapName(str)  => Name of the route-map.
+
+			Returns:
+				dict => {seq_no: {"operation": str, "set": dict, "match": dict, "communities": list}}
+		"""
+		return self.getIndex().get(routeMapName, {})
+
+
+	def getSequence(self, routeMapName: str, routeMapSequence: int=10) -> dict:
+		"""
+			Return a sequence of a route-map, None if it does not exist.
+
+			Arguments:
+				routeMapName(str)      => Name of the route-map.
+				routeMapSequence(int)  => Sequence number (Default = 10)
+
+			Returns:
+				dict
+		"""
+		return self.getRouteMap(routeMapName).get(int(routeMapSequence))
+
+
+	def getCommunities(self, routeMapName: str, routeMapSequence: int=10) -> list:
+		"""
+			Return the BGP communities set by a sequence of a route-map.
+
+			Arguments:
+				routeMapName(str)      => Name of the route-map.
+				routeMapSequence(int)  => Sequence number (Default = 10)
+
+			Returns:
+				list
+		"""
+
+		## Variables
+		sequence: dict=self.getSequence(routeMapName, routeMapSequence)
+
+		if sequence is None:
+			return []
+		return list(sequence["communities"])
@@ -14,8 +14,13 @@ __license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
 
 
 ## Import librairies
-import sys, pprint, xmltodict, netmiko
+import sys, re, time, pprint, netmiko, sshpool, instrument, retry, batch, transaction, sync, routemap, xmlstream, payload, community
 from ncclient import manager as ncclientManager
+from ncclient.transport.errors import TransportError
+from ncclient.operations.rpc import RPCError
+
+## Timeout in seconds of an RPC without deadline (the default of ncclient)
+RPC_TIMEOUT: float=30
 
 class netconf(object):
 	"""
@@ -27,17 +32,39 @@ class netconf(object):
 	port: int
 	username: str
 	password: str
-
-
-	def __init__(self, host: str, username: str, password: str, port: int = 830) -> object:
+	keepalive: int
+	manager: object
+	pending: list
+	candidate: bool
+	inTransaction: bool
+	routeMapTable: object
+	instrumentation: object
+	capabilityCache: object
+	retryPolicy: object
+	circuitBreaker: object
+	deadline: object
+	writeScheduler: object
+
+
+	def __init__(self, host: str, username: str, password: str, port: int = 830, keepalive: int = 30, candidate: bool = False, instrumentation: object = None, capabilityCache: object = None, retryPolicy: object = None, circuitBreaker: object = None, writeScheduler: object = None) -> object:
 		"""
 			Constructor that return an instantiation of the object.
 
+			The NETCONF session is not opened here, it is opened on the first request and then reused by every
+			method until close() is called.
+
 			Arguments:
 				host(str)       => FQDN or IP address of the NETCONF host.
 				username(str)   => Username for the NETCONF host.
 				passowrd(str)   => Password for the NETCONF host.
 				port(int)       => Port for the Netconf host (Default = 830)
+				keepalive(int)  => Interval in seconds between SSH keepalive packets, 0 to disable (Default = 30)
+				candidate(bool) => If it is True and the host supports ":candidate", the writes are done on the candidate datastore and committed (Default = False)
+				instrumentation(object) => "instrument.instrumentation" object receiving the timings and the counters, None to disable (Default = None)
+				capabilityCache(object) => "capabilities.capabilityCache" object keeping the capabilities and the quirks of the host between runs (Default = None)
+				retryPolicy(object)     => "retry.retryPolicy" object deciding which errors are retried and when, None for retry.DEFAULT_POLICY (Default = None)
+				circuitBreaker(object)  => "retry.circuitBreaker" object of the host, shared by its sessions, None to disable (Default = None)
+				writeScheduler(object)  => "scheduler.writeScheduler" object of the host, shared by its writers: the writes are queued, coalesced and sent inside <lock>/<unlock>, None to send them directly (Default = None)
 
 			Returns:
 				object
@@ -46,6 +73,489 @@ class netconf(object):
 		self.port=port
 		self.username=username
 		self.password=password
+		self.keepalive=keepalive
+		self.manager=None
+		self.pending=None
+		self.candidate=candidate
+		self.inTransaction=False
+		self.routeMapTable=None
+		self.instrumentation=instrumentation if instrumentation is not None else instrument.DISABLED
+		self.capabilityCache=capabilityCache
+		self.retryPolicy=retryPolicy if retryPolicy is not None else retry.DEFAULT_POLICY
+		self.circuitBreaker=circuitBreaker
+		self.deadline=None
+		self.writeScheduler=writeScheduler
+
+
+	def __enter__(self) -> object:
+		"""
+			Open the NETCONF session when entering a "with" block.
+
+			Returns:
+				object
+		"""
+		self.connect()
+		return self
+
+
+	def __exit__(self, *args: object) -> None:
+		"""
+			Close the NETCONF session when leaving a "with" block.
+
+			Returns:
+				None
+		"""
+		self.close()
+
+
+	def connect(self) -> object:
+		"""
+			Return the NETCONF session, the session is (re)opened only if there is no live session.
+
+			Arguments:
+				None
+
+			Returns:
+				object
+		"""
+
+		## Reuse the session if it is still connected
+		if self.manager is not None and self.manager.connected:
+			return self.manager
+
+		## Otherwise, drop the dead session and open a new one
+		self.close()
+		with self.instrumentation.span("netconf.connect", host=self.host):
+			self.manager=ncclientManager.connect(host=self.host, port=self.port, username=self.username, password=self.password, hostkey_verify=False, timeout=self.deadline.limit(RPC_TIMEOUT) if self.deadline is not None else None)
+
+		## Count the RPCs and the bytes of the session
+		if self.instrumentation.enabled():
+			instrument.byteCounter(self.instrumentation, self.manager._session, self.host)
+
+		## Record the capabilities, the quirks are dropped if the software version changed
+		if self.capabilityCache is not None:
+			self.capabilityCache.update(self.host, self.port, list(self.manager.server_capabilities))
+
+		## Keep the SSH transport alive between the requests
+		if self.keepalive:
+			self.manager._session._transport.set_keepalive(self.keepalive)
+
+		return self.manager
+
+
+	def close(self) -> None:
+		"""
+			Close the NETCONF session if it is opened.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Nothing to do if there is no session
+		if self.manager is None:
+			return None
+
+		## Try to close the session gracefully, the transport can already be down
+		try:
+			if self.manager.connected:
+				self.manager.close_session()
+		except TransportError:
+			pass
+		finally:
+			self.manager=None
+
+		## End the function
+		return None
+
+
+	def execute(self, request: object, idempotent: bool = True) -> object:
+		"""
+			Execute a request on the NETCONF session and return its result. The retryable errors (transport dropped,
+			timeout, "lock-denied", ...) are retried as decided by the retry policy. A session which failed or timed
+			out is closed, even if the error is not retried, and the next request opens a new one. A write which is
+			not idempotent is only retried after an <rpc-error> (ex: "lock-denied"), its session is opened beforehand
+			so the failures of the connection are still retried. The RPC timeout is reduced to the time left before
+			the deadline, if any.
+
+			Arguments:
+				request(object)   => Function receiving the ncclient manager as argument.
+				idempotent(bool)  => If it is False (ex: <edit-config>, <commit>), the request is not sent again after a timeout or a dropped transport (Default = True)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		manager: object
+
+		def attempt() -> object:
+			manager=self.connect()
+			manager.timeout=self.deadline.limit(RPC_TIMEOUT) if self.deadline is not None else RPC_TIMEOUT
+			with self.instrumentation.span("netconf.rpc", host=self.host):
+				return request(manager)
+
+		def reset(error: Exception) -> None:
+			## The session is dead or in an unknown state, the next attempt opens a new one
+			if not isinstance(error, RPCError):
+				self.close()
+
+		## Nothing is sent while the session is opened, so it can be retried for any request
+		if not idempotent:
+			self.retryPolicy.call(self.connect, breaker=self.circuitBreaker, deadline=self.deadline, reset=reset)
+
+		return self.retryPolicy.call(attempt, breaker=self.circuitBreaker, deadline=self.deadline, reset=reset, idempotent=idempotent)
+
+
+	def setDeadline(self, seconds: float = None) -> object:
+		"""
+			Set the deadline of the next requests, shared with other objects if a "retry.deadline" object is given.
+
+			Arguments:
+				seconds(float)  => Seconds from now, a "retry.deadline" object or None to remove the deadline (Default = None)
+
+			Returns:
+				object => The "retry.deadline" object or None
+		"""
+		if seconds is None or isinstance(seconds, retry.deadline):
+			self.deadline=seconds
+		else:
+			self.deadline=retry.deadline(seconds)
+		return self.deadline
+
+
+	def getConfig(self, routeMapName: str = None, routeMapSequence: int = None, fields: list = None, routeMaps: bool = True, newFormat: bool = False, source: str = "running") -> str:
+		"""
+			Read a datastore with the tightest filter of the query (see payload.getFilter) and return the
+			<data> of the reply. The filter is an XPath expression if the host supports ":xpath", and the default
+			values are trimmed from the reply if the host supports the "trim" mode of ":with-defaults".
+
+			Arguments:
+				routeMapName(str)      => Name of the route-map, None for all the route-maps (Default = None)
+				routeMapSequence(int)  => Sequence number, None for all the sequences (Default = None)
+				fields(list)           => Fields of the sequences (ex: payload.COMMUNITY_LIST), None for the whole sequences (Default = None)
+				routeMaps(bool)        => If it is False, no route-map is read (Default = True)
+				newFormat(bool)        => If it is True, the bgp-community new-format is read too (Default = False)
+				source(str)            => Datastore to read [running|candidate] (Default = running)
+
+			Returns:
+				str
+		"""
+
+		def request(manager: object) -> str:
+			## The capabilities are the ones of the session actually used
+			filter=payload.getFilter(routeMapName=routeMapName, routeMapSequence=routeMapSequence, fields=fields, routeMaps=routeMaps, newFormat=newFormat, xpath=":xpath" in manager.server_capabilities)
+			return manager.get_config(source=source, filter=filter, with_defaults=getWithDefaults(manager.server_capabilities)).data_xml
+
+		return self.execute(request)
+
+
+	def editConfig(self, config: str) -> None:
+		"""
+			Send a <config> payload with an <edit-config>. Inside a batch, the payload is kept and sent at the end
+			of the batch. With a write scheduler, the payload is queued with the writes of the other objects of the
+			host and sent in a locked edit (except inside a transaction, which commits its own writes).
+
+			Arguments:
+				config(str)  => The <config> payload.
+
+			Returns:
+				None
+		"""
+
+		## Keep the payload for later if a batch is running
+		if self.pending is not None:
+			self.pending.append(config)
+			return None
+
+		## Let the scheduler of the host send the payload
+		if self.writeScheduler is not None and not self.inTransaction:
+			try:
+				self.writeScheduler.submit(self, config)
+			finally:
+				self.invalidate()
+			return None
+
+		## Variables
+		target: str=self.getTarget()
+
+		## NETCONF request
+		self.execute(lambda manager: manager.edit_config(target=target, config=config), idempotent=False)
+
+		## The cached route-map table is not up to date anymore
+		self.invalidate()
+
+		## Outside of a transaction, each write on the candidate is committed right away
+		if target == "candidate" and not self.inTransaction:
+			self.commit()
+
+		## End the function
+		return None
+
+
+	def editLocked(self, config: str) -> None:
+		"""
+			Send a <config> payload inside <lock> and <unlock> of the target datastore, so no other session writes in
+			between. On the candidate datastore, the payload is committed before the unlock, or discarded if it is
+			rejected. A "lock-denied" or "in-use" error is retried by the retry policy.
+
+			Arguments:
+				config(str)  => The <config> payload.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		target: str=self.getTarget()
+
+		def request(manager: object) -> None:
+			manager.lock(target=target)
+			try:
+				manager.edit_config(target=target, config=config)
+				if target == "candidate":
+					manager.commit()
+			except RPCError:
+				if target == "candidate":
+					manager.discard_changes()
+				raise
+			finally:
+				manager.unlock(target=target)
+
+		## NETCONF request
+		self.execute(request, idempotent=False)
+		self.invalidate()
+
+		## End the function
+		return None
+
+
+	def supports(self, capability: str) -> bool:
+		"""
+			Return True if the host advertised the capability in its hello message. Without live session, the
+			capabilities of the cache are used if the host is in it.
+
+			Arguments:
+				capability(str)  => Capability URI or abbreviation (ex: ":candidate")
+
+			Returns:
+				bool
+		"""
+
+		## Variables
+		cached: object
+
+		if self.capabilityCache is not None and (self.manager is None or not self.manager.connected):
+			cached=self.capabilityCache.getCapabilities(self.host, self.port)
+			if cached is not None:
+				return capability in cached
+
+		return capability in self.connect().server_capabilities
+
+
+	def hasEncodingBug(self, probeName: str = "NETCONF_ENCODING_PROBE") -> bool:
+		"""
+			Return True if the host has the community encoding bug: "655370" and "10:10" are stored as two entries
+			by NETCONF. The result comes from the capability cache, otherwise a probe route-map is created, read and
+			deleted, and the result is recorded in the cache. The probe refuses to run if a route-map already has
+			its name, since it would be deleted with the probe.
+
+			Arguments:
+				probeName(str)  => Name of the temporary route-map used by the probe (Default = "NETCONF_ENCODING_PROBE")
+
+			Returns:
+				bool
+		"""
+
+		## Variables
+		encodingBug: bool=None
+
+		## Known quirk of this software version
+		if self.capabilityCache is not None:
+			self.connect()
+			encodingBug=self.capabilityCache.getQuirk(self.host, self.port, "encodingBug")
+			if encodingBug is not None:
+				return encodingBug
+
+		## The probe needs its writes to be applied right away
+		if self.pending is not None or self.inTransaction:
+			raise ValueError("The encoding bug cannot be detected inside a batch or a transaction")
+
+		## The probe must not overwrite then delete an existing route-map
+		if probeName in routemap.parseRouteMaps(self.getConfig(routeMapName=probeName, fields=[payload.SEQUENCE_NUMBER])):
+			raise ValueError("The route-map {} already exists, choose another probe name".format(probeName))
+
+		## Write the same community with both encodings
+		try:
+			self.setRouteMapBGPCommunity(routeMapName=probeName, BGPCommunity="655370")
+			self.setRouteMapBGPCommunity(routeMapName=probeName, BGPCommunity="10:10")
+			encodingBug=len(self.getRouteMapBGPCommunity(routeMapName=probeName)) > 1
+		finally:
+			self.deleteRouteMap(routeMapName=probeName)
+
+		if self.capabilityCache is not None:
+			self.capabilityCache.setQuirk(self.host, self.port, "encodingBug", encodingBug)
+		return encodingBug
+
+
+	def getTarget(self) -> str:
+		"""
+			Return the datastore where the writes are done: "candidate" if the candidate mode is enabled and
+			supported by the host, otherwise "running".
+
+			Arguments:
+				None
+
+			Returns:
+				str
+		"""
+		if self.candidate and self.supports(":candidate"):
+			return "candidate"
+		return "running"
+
+
+	def commit(self, confirmTimeout: int = None) -> None:
+		"""
+			Commit the candidate datastore. With a confirm timeout, the commit is rolled back by the host if
+			confirm() is not called before the end of the timeout.
+
+			Arguments:
+				confirmTimeout(int)  => Seconds before the rollback, ignored if the host does not support ":confirmed-commit" (Default = None)
+
+			Returns:
+				None
+		"""
+
+		## NETCONF request
+		if confirmTimeout is not None and self.supports(":confirmed-commit"):
+			self.execute(lambda manager: manager.commit(confirmed=True, timeout=str(confirmTimeout)), idempotent=False)
+		else:
+			self.execute(lambda manager: manager.commit(), idempotent=False)
+		self.invalidate()
+
+		## End the function
+		return None
+
+
+	def confirm(self) -> None:
+		"""
+			Confirm a commit done with a confirm timeout.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		self.execute(lambda manager: manager.commit(), idempotent=False)
+		return None
+
+
+	def cancelCommit(self) -> None:
+		"""
+			Roll back a commit done with a confirm timeout without waiting for the end of the timeout.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		self.execute(lambda manager: manager.cancel_commit(), idempotent=False)
+		self.invalidate()
+		return None
+
+
+	def discard(self) -> None:
+		"""
+			Discard the uncommitted changes of the candidate datastore.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		self.execute(lambda manager: manager.discard_changes())
+		return None
+
+
+	def getRouteMapTable(self, ttl: float = 60.0) -> object:
+		"""
+			Return the cached route-map table of the host. The whole table is read with a single request, then
+			read again when the TTL expires or after a write done by this object.
+
+			Arguments:
+				ttl(float)  => Seconds before the table is read again, None to keep it until the next write (Default = 60.0)
+
+			Returns:
+				object
+		"""
+		if self.routeMapTable is None:
+			self.routeMapTable=routemap.routeMapTable(self, ttl=ttl)
+		self.routeMapTable.ttl=ttl
+		return self.routeMapTable
+
+
+	def invalidate(self) -> None:
+		"""
+			Drop the cached route-map table.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		if self.routeMapTable is not None:
+			self.routeMapTable.invalidate()
+		return None
+
+
+	def transaction(self, confirmTimeout: int = None) -> object:
+		"""
+			Return a context manager committing all the writes done inside the "with" block at once. The changes are
+			discarded if the block raises an exception. Without the candidate mode, the writes go to running as usual.
+
+			Arguments:
+				confirmTimeout(int)  => Seconds before the rollback of the commit if confirm() is not called (Default = None)
+
+			Returns:
+				object
+		"""
+		return transaction.configTransaction(self, confirmTimeout=confirmTimeout)
+
+
+	def syncRouteMap(self, desiredState: dict, prune: bool = True, dryRun: bool = False) -> list:
+		"""
+			Converge the route-maps onto the desired state with a single read and, only if something differs, a single
+			<edit-config> holding the needed changes (two if equivalent encodings of a community must be removed first).
+			The communities are compared on their value ("655370" = "10:10").
+
+			Arguments:
+				desiredState(dict)  => {routeMapName: {seq_no: {"operation": "permit" or "deny", "communities": list}}}, a route-map without sequence is removed
+				prune(bool)         => If it is True, the sequences which are not in the desired state are removed (Default = True)
+				dryRun(bool)        => If it is True, return the changes without sending them (Default = False)
+
+			Returns:
+				list => The changes (see sync.diffRouteMaps), empty if the device is already compliant
+		"""
+		return sync.syncRouteMaps(self, desiredState, prune=prune, dryRun=dryRun)
+
+
+	def batch(self) -> object:
+		"""
+			Return a context manager merging all the writes done inside the "with" block into a single <edit-config>.
+
+			Arguments:
+				None
+
+			Returns:
+				object
+		"""
+		return batch.configBatch(self)
 
 
 	def getRouteMapByName(self, routeMapName: str="routeMapName") -> str:
@@ -61,22 +571,9 @@ class netconf(object):
 
 		## Variables
 		netconfResponse: str
-		filter: str
-
-		## Define filter for the NETCONF request.
-		filter="""
-			<filter>
-				<native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
-					<route-map>
-						<name>{routeMapName}</name>
-					</route-map>
-				</native>
-			</filter>
-		""".format(routeMapName=routeMapName)
 
 		## Send the NETCONF request and store the result
-		with ncclientManager.connect(host=self.host, port=self.port, username=self.username, password=self.password, hostkey_verify=False) as manager:
-			netconfResponse=manager.get_config(source='running', filter=filter).data_xml
+		netconfResponse=self.getConfig(routeMapName=routeMapName)
 
 		## Return the list of route-map in XML format
 		return netconfResponse
@@ -84,62 +581,64 @@ class netconf(object):
 
 	def setRouteMap(self, routeMapName: str, routeMapSequence: int=10, routeMapOperation: str="permit", delete: bool=False) -> None:
 		"""
-			Create a route-map.
+			Create or delete a route-map sequence.
 
 			Arguments:
-				routeMapName(str)       => Name of the route-map to create.
+				routeMapName(str)       => Name of the route-map to update.
 				routeMapSequence(int)   => Sequence number of the route-map (Default = 10)
 				routeMapOperation(str)  => Action to apply to the route-map [permit|deny] (Default = permit)
-				delete(bool)            => If it is True, the route-map will be deleted; If it is False, the route-map information will be merged (Default = False)
+				delete(bool)            => If it is True, only the sequence is deleted, the route-map is deleted with its last sequence; If it is False, the route-map information will be merged (Default = False)
 
 			Returns:
 				None
-
-			Todo:
-				Improvement: When the delete flag is "True", it delete the whole route-map and not only the sequence targeted. The idea is to move the operation="remove" to the "route-map-without-order-seq" node and to add a validation "if (last item) then (operation=remove added to "route-map" node), otherwise it will always keep "Seq=10 Ops=Permit" by default.
 		"""
 
 		## Variables
-		operation: str="merge"
 		config: str
-
-		## Set action to "remove" if the delete flag is set to "True"
-		if delete:
-			operation="remove"
-		
-		## Verify if the operation is valide (permit or deny)
-		if (routeMapOperation != "permit" and routeMapOperation != "deny"):
-			raise ValueError("routeMapOperation must be either 'permit' or 'deny'")
+		sequences: set
 
 		## Define the configuration
-		config="""
-			<config>
-				<native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
-					<route-map operation="{operation}">
-						<name>{routeMapName}</name>
-						<route-map-without-order-seq xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-route-map">
-							<seq_no>{routeMapSequence}</seq_no>
-							<operation>{routeMapOperation}</operation>
-						</route-map-without-order-seq>
-					</route-map>
-				</native>
-			</config>
-		""".format(routeMapName=routeMapName, routeMapSequence=routeMapSequence, routeMapOperation=routeMapOperation, operation=operation)
+		if delete:
+			## The sequence numbers of the route-map are read to know if it is the last sequence, inside a transaction
+			## on the candidate they include its uncommitted writes, inside a batch the writes waiting to be sent
+			sequences=set(routemap.parseRouteMaps(self.getConfig(routeMapName=routeMapName, fields=[payload.SEQUENCE_NUMBER], source=self.getTarget() if self.inTransaction else "running")).get(routeMapName, {}))
+			if self.pending is not None:
+				sequences=batch.getSequences(self.pending, routeMapName, sequences)
+			if sequences - {int(routeMapSequence)}:
+				config=payload.getSequenceConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, routeMapOperation=routeMapOperation, delete=True)
+			else:
+				config=payload.getRouteMapConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, routeMapOperation=routeMapOperation, delete=True)
+		else:
+			config=payload.getRouteMapConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, routeMapOperation=routeMapOperation)
 
 		## NETCONF request
-		with ncclientManager.connect(host=self.host, port=self.port, username=self.username, password=self.password, hostkey_verify=False) as manager:
-			manager.edit_config(target="running", config=config)
+		self.editConfig(config)
 
 		## End the function
 		return None
 
-	def getRouteMapBGPCommunity(self, routeMapName: str, routeMapSequence: int=10) -> list:
+	def deleteRouteMap(self, routeMapName: str) -> None:
+		"""
+			Delete a route-map with all its sequences.
+
+			Arguments:
+				routeMapName(str)  => Name of the route-map to delete.
+
+			Returns:
+				None
+		"""
+		self.editConfig(payload.getRouteMapConfig(routeMapName=routeMapName, delete=True))
+		return None
+
+	def getRouteMapBGPCommunity(self, routeMapName: str, routeMapSequence: int=10, cached: bool=False, canonical: bool=False) -> list:
 		"""
 			Get the list BGP Community from a route-map.
 
 			Arguments:
 				routeMapName(str)     => Name of the route-map to get the BGP community list.
 				routeMapSequence(int) => Sequence number where to get the set instructions (Default = 10)
+				cached(bool)          => If it is True, the list comes from the cached route-map table (Default = False)
+				canonical(bool)       => If it is True, the communities are returned sorted, deduplicated and in the "AA:NN" format, so "655370" and "10:10" are counted once (Default = False)
 
 			Returns:
 				list
@@ -147,48 +646,32 @@ class netconf(object):
 
 		## Variables
 		netconfResponse: str
-		filter: str
 		communities: list
 
-		## Define filter for the NETCONF request.
-		filter="""
-			<filter>
-				<native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
-					<route-map>
-						<name>{routeMapName}</name>
-						<route-map-without-order-seq xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-route-map">
-							<seq_no>{routeMapSequence}</seq_no>
-						</route-map-without-order-seq>
-					</route-map>
-				</native>
-			</filter>
-		""".format(routeMapName=routeMapName, routeMapSequence=routeMapSequence)
+		## Use the cached route-map table if requested
+		if cached:
+			communities=self.getRouteMapTable().getCommunities(routeMapName, routeMapSequence)
+			if canonical:
+				return community.canonicalCommunities(communities)
+			return communities
 
-		## Send the NETCONF request and store the result
-		with ncclientManager.connect(host=self.host, port=self.port, username=self.username, password=self.password, hostkey_verify=False) as manager:
-			netconfResponse=xmltodict.parse(manager.get_config(source='running', filter=filter).data_xml)
+		## Send the NETCONF request and store the result, only the community-list of the sequence is selected
+		netconfResponse=self.getConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, fields=[payload.COMMUNITY_LIST])
 
-		## Process the result
-		try:
-			if type(netconfResponse['data']['native']['route-map']['route-map-without-order-seq']['set']['community']['community-well-known']['community-list']) is str:
-				## If the result is a string, create a list
-				communities= [netconfResponse['data']['native']['route-map']['route-map-without-order-seq']['set']['community']['community-well-known']['community-list']]
-			elif type(netconfResponse['data']['native']['route-map']['route-map-without-order-seq']['set']['community']['community-well-known']['community-list']) is list:
-				## Else if it is already a list, just use it
-				communities = netconfResponse['data']['native']['route-map']['route-map-without-order-seq']['set']['community']['community-well-known']['community-list']
-			else:
-				## If it is none of them, there is a problem
-				raise KeyError
-		except KeyError:
-			## If there is a problem, return nothing
-			communities = []
+		## Extract the communities of the sequence while parsing the reply
+		with self.instrumentation.span("netconf.parse", host=self.host):
+			communities=xmlstream.getCommunities(netconfResponse, routeMapName, routeMapSequence)
+
+		## Normalise the communities if requested
+		if canonical:
+			communities=community.canonicalCommunities(communities)
 		
 		## Return the array of BGP Communities
 		return communities
 
 	def setRouteMapBGPCommunity(self, routeMapName: str, routeMapSequence: int=10, BGPCommunity: str="1:1", delete: bool=False) -> None:
 		"""
-			Add the BGP community value to the targeted route-map/sequence.
+			Add or remove a BGP community of a route-map sequence.
 
 			Arguments:
 				routeMapName(str)       => Name of the route-map to update.
@@ -198,43 +681,16 @@ class netconf(object):
 
 			Returns:
 				None
-
-			Todo:
-				Improvement: Veirfy if the route-map/seq exists before adding the BGP community.
 		"""
 
 		## Variables
-		operation: str="merge"
 		config: str
 
-		## Set action to "remove" if the delete flag is set to "True"
-		if delete:
-			operation="remove"
-
 		## Define the configuration
-		config="""
-			<config>
-				<native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
-					<route-map>
-						<name>{routeMapName}</name>
-						<route-map-without-order-seq xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-route-map">
-							<seq_no>{routeMapSequence}</seq_no>
-							<set>
-								<community>
-									<community-well-known>
-										<community-list operation="{operation}">{BGPCommunity}</community-list>
-									</community-well-known>
-								</community>
-							</set>
-						</route-map-without-order-seq>
-					</route-map>
-				</native>
-			</config>
-		""".format(routeMapName=routeMapName, routeMapSequence=routeMapSequence, BGPCommunity=BGPCommunity, operation=operation)
+		config=payload.getCommunityConfig(routeMapName=routeMapName, routeMapSequence=routeMapSequence, BGPCommunity=BGPCommunity, delete=delete)
 
 		## NETCONF request
-		with ncclientManager.connect(host=self.host, port=self.port, username=self.username, password=self.password, hostkey_verify=False) as manager:
-			manager.edit_config(target="running", config=config)
+		self.editConfig(config)
 
 		## End the function
 		return None
@@ -252,28 +708,13 @@ class netconf(object):
 		"""
 		## Variables
 		netconfResponse: str
-		filter: str
-
-		## Define filter for the NETCONF request.
-		filter="""
-			<filter>
-				<native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
-					<ip>
-						<bgp-community />
-					</ip>
-				</native>
-			</filter>
-		"""
 
-		## Send the NETCONF request and store the result
-		with ncclientManager.connect(host=self.host, port=self.port, username=self.username, password=self.password, hostkey_verify=False) as manager:
-			netconfResponse=xmltodict.parse(manager.get_config(source='running', filter=filter).data_xml)
+		## Send the NETCONF request and store the result, only the new-format leaf is selected
+		netconfResponse=self.getConfig(routeMaps=False, newFormat=True)
 
 		## Veify if the configuration exist and return the associated value
-		if ('native' in netconfResponse['data']):
-			return True
-		else:
-			return False
+		with self.instrumentation.span("netconf.parse", host=self.host):
+			return xmlstream.hasNode(netconfResponse, "new-format")
 
 
 	def setBGPCommunityNewFormat(self, delete: bool=False) -> None:
@@ -288,29 +729,13 @@ class netconf(object):
 		"""
 
 		## Variables
-		operation: str="merge"
 		config: str
 
-		## Set action to "remove" if the delete flag is set to "True"
-		if delete:
-			operation="remove"
-
 		## Define the configuration
-		config="""
-			<config>
-				<native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
-					<ip>
-						<bgp-community>
-							<new-format operation="{operation}" />
-						</bgp-community>
-					</ip>
-				</native>
-			</config>
-		""".format(operation=operation)
+		config=payload.getNewFormatConfig(delete=delete)
 
 		## NETCONF request
-		with ncclientManager.connect(host=self.host, port=self.port, username=self.username, password=self.password, hostkey_verify=False) as manager:
-			manager.edit_config(target="running", config=config)
+		self.editConfig(config)
 
 		## End the function
 		return None
@@ -327,17 +752,26 @@ class ssh(object):
 	port: int
 	username: str
 	password: str
+	pool: object
 	ssh: object
+	instrumentation: object
+	retryPolicy: object
+	circuitBreaker: object
+	deadline: object
 
-	def __init__(self, host: str, username: str, password: str, port: int = 22) -> object:
+	def __init__(self, host: str, username: str, password: str, port: int = 22, pool: object=None, instrumentation: object=None, retryPolicy: object=None, circuitBreaker: object=None) -> object:
 		"""
-			Constructor that return an instantiation of the object.
+			Constructor that return an instantiation of the object. The SSH session is opened by the first command.
 
 			Arguments:
 				host(str)       => FQDN or IP address of the SSH host.
 				username(str)   => Username for the SSH host.
 				passowrd(str)   => Password for the SSH host.
 				port(int)       => Port for the SSH host (Default = 22)
+				pool(object)    => "sshpool.sshPool" object sharing the sessions, None to use a private session (Default = None)
+				instrumentation(object) => "instrument.instrumentation" object receiving the timings and the counters, None to disable (Default = None)
+				retryPolicy(object)     => "retry.retryPolicy" object deciding which errors are retried and when, None for retry.DEFAULT_POLICY (Default = None)
+				circuitBreaker(object)  => "retry.circuitBreaker" object of the host, None to disable (Default = None)
 
 			Returns:
 				object
@@ -346,7 +780,93 @@ class ssh(object):
 		self.port=port
 		self.username=username
 		self.password=password
-		self.ssh= netmiko.ConnectHandler(**{'device_type': 'cisco_ios', 'host': self.host, 'username': self.username, 'password': self.password, 'port': self.port, 'timeout': 300})
+		self.pool=pool
+		self.ssh=None
+		self.instrumentation=instrumentation if instrumentation is not None else instrument.DISABLED
+		self.retryPolicy=retryPolicy if retryPolicy is not None else retry.DEFAULT_POLICY
+		self.circuitBreaker=circuitBreaker
+		self.deadline=None
+
+	def __enter__(self) -> object:
+		"""
+			Use the object in a "with" block, the SSH session is closed (or given back to the pool) at the end.
+
+			Returns:
+				object
+		"""
+		return self
+
+	def __exit__(self, *args: object) -> None:
+		"""
+			Close the SSH session when leaving a "with" block.
+
+			Returns:
+				None
+		"""
+		self.close()
+
+	def connect(self) -> object:
+		"""
+			Return the netmiko session, the session is opened (or taken from the pool) only if there is no live session.
+			The opening of a session is bounded by the time left before the deadline.
+
+			Arguments:
+				None
+
+			Returns:
+				object
+		"""
+		if self.ssh is None:
+			with self.instrumentation.span("ssh.connect", host=self.host, pooled=self.pool is not None):
+				if self.pool is not None:
+					self.ssh=self.pool.acquire(self.host, self.username, self.password, self.port, timeout=self.getTimeout(sshpool.CONNECT_TIMEOUT))
+				else:
+					self.ssh=sshpool.connect(self.host, self.username, self.password, self.port, timeout=self.getTimeout(sshpool.CONNECT_TIMEOUT))
+		return self.ssh
+
+	def execute(self, request: object) -> object:
+		"""
+			Execute a request on the SSH session and return its result. The retryable errors (session dropped,
+			timeout, ...) are retried as decided by the retry policy, with a new session. The session of a failed
+			request may hold unread output, so it is closed instead of being given back to the pool.
+
+			Arguments:
+				request(object) => Function receiving the netmiko session as argument.
+
+			Returns:
+				object
+		"""
+		return self.retryPolicy.call(lambda: request(self.connect()), breaker=self.circuitBreaker, deadline=self.deadline, reset=lambda error: self.discard())
+
+	def setDeadline(self, seconds: float = None) -> object:
+		"""
+			Set the deadline of the next commands, shared with other objects if a "retry.deadline" object is given.
+
+			Arguments:
+				seconds(float)  => Seconds from now, a "retry.deadline" object or None to remove the deadline (Default = None)
+
+			Returns:
+				object => The "retry.deadline" object or None
+		"""
+		if seconds is None or isinstance(seconds, retry.deadline):
+			self.deadline=seconds
+		else:
+			self.deadline=retry.deadline(seconds)
+		return self.deadline
+
+	def getTimeout(self, timeout: float) -> float:
+		"""
+			Return the read timeout of a command, reduced to the time left before the deadline.
+
+			Arguments:
+				timeout(float)  => The timeout without deadline.
+
+			Returns:
+				float
+		"""
+		if self.deadline is None:
+			return timeout
+		return self.deadline.limit(timeout)
 
 	def getRouteMapConfig(self, routeMapName: str="") -> str:
 		"""
@@ -359,8 +879,185 @@ class ssh(object):
 				str
 		"""
 		
-		command: str="show running-config | section route-map {routeMapName}"
-		return self.ssh.send_command(command.format(routeMapName=routeMapName))
+		command: str="show running-config | section route-map {routeMapName}".format(routeMapName=routeMapName)
+		output: str
+
+		with self.instrumentation.span("ssh.command", host=self.host):
+			output=self.execute(lambda connection: connection.send_command(command, read_timeout=self.getTimeout(10.0)))
+		self.instrumentation.count("ssh.command", 1, host=self.host)
+		self.instrumentation.count("ssh.bytesSent", len(command) + 1, host=self.host)
+		self.instrumentation.count("ssh.bytesReceived", len(output), host=self.host)
+		return output
+
+	def executeCommands(self, commands: list, timeout: float = 10.0) -> list:
+		"""
+			Send several show commands in a single write and return their outputs. The commands are typed ahead, so
+			the whole batch costs one round trip instead of one per command.
+
+			Arguments:
+				commands(list)   => The commands.
+				timeout(float)   => Seconds without any output before giving up (Default = 10.0)
+
+			Returns:
+				list => The output of each command, in the order of the commands.
+		"""
+
+		## Variables
+		outputs: list
+		command: str
+
+		if not commands:
+			return []
+
+		with self.instrumentation.span("ssh.command", host=self.host, commands=len(commands)):
+			outputs=self.execute(lambda connection: sendCommands(connection, commands, self.getTimeout(timeout)))
+		self.instrumentation.count("ssh.command", len(commands), host=self.host)
+		self.instrumentation.count("ssh.bytesSent", sum([len(command) + 1 for command in commands]), host=self.host)
+		self.instrumentation.count("ssh.bytesReceived", sum([len(output) for output in outputs]), host=self.host)
+		return outputs
+
+	def getRouteMaps(self, routeMapNames: list = None, newFormat: bool = True) -> tuple:
+		"""
+			Read route-maps and "ip bgp-community new-format" with a single batch of commands and parse them into the
+			same index as the NETCONF side (see routemap.parseRouteMaps).
+
+			Arguments:
+				routeMapNames(list)  => Names of the route-maps, None for all the route-maps (Default = None)
+				newFormat(bool)      => If it is True, the new-format is read too, otherwise it is returned as None (Default = True)
+
+			Returns:
+				tuple => (routeMaps(dict), newFormat(bool))
+		"""
+
+		## Variables
+		commands: list=[]
+		routeMaps: dict
+		configured: bool
+		routeMapName: str
+
+		if routeMapNames is None:
+			commands.append("show running-config | section route-map")
+		else:
+			commands.extend(["show running-config | section route-map {}".format(routeMapName) for routeMapName in routeMapNames])
+		if newFormat:
+			commands.append("show running-config | include bgp-community")
+
+		routeMaps, configured=routemap.parseRunningConfig("\n".join(self.executeCommands(commands)))
+
+		## The "section" filter is a regex, "RM" also matches "RM2"
+		if routeMapNames is not None:
+			routeMaps={routeMapName: routeMaps[routeMapName] for routeMapName in routeMapNames if routeMapName in routeMaps}
+		return routeMaps, configured if newFormat else None
+
+	def discard(self) -> None:
+		"""
+			Close the SSH session without giving it back to the pool.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		if self.ssh is not None:
+			if self.pool is not None:
+				self.pool.discard(self.ssh)
+			else:
+				sshpool.disconnect(self.ssh)
+			self.ssh=None
+		return None
+
+	def close(self) -> None:
+		"""
+			Close the SSH session, or give it back to the pool.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		if self.ssh is not None:
+			if self.pool is not None:
+				self.pool.release(self.ssh)
+			else:
+				sshpool.disconnect(self.ssh)
+			self.ssh=None
+		return None
+
+
+def getWithDefaults(capabilities: object) -> str:
+	"""
+		Return the with-defaults mode of the <get-config>: "trim" if the host supports it (RFC 6243), so the leaves
+		set to their default value are not sent, otherwise None.
+
+		Arguments:
+			capabilities(object)  => The ncclient Capabilities object of the session.
+
+		Returns:
+			str
+	"""
+
+	## Variables
+	capability: object
+
+	if ":with-defaults" not in capabilities:
+		return None
+	capability=capabilities[":with-defaults"]
+	if "trim" in [capability.parameters.get("basic-mode")] + capability.parameters.get("also-supported", "").split(","):
+		return "trim"
+	return None
+
+
+def sendCommands(connection: object, commands: list, timeout: float = 10.0) -> list:
+	"""
+		Write several commands at once on a netmiko session and split the output at each prompt. The device echoes
+		each command when it processes it, the echoed lines are removed from the outputs.
+
+		Arguments:
+			connection(object)  => The netmiko session.
+			commands(list)      => The commands.
+			timeout(float)      => Seconds without any output before giving up (Default = 10.0)
+
+		Returns:
+			list => The output of each command, in the order of the commands.
+	"""
+
+	## Variables
+	prompt: object=re.compile(r"(?:^|[\r\n])" + re.escape(connection.base_prompt) + r"[>#]")
+	echoes: set=set([command.strip() for command in commands])
+	output: str=""
+	data: str
+	ends: list=[]
+	start: int=0
+	position: int=0
+	deadline: float=time.monotonic() + timeout
+	outputs: list=[]
+	end: int
+	match: object
+
+	connection.write_channel("".join([connection.normalize_cmd(command) for command in commands]))
+
+	## Read until a prompt follows the output of every command
+	while len(ends) < len(commands):
+		data=connection.read_channel()
+		if not data:
+			if time.monotonic() > deadline:
+				raise netmiko.exceptions.ReadTimeout("{} prompt(s) received out of {} after {} seconds without output".format(len(ends), len(commands), timeout))
+			time.sleep(0.005)
+			continue
+		output+=data
+		deadline=time.monotonic() + timeout
+		for match in prompt.finditer(output, position):
+			ends.append((match.start(), match.end()))
+			position=match.end()
+
+	## Split at the prompts and drop the echoed commands
+	for end in ends[:len(commands)]:
+		outputs.append("\n".join([line for line in output[start:end[0]].replace("\r", "").split("\n") if line.strip() not in echoes]).strip("\n"))
+		start=end[1]
+
+	return outputs
 
 
 def main(*args: str) -> None:
@@ -412,209 +1109,215 @@ def main(*args: str) -> None:
 ===================================================================================================
 """)
 
-	##
-	## PREPARATION TO EXECUTE THE SCRIPT
-	##   This section will erase the route-map and put the BGP Community new-format value
-	##
-
-	print("\n ==== Initialization ====\n")
-
-	## Make sure the BGP community new-format is turned-off
-	print("    ** BGP Community New-Format set to default\n")
-	nc.setBGPCommunityNewFormat(delete=True)
-
-	## Clean-up any previous route-map with the same name
-	print("    ** Delete previous route-map with the same name\n")
-	nc.setRouteMap(routeMapName=routeMapName, delete=True)
-
-	##
-	## DEMO #1
-	##   This demo shows what happen when you switch to "ip bgp-community new-format"
-	##   1. Set the community value to 655370
-	##   2. Get the list before the modification
-	##   2. Set the bgp-community new-format
-	##   3. Get the list after the modification
-	##
-
-	print("\n ==== Demo #1 ====\n")
-
-	## Create the route-map with a "set" of the BGP community "655370" (equivalent to 10:10)
-	print("    ** Creation of the route-map with the BGP community \"655370\"\n")
-	nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="655370")
-
-	## Get the list of BGP Community via NETCONF
-	print("    Here is the list of the BGP community from a NETCONF standpoint:")
-	communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
-	for community in communities:
-		print("       - " + community)
-		pass
+	try:
+		##
+		## PREPARATION TO EXECUTE THE SCRIPT
+		##   This section will erase the route-map and put the BGP Community new-format value
+		##
+
+		print("\n ==== Initialization ====\n")
+
+		## Make sure the BGP community new-format is turned-off
+		print("    ** BGP Community New-Format set to default\n")
+		nc.setBGPCommunityNewFormat(delete=True)
+
+		## Clean-up any previous route-map with the same name
+		print("    ** Delete previous route-map with the same name\n")
+		nc.deleteRouteMap(routeMapName=routeMapName)
+
+		##
+		## DEMO #1
+		##   This demo shows what happen when you switch to "ip bgp-community new-format"
+		##   1. Set the community value to 655370
+		##   2. Get the list before the modification
+		##   2. Set the bgp-community new-format
+		##   3. Get the list after the modification
+		##
+
+		print("\n ==== Demo #1 ====\n")
+
+		## Create the route-map with a "set" of the BGP community "655370" (equivalent to 10:10)
+		print("    ** Creation of the route-map with the BGP community \"655370\"\n")
+		nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="655370")
+
+		## Get the list of BGP Community via NETCONF
+		print("    Here is the list of the BGP community from a NETCONF standpoint:")
+		communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+		for community in communities:
+			print("       - " + community)
+			pass
 	
-	## Get the route-map configuration
-	print("\n    Here is the configuration from the CLI:")
-	print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
-
-	## Enable the BGP community new-format
-	print("    ** Enabling the BGP community new-format\n")
-	nc.setBGPCommunityNewFormat()
-
-	## Get the list of BGP Community after the command execution
-	print("    After the modification, it remains the same:")
-	communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
-	for community in communities:
-		print("       - " + community)
-		pass
-
-	## Get the route-map configuration after the command execution
-	print("\n    But the CLI shows the expected result:")
-	print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
-
-	##
-	## DEMO #2
-	##   This demo shows that we can duplicate the communitie values
-	##   1. Add "10:10" (equivalent to 655370)
-	##   2. Get the list after the modification
-	##
-
-	print("\n ==== Demo #2 ====\n")
-
-	## Add "10:10"
-	print("    ** Adding a duplicate entry \"10:10\" (which is equivalent to 655370)\n")
-	nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10")
-
-	## Get the list of BGP Community after the command execution
-	print("    After adding the BGP community, there is a duplicate entry in the system (from a NETCONF standpoint):")
-	communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
-	for community in communities:
-		print("       - " + community)
-		pass
-
-	## Get the route-map configuration
-	print("\n    But the CLI shows only one:")
-	print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
-
-	##
-	## DEMO #3
-	##   This demo shows that deleting one of the duplicate does not remove from the list
-	##   1. Delete "10:10" (equivalent to 655370)
-	##   2. Get the list after the modification
-	##
-
-	print("\n ==== Demo #3 ====\n")
-
-	## Remove "10:10"
-	print("    ** Removing the entry \"10:10\" (which is equivalent to 655370)\n")
-	nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10", delete=True)
-
-	## Get the list of BGP Community after the command execution
-	print("    After removing the BGP community \"10:10\", it remains used by the system because NETCONF still have 655370.")
-	print("    However, NETCONF only shows \"655370\" now:")
-	communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
-	for community in communities:
-		print("       - " + community)
-		pass
-
-	## Get the route-map configuration
-	print("\n    The CLI still shows no \"set\" statement:")
-	print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
-
-	##
-	## DEMO #4
-	##   This demo shows that NETCONF does not convert when the new-format is disabled.
-	##   1. Re-add "10:10" (equivalent to 655370)
-	##   2. Delete "655370" (equivalent to 10:10)
-	##   3. Disable the BGP-Community new-format
-	##   4. Get the list after the modification
-	##
-
-	print("\n ==== Demo #4 ====\n")
-
-	## Re-add "10:10"
-	print("    ** Re-add the entry \"10:10\" (which is equivalent to 655370)")
-	nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10")
-
-	## Delete "655370"
-	print("\n    ** Delete the entry \"655370\" (which is equivalent to 10:10)")
-	nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="655370", delete=True)
-
-	## Remove the BGP community new-format
-	print("\n    ** Set the ip bgp-community new-format to none")
-	nc.setBGPCommunityNewFormat(delete=True)
-
-	## Get the list of BGP Community after the command execution
-	print("\n    After reverting to the new-format to \"disabled\", it keeps the new-format in the NETCONF database:")
-	communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
-	for community in communities:
-		print("       - " + community)
-		pass
-
-	## Get the route-map configuration
-	print("\n    And the CLI shows nothing like \"Demo #3\" :")
-	print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
-
-	##
-	## DEMO #5
-	##   This demo shows that NETCONF does not re-apply the configuration.
-	##   1. Keep "10:10" (equivalent to 655370)
-	##   2. Re-add the BGP-Community new-format
-	##   3. Get the list after the modification
-	##
-
-	print("\n ==== Demo #5 ====\n")
-
-	## Re-add the BGP community new-format
-	print("\n    ** Set the ip bgp-community new-format")
-	nc.setBGPCommunityNewFormat()
-
-	## Get the list of BGP Community after the command execution
-	print("\n    Now, let's see the BGP community list as per NETCONF:")
-	communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
-	for community in communities:
-		print("       - " + community)
-		pass
-
-	## Get the route-map configuration
-	print("\n    And the CLI still shows nothing even though the new-format has been re-added :")
-	print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
-
-	##
-	## DEMO #6
-	##   This demo shows what happens after re-applying the community
-	##   1. Keep "10:10" (equivalent to 655370)
-	##   2. Re-add the BGP-Community new-format
-	##   3. Get the list after the modification
-	##
-
-	print("\n ==== Demo #6 ====\n")
-
-	## Re-add "10:10"
-	print("    ** Let's try to resend the entry \"10:10\" via NETCONF (which is equivalent to 655370)")
-	nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10")
-
-	## Get the list of BGP Community after the command execution
-	print("\n    As expected, it is present via NETCONF:")
-	communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
-	for community in communities:
-		print("       - " + community)
-		pass
-
-	## Get the route-map configuration
-	print("\n    But it is still not showing even after reapplying the configuration:")
-	print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
-
-	##
-	## CLEAN-UP & END THE SCRIPT
-	##   This section will remove the route-map and default the BGP Community new-format value
-	##
-
-	print("\n ==== Clean-up and exit ====\n")
-
-	## Remove the route-map created by the script
-	print("    ** Remove the route-map")
-	nc.setRouteMap(routeMapName=routeMapName, delete=True)
-
-	## Remove the BGP community new-format command added
-	print("\n    ** Set the ip bgp-community new-format to default")
-	nc.setBGPCommunityNewFormat(delete=True)
+		## Get the route-map configuration
+		print("\n    Here is the configuration from the CLI:")
+		print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
+
+		## Enable the BGP community new-format
+		print("    ** Enabling the BGP community new-format\n")
+		nc.setBGPCommunityNewFormat()
+
+		## Get the list of BGP Community after the command execution
+		print("    After the modification, it remains the same:")
+		communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+		for community in communities:
+			print("       - " + community)
+			pass
+
+		## Get the route-map configuration after the command execution
+		print("\n    But the CLI shows the expected result:")
+		print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
+
+		##
+		## DEMO #2
+		##   This demo shows that we can duplicate the communitie values
+		##   1. Add "10:10" (equivalent to 655370)
+		##   2. Get the list after the modification
+		##
+
+		print("\n ==== Demo #2 ====\n")
+
+		## Add "10:10"
+		print("    ** Adding a duplicate entry \"10:10\" (which is equivalent to 655370)\n")
+		nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10")
+
+		## Get the list of BGP Community after the command execution
+		print("    After adding the BGP community, there is a duplicate entry in the system (from a NETCONF standpoint):")
+		communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+		for community in communities:
+			print("       - " + community)
+			pass
+
+		## Get the route-map configuration
+		print("\n    But the CLI shows only one:")
+		print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
+
+		##
+		## DEMO #3
+		##   This demo shows that deleting one of the duplicate does not remove from the list
+		##   1. Delete "10:10" (equivalent to 655370)
+		##   2. Get the list after the modification
+		##
+
+		print("\n ==== Demo #3 ====\n")
+
+		## Remove "10:10"
+		print("    ** Removing the entry \"10:10\" (which is equivalent to 655370)\n")
+		nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10", delete=True)
+
+		## Get the list of BGP Community after the command execution
+		print("    After removing the BGP community \"10:10\", it remains used by the system because NETCONF still have 655370.")
+		print("    However, NETCONF only shows \"655370\" now:")
+		communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+		for community in communities:
+			print("       - " + community)
+			pass
+
+		## Get the route-map configuration
+		print("\n    The CLI still shows no \"set\" statement:")
+		print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
+
+		##
+		## DEMO #4
+		##   This demo shows that NETCONF does not convert when the new-format is disabled.
+		##   1. Re-add "10:10" (equivalent to 655370)
+		##   2. Delete "655370" (equivalent to 10:10)
+		##   3. Disable the BGP-Community new-format
+		##   4. Get the list after the modification
+		##
+
+		print("\n ==== Demo #4 ====\n")
+
+		## Re-add "10:10"
+		print("    ** Re-add the entry \"10:10\" (which is equivalent to 655370)")
+		nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10")
+
+		## Delete "655370"
+		print("\n    ** Delete the entry \"655370\" (which is equivalent to 10:10)")
+		nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="655370", delete=True)
+
+		## Remove the BGP community new-format
+		print("\n    ** Set the ip bgp-community new-format to none")
+		nc.setBGPCommunityNewFormat(delete=True)
+
+		## Get the list of BGP Community after the command execution
+		print("\n    After reverting to the new-format to \"disabled\", it keeps the new-format in the NETCONF database:")
+		communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+		for community in communities:
+			print("       - " + community)
+			pass
+
+		## Get the route-map configuration
+		print("\n    And the CLI shows nothing like \"Demo #3\" :")
+		print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
+
+		##
+		## DEMO #5
+		##   This demo shows that NETCONF does not re-apply the configuration.
+		##   1. Keep "10:10" (equivalent to 655370)
+		##   2. Re-add the BGP-Community new-format
+		##   3. Get the list after the modification
+		##
+
+		print("\n ==== Demo #5 ====\n")
+
+		## Re-add the BGP community new-format
+		print("\n    ** Set the ip bgp-community new-format")
+		nc.setBGPCommunityNewFormat()
+
+		## Get the list of BGP Community after the command execution
+		print("\n    Now, let's see the BGP community list as per NETCONF:")
+		communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+		for community in communities:
+			print("       - " + community)
+			pass
+
+		## Get the route-map configuration
+		print("\n    And the CLI still shows nothing even though the new-format has been re-added :")
+		print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
+
+		##
+		## DEMO #6
+		##   This demo shows what happens after re-applying the community
+		##   1. Keep "10:10" (equivalent to 655370)
+		##   2. Re-add the BGP-Community new-format
+		##   3. Get the list after the modification
+		##
+
+		print("\n ==== Demo #6 ====\n")
+
+		## Re-add "10:10"
+		print("    ** Let's try to resend the entry \"10:10\" via NETCONF (which is equivalent to 655370)")
+		nc.setRouteMapBGPCommunity(routeMapName=routeMapName, BGPCommunity="10:10")
+
+		## Get the list of BGP Community after the command execution
+		print("\n    As expected, it is present via NETCONF:")
+		communities = nc.getRouteMapBGPCommunity(routeMapName=routeMapName, routeMapSequence=10)
+		for community in communities:
+			print("       - " + community)
+			pass
+
+		## Get the route-map configuration
+		print("\n    But it is still not showing even after reapplying the configuration:")
+		print("#########################\n" + sshSession.getRouteMapConfig("TEST_REPLICATION_BUG_NETCONF") + "\n#########################\n")
+
+		##
+		## CLEAN-UP & END THE SCRIPT
+		##   This section will remove the route-map and default the BGP Community new-format value
+		##
+
+		print("\n ==== Clean-up and exit ====\n")
+
+		## Remove the route-map created by the script
+		print("    ** Remove the route-map")
+		nc.deleteRouteMap(routeMapName=routeMapName)
+
+		## Remove the BGP community new-format command added
+		print("\n    ** Set the ip bgp-community new-format to default")
+		nc.setBGPCommunityNewFormat(delete=True)
+
+	finally:
+		## Close the NETCONF and SSH sessions, even if a demo failed
+		nc.close()
+		sshSession.close()
 
 
 
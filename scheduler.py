@@ -0,0 +1,219 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Serialise and coalesce the writes sent to a device by concurrent "netconf" objects.
+
+The writers of a device share a single writeScheduler. Each write is queued as an intent; the first writer finding
+no write in progress becomes the leader and sends, on its own session, all the intents queued at that time merged
+into a single <edit-config> surrounded by <lock> and <unlock> (and the <commit> on the candidate datastore). The
+writes queued meanwhile are sent together by the next leader, so the contention costs one locked edit per round
+instead of one conflicting edit per writer. The merged payload has the same effect as the intents sent one after the
+other (see batch.py), even when they write to the same route-map. If the round is interrupted (ex: KeyboardInterrupt
+in the leader), the writers waiting for it are released with a writeInterruptedError. The reads are not queued and
+stay concurrent.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import threading, batch, retry
+from ncclient.operations.rpc import RPCError
+
+
+class writeInterruptedError(RuntimeError):
+	"""
+		The round sending the write was interrupted (ex: KeyboardInterrupt in the leader), its result is unknown.
+	"""
+
+
+class writeIntent(object):
+	"""
+		A <config> payload waiting to be sent, with its state: "queued", "leader" (its writer must send the next
+		round), "sending" or "done".
+	"""
+
+	## Class variables
+	config: str
+	state: str
+	error: Exception
+	event: object
+
+	def __init__(self, config: str) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				config(str)  => The <config> payload.
+
+			Returns:
+				object
+		"""
+		self.config=config
+		self.state="queued"
+		self.error=None
+		self.event=threading.Event()
+
+
+class writeScheduler(object):
+	"""
+		Queue of the writes of a single device, shared by all its "netconf" objects.
+
+		Usage:
+			writes=scheduler.writeScheduler("router1")
+			nc1=netconf(..., writeScheduler=writes)
+			nc2=netconf(..., writeScheduler=writes)
+	"""
+
+	## Class variables
+	name: str
+	maxIntents: int
+	queue: list
+	writing: bool
+	lock: object
+	intentCount: int
+	writeCount: int
+
+	def __init__(self, name: str="", maxIntents: int=1000) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				name(str)         => Name of the device (Default = "")
+				maxIntents(int)   => Maximum number of intents merged into a single <edit-config> (Default = 1000)
+
+			Returns:
+				object
+		"""
+		self.name=name
+		self.maxIntents=maxIntents
+		self.queue=[]
+		self.writing=False
+		self.lock=threading.Lock()
+		self.intentCount=0
+		self.writeCount=0
+
+
+	def submit(self, netconf: object, config: str) -> None:
+		"""
+			Queue a <config> payload and return once it has been written, by this writer or by another one. The error
+			of the write is raised in every writer whose payload was part of it.
+
+			Arguments:
+				netconf(object)  => The "netconf" object of the writer, used to send the round if it becomes the leader.
+				config(str)      => The <config> payload.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		intent: object=writeIntent(config)
+		intents: list
+		queued: object
+
+		with self.lock:
+			self.intentCount+=1
+			self.queue.append(intent)
+			if not self.writing:
+				self.writing=True
+				intent.state="leader"
+
+		## Wait for another leader to send the payload or to hand over the next round
+		if intent.state != "leader":
+			self.wait(intent, netconf.deadline)
+
+		## Send the intents queued so far, then hand over to the first writer still waiting
+		if intent.state == "leader":
+			with self.lock:
+				intents=self.queue[:self.maxIntents]
+				del self.queue[:self.maxIntents]
+				for queued in intents:
+					queued.state="sending"
+			try:
+				self.send(netconf, intents)
+			finally:
+				with self.lock:
+					if self.queue:
+						self.queue[0].state="leader"
+						self.queue[0].event.set()
+					else:
+						self.writing=False
+
+		if intent.error is not None:
+			raise intent.error
+		return None
+
+
+	def wait(self, intent: object, deadline: object) -> None:
+		"""
+			Wait until the intent is done or its writer becomes the leader. An intent still queued when the deadline
+			of its writer expires is withdrawn.
+
+			Arguments:
+				intent(object)     => The "writeIntent" object.
+				deadline(object)   => The "retry.deadline" object of the writer, None for none.
+
+			Returns:
+				None
+		"""
+		if deadline is None or deadline.remaining() is None:
+			intent.event.wait()
+			return None
+
+		if intent.event.wait(deadline.remaining()):
+			return None
+
+		## Withdraw the intent unless a leader took it meanwhile
+		with self.lock:
+			if intent.state == "queued":
+				self.queue.remove(intent)
+				intent.error=retry.deadlineExceededError("The deadline expired before the write was sent to {}".format(self.name))
+				return None
+		intent.event.wait()
+		return None
+
+
+	def send(self, netconf: object, intents: list) -> None:
+		"""
+			Send the intents in a single locked edit and record the result in each of them. If the device rejects the
+			merged payload, the intents are sent again one by one so the error only fails the writer it belongs to.
+			Every intent is released, even if the round is interrupted: the intents without result then get a
+			writeInterruptedError.
+
+			Arguments:
+				netconf(object)  => The "netconf" object of the leader.
+				intents(list)    => The "writeIntent" objects.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		intent: object
+		error: Exception=writeInterruptedError("The write to {} was interrupted before its result was known".format(self.name))
+
+		try:
+			netconf.editLocked(batch.mergeConfig([intent.config for intent in intents]) if len(intents) > 1 else intents[0].config)
+			self.writeCount+=1
+			error=None
+		except RPCError as rpcError:
+			if len(intents) > 1 and not retry.isRetryable(rpcError):
+				for intent in intents:
+					self.send(netconf, [intent])
+				return None
+			error=rpcError
+		except Exception as otherError:
+			error=otherError
+		finally:
+			## The intents already sent again one by one keep their own result
+			for intent in intents:
+				if intent.state == "sending":
+					intent.error=error
+					intent.state="done"
+					intent.event.set()
+		return None
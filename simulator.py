@@ -0,0 +1,995 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Local stand-in IOS-XE device used to exercise the "netconf" and "ssh" classes without a real device.
+
+The server listens on the loopback interface, accepts any credential and speaks both NETCONF 1.0 (the "netconf" SSH
+subsystem) and a Cisco-like CLI (SSH shell) on the same port. Both views are backed by the same in-memory model of the
+route-maps and of "ip bgp-community new-format". With encodingBug=True, the model reproduces the IOS-XE bug shown by
+run.py: NETCONF keeps the communities as they were written while the CLI works on their 32-bit values.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import socket, threading, time, re, copy, paramiko, community
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from payload import NATIVE_NAMESPACE, ROUTE_MAP_NAMESPACE
+
+## NETCONF constants
+NETCONF_NAMESPACE: str="urn:ietf:params:xml:ns:netconf:base:1.0"
+NETCONF_DELIMITER: bytes=b"]]>]]>"
+NOTIFICATION_NAMESPACE: str="urn:ietf:params:xml:ns:netconf:notification:1.0"
+CONFIG_CHANGE_NAMESPACE: str="urn:ietf:params:xml:ns:yang:ietf-netconf-notifications"
+
+## YANG modules advertised in the hello, the revision of the native module is the software version
+MODULES: list=[
+	"http://cisco.com/ns/yang/Cisco-IOS-XE-native?module=Cisco-IOS-XE-native&revision=2018-07-27",
+	"http://cisco.com/ns/yang/Cisco-IOS-XE-route-map?module=Cisco-IOS-XE-route-map&revision=2018-07-27",
+]
+
+## Operations of the "operation" attribute deleting a node
+DELETE_OPERATIONS: tuple=("remove", "delete")
+
+## Step of the XPath filters built by payload.getFilter(): "prefix:name" with an optional "[prefix:key=value]"
+XPATH_STEP: object=re.compile(r"/(?:[\w.-]+:)?([\w.-]+)(?:\[(?:[\w.-]+:)?([\w.-]+)\s*=\s*(?:'([^']*)'|\"([^\"]*)\"|(\d+))\])?")
+
+## "show running-config" and its abbreviations
+SHOW_RUNNING_CONFIG: object=re.compile(r"^sh(o|ow)?\s+run\S*$")
+
+
+class sshServer(paramiko.ServerInterface):
+	"""
+		SSH server interface accepting any username/password and the "netconf" subsystem.
+	"""
+
+	def get_allowed_auths(self, username: str) -> str:
+		return "password"
+
+	def check_auth_password(self, username: str, password: str) -> int:
+		return paramiko.AUTH_SUCCESSFUL
+
+	def check_channel_request(self, kind: str, chanid: int) -> int:
+		if kind == "session":
+			return paramiko.OPEN_SUCCEEDED
+		return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+	def check_channel_pty_request(self, channel: object, term: str, width: int, height: int, pixelwidth: int, pixelheight: int, modes: bytes) -> bool:
+		return True
+
+	def check_channel_shell_request(self, channel: object) -> bool:
+		## The CLI runs in its own thread, like the subsystems
+		threading.Thread(target=cliSession, args=(self.netconfServer, channel), daemon=True).start()
+		return True
+
+
+class netconfSubsystem(paramiko.SubsystemHandler):
+	"""
+		Handle one NETCONF session on an SSH channel.
+	"""
+
+	def start_subsystem(self, name: str, transport: object, channel: object) -> None:
+		"""
+			Exchange the hello messages then answer the RPC until the session is closed.
+
+			Arguments:
+				name(str)          => Name of the subsystem.
+				transport(object)  => SSH transport of the session.
+				channel(object)    => SSH channel used by the subsystem.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		server: object=self.get_server().netconfServer
+		buffer: bytes=b""
+		data: bytes
+		message: bytes
+		rpc: object
+		reply: str
+
+		## Send the hello message of the server
+		server.wait()
+		server.send(channel, server.getHello().encode() + NETCONF_DELIMITER)
+
+		## Read the messages until the client closes the session
+		while True:
+			data=channel.recv(65536)
+			if not data:
+				break
+			server.bytesReceived+=len(data)
+			buffer+=data
+
+			## Process every complete message present in the buffer
+			while NETCONF_DELIMITER in buffer:
+				message, buffer=buffer.split(NETCONF_DELIMITER, 1)
+				rpc=ElementTree.fromstring(message)
+
+				## The hello of the client does not need any answer
+				if rpc.tag == "{" + NETCONF_NAMESPACE + "}hello":
+					continue
+
+				## Answer the RPC
+				reply=server.handleRpc(rpc, channel)
+				server.wait()
+				server.send(channel, reply.encode() + NETCONF_DELIMITER)
+
+				## Stop the session if it was a close-session
+				if rpc.find("{" + NETCONF_NAMESPACE + "}close-session") is not None:
+					server.release(channel)
+					channel.close()
+					return None
+
+		## End the function
+		server.release(channel)
+		return None
+
+
+def getError(errorTag: str, message: str) -> str:
+	"""
+		Return an <rpc-error> element.
+
+		Arguments:
+			errorTag(str)  => The error-tag (ex: "lock-denied")
+			message(str)   => The error-message.
+
+		Returns:
+			str
+	"""
+	return "<rpc-error><error-type>protocol</error-type><error-tag>{}</error-tag><error-severity>error</error-severity><error-message>{}</error-message></rpc-error>".format(escape(errorTag), escape(message))
+
+
+def getXPathFilter(select: str) -> object:
+	"""
+		Convert an XPath filter into the equivalent subtree filter. Only the absolute paths with key predicates,
+		joined by "|", are understood (the expressions built by payload.getFilter).
+
+		Arguments:
+			select(str)  => The XPath expression.
+
+		Returns:
+			object => The <filter> element
+	"""
+
+	## Variables
+	root: object=ElementTree.Element("filter")
+	path: str
+	node: object
+	child: object
+	name: str
+	key: str
+	values: tuple
+
+	for path in select.split("|"):
+		node=root
+		for name, key, *values in XPATH_STEP.findall(path.strip()):
+			## The steps shared with a previous path (same node, same key) are merged
+			child=next((child for child in node if child.tag == name and (not key or child.findtext(key) == "".join(values))), None)
+			if child is None:
+				child=ElementTree.SubElement(node, name)
+				if key:
+					ElementTree.SubElement(child, key).text="".join(values)
+			node=child
+
+	return root
+
+
+def getOperation(element: object, default: str="merge") -> str:
+	"""
+		Return the "operation" attribute of a node of an <edit-config>.
+
+		Arguments:
+			element(object)  => The node.
+			default(str)     => Operation inherited from the parent (Default = "merge")
+
+		Returns:
+			str
+	"""
+	return element.get("operation", element.get("{" + NETCONF_NAMESPACE + "}operation", default))
+
+
+def getEdits(config: object) -> list:
+	"""
+		Return the nodes changed by the <config> of an <edit-config>, as the <edit> entries of a netconf-config-change
+		notification (RFC 6470).
+
+		Arguments:
+			config(object)  => The <config> element.
+
+		Returns:
+			list => [(target, operation)], the target is an instance-identifier using the "ios" prefix
+	"""
+
+	## Variables
+	edits: list=[]
+	native: object
+	node: object
+	routeMapName: str
+
+	for native in config.iterfind("{*}native"):
+		for node in native.iterfind("{*}ip/{*}bgp-community/{*}new-format"):
+			edits.append(("/ios:native/ios:ip/ios:bgp-community/ios:new-format", getOperation(node, getOperation(native))))
+		for node in native.iterfind("{*}route-map"):
+			routeMapName=node.findtext("{*}name")
+			edits.append(("/ios:native/ios:route-map[ios:name={}]".format('"' + routeMapName + '"' if "'" in routeMapName else "'" + routeMapName + "'"), getOperation(node, getOperation(native))))
+
+	return edits
+
+
+class deviceModel(object):
+	"""
+		In-memory model of the route-maps and of the bgp-community new-format of an IOS-XE device.
+	"""
+
+	## Class variables
+	hostname: str
+	encodingBug: bool
+	newFormat: bool
+	routeMaps: dict
+	lock: object
+
+	def __init__(self, hostname: str="Router", encodingBug: bool=False) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Each sequence keeps the 32-bit values of its communities (the CLI view) and, with the bug, the texts
+			written through NETCONF (the NETCONF view). Without the bug, the NETCONF view is computed from the values.
+
+			Arguments:
+				hostname(str)       => Hostname shown in the CLI prompt (Default = "Router")
+				encodingBug(bool)   => If it is True, reproduce the IOS-XE bug with the community encodings (Default = False)
+
+			Returns:
+				object
+		"""
+		self.hostname=hostname
+		self.encodingBug=encodingBug
+		self.newFormat=False
+		self.routeMaps={}
+		self.lock=threading.RLock()
+
+
+	def generate(self, routeMaps: int=1000, sequences: int=10, communities: int=10) -> object:
+		"""
+			Fill the model with a synthetic configuration, used to benchmark large route-map tables.
+
+			Arguments:
+				routeMaps(int)    => Number of route-maps (Default = 1000)
+				sequences(int)    => Number of sequences per route-map (Default = 10)
+				communities(int)  => Number of communities per sequence (Default = 10)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		index: int
+		sequence: int
+		values: list
+
+		with self.lock:
+			for index in range(routeMaps):
+				for sequence in range(sequences):
+					values=[(index % 65536) << 16 | (sequence * communities + value) % 65536 for value in range(communities)]
+					self.routeMaps.setdefault("RM_{:06d}".format(index), {})[(sequence + 1) * 10]={
+						"operation": "permit",
+						"values": dict.fromkeys(values),
+						"texts": [community.formatCommunity(value, self.newFormat) for value in values],
+					}
+
+		return self
+
+
+	def getSequence(self, routeMapName: str, routeMapSequence: int, operation: str=None) -> dict:
+		"""
+			Return a sequence of a route-map, it is created if it does not exist.
+
+			Arguments:
+				routeMapName(str)      => Name of the route-map.
+				routeMapSequence(int)  => Sequence number.
+				operation(str)         => Action of the sequence [permit|deny], None to keep it (Default = None)
+
+			Returns:
+				dict
+		"""
+
+		## Variables
+		sequence: dict=self.routeMaps.setdefault(routeMapName, {}).setdefault(routeMapSequence, {"operation": "permit", "values": {}, "texts": []})
+
+		if operation:
+			sequence["operation"]=operation
+		return sequence
+
+
+	def getCommunities(self, sequence: dict) -> list:
+		"""
+			Return the communities of a sequence as seen through NETCONF.
+
+			Arguments:
+				sequence(dict)  => The sequence.
+
+			Returns:
+				list
+		"""
+		if self.encodingBug:
+			return list(sequence["texts"])
+		return [community.formatCommunity(value, self.newFormat) for value in sequence["values"]]
+
+
+	def setCommunity(self, sequence: dict, BGPCommunity: str, operation: str) -> None:
+		"""
+			Add or remove a community of a sequence.
+
+			With the bug, the NETCONF view compares the texts ("10:10" and "655370" are two entries) while the CLI view
+			compares the values, and a text already present is not applied again to the CLI view.
+
+			Arguments:
+				sequence(dict)       => The sequence.
+				BGPCommunity(str)    => The community as written in the <edit-config>
+				operation(str)       => "merge", "replace", "remove" or "delete"
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		value: int=community.parseCommunity(BGPCommunity)
+
+		if operation in DELETE_OPERATIONS:
+			if self.encodingBug:
+				if BGPCommunity not in sequence["texts"]:
+					return None
+				sequence["texts"].remove(BGPCommunity)
+			sequence["values"].pop(value, None)
+		else:
+			if self.encodingBug:
+				if BGPCommunity in sequence["texts"]:
+					return None
+				sequence["texts"].append(BGPCommunity)
+			sequence["values"][value]=None
+
+		## End the function
+		return None
+
+
+	def editConfig(self, config: object) -> None:
+		"""
+			Apply the <config> of an <edit-config>.
+
+			Arguments:
+				config(object)  => The <config> element.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		native: object
+		routeMap: object
+		routeMapName: str
+		routeMapOperation: str
+		node: object
+		nodeOperation: str
+		sequence: dict
+		BGPCommunity: object
+
+		with self.lock:
+			for native in config.iterfind("{*}native"):
+				## ip bgp-community new-format
+				for node in native.iterfind("{*}ip/{*}bgp-community/{*}new-format"):
+					self.newFormat=getOperation(node, getOperation(native)) not in DELETE_OPERATIONS
+
+				## Route-maps
+				for routeMap in native.iterfind("{*}route-map"):
+					routeMapName=routeMap.findtext("{*}name")
+					routeMapOperation=getOperation(routeMap, getOperation(native))
+					if routeMapOperation in DELETE_OPERATIONS:
+						self.routeMaps.pop(routeMapName, None)
+						continue
+					if routeMapOperation == "replace":
+						self.routeMaps.pop(routeMapName, None)
+
+					for node in routeMap.iterfind("{*}route-map-without-order-seq"):
+						nodeOperation=getOperation(node, routeMapOperation)
+						if nodeOperation in DELETE_OPERATIONS:
+							self.routeMaps.get(routeMapName, {}).pop(int(node.findtext("{*}seq_no")), None)
+							continue
+						sequence=self.getSequence(routeMapName, int(node.findtext("{*}seq_no")), node.findtext("{*}operation"))
+						for BGPCommunity in node.iterfind("{*}set/{*}community/{*}community-well-known/{*}community-list"):
+							self.setCommunity(sequence, BGPCommunity.text.strip(), getOperation(BGPCommunity, nodeOperation))
+
+		## End the function
+		return None
+
+
+	def copy(self) -> object:
+		"""
+			Return a copy of the model, to apply changes which are not committed.
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		model: object=deviceModel(self.hostname, self.encodingBug)
+
+		with self.lock:
+			model.newFormat=self.newFormat
+			model.routeMaps=copy.deepcopy(self.routeMaps)
+
+		return model
+
+
+	def getConfig(self, filter: object=None) -> str:
+		"""
+			Return the <data> of a <get-config>. The subtree filter selects the bgp-community node, a route-map, a
+			sequence of a route-map or the whole route-map table, and optionally some fields of the sequences (their
+			number, their operation or their communities). The keys (<name>, <seq_no>) are left out unless the filter
+			selects them, as RFC 6241 allows.
+
+			Arguments:
+				filter(object)  => The <filter> element, None for the whole configuration (Default = None)
+
+			Returns:
+				str
+		"""
+
+		## Variables
+		parts: list=[]
+		native: object=None
+		routeMapFilter: object
+		names: list
+		routeMapName: str
+		routeMapSequence: object
+		sequenceFilter: object
+		nameSelected: bool
+		sequenceSelected: bool
+		fields: set=set()
+		sequences: dict
+		sequenceNumber: int
+		sequence: dict
+		texts: list
+
+		if filter is not None and filter.get("type") == "xpath":
+			filter=getXPathFilter(filter.get("select", ""))
+		if filter is not None:
+			native=filter.find("{*}native")
+			if native is None:
+				return "<data xmlns=\"{}\"/>".format(NETCONF_NAMESPACE)
+
+		with self.lock:
+			## ip bgp-community new-format
+			if self.newFormat and (native is None or native.find("{*}ip") is not None):
+				parts.append("<ip><bgp-community><new-format/></bgp-community></ip>")
+
+			## Route-maps
+			routeMapFilter=native.find("{*}route-map") if native is not None else None
+			if native is None or routeMapFilter is not None:
+				## An empty key is a selection node, it matches all the entries
+				routeMapName=routeMapFilter.findtext("{*}name") if routeMapFilter is not None else None
+				sequenceFilter=routeMapFilter.find("{*}route-map-without-order-seq") if routeMapFilter is not None else None
+				routeMapSequence=sequenceFilter.findtext("{*}seq_no") if sequenceFilter is not None else None
+				if sequenceFilter is not None:
+					fields={child.tag.split("}")[-1] for child in sequenceFilter} - {"seq_no"}
+					if not fields and routeMapSequence == "":
+						fields={"seq_no"}
+				## Like a strict server, the keys are only returned if the filter selects them (or the whole entry)
+				nameSelected=routeMapFilter is None or len(routeMapFilter) == 0 or routeMapFilter.find("{*}name") is not None
+				sequenceSelected=sequenceFilter is None or len(sequenceFilter) == 0 or routeMapSequence is not None
+				names=[routeMapName] if routeMapName else list(self.routeMaps)
+				for routeMapName in names:
+					sequences=self.routeMaps.get(routeMapName)
+					if not sequences:
+						continue
+					parts.append("<route-map><name>{}</name>".format(escape(routeMapName)) if nameSelected else "<route-map>")
+					for sequenceNumber, sequence in sequences.items():
+						if routeMapSequence and sequenceNumber != int(routeMapSequence):
+							continue
+						parts.append("<route-map-without-order-seq xmlns=\"{}\">".format(ROUTE_MAP_NAMESPACE) + ("<seq_no>{}</seq_no>".format(sequenceNumber) if sequenceSelected else ""))
+						if not fields or "operation" in fields:
+							parts.append("<operation>{}</operation>".format(sequence["operation"]))
+						texts=self.getCommunities(sequence) if not fields or "set" in fields else []
+						if texts:
+							parts.append("<set><community><community-well-known>")
+							parts.extend(["<community-list>{}</community-list>".format(escape(text)) for text in texts])
+							parts.append("</community-well-known></community></set>")
+						parts.append("</route-map-without-order-seq>")
+					parts.append("</route-map>")
+
+		if not parts:
+			return "<data xmlns=\"{}\"/>".format(NETCONF_NAMESPACE)
+		return "<data xmlns=\"{}\"><native xmlns=\"{}\">{}</native></data>".format(NETCONF_NAMESPACE, NATIVE_NAMESPACE, "".join(parts))
+
+
+	def getRunningConfig(self) -> list:
+		"""
+			Return the CLI running configuration of the model.
+
+			Arguments:
+				None
+
+			Returns:
+				list => The lines of the configuration.
+		"""
+
+		## Variables
+		lines: list=["hostname " + self.hostname, "!"]
+		routeMapName: str
+		sequences: dict
+		sequenceNumber: int
+		sequence: dict
+
+		with self.lock:
+			if self.newFormat:
+				lines.extend(["ip bgp-community new-format", "!"])
+			for routeMapName, sequences in self.routeMaps.items():
+				for sequenceNumber, sequence in sorted(sequences.items()):
+					lines.append("route-map {} {} {}".format(routeMapName, sequence["operation"], sequenceNumber))
+					if sequence["values"]:
+						lines.append(" set community " + " ".join([community.formatCommunity(value, self.newFormat) for value in sequence["values"]]))
+				lines.append("!")
+			lines.append("end")
+
+		return lines
+
+
+	def runCommand(self, command: str) -> str:
+		"""
+			Return the output of a CLI command. Only the commands used by the "ssh" class and by netmiko are known.
+
+			Arguments:
+				command(str)  => The command.
+
+			Returns:
+				str
+		"""
+
+		## Variables
+		show: str
+		pipe: str
+		keyword: str
+		separator: str
+		lines: list
+		output: list=[]
+		line: str
+		inSection: bool=False
+		pattern: object
+
+		command=command.strip()
+		if command == "" or command.startswith("terminal "):
+			return ""
+
+		show, pipe, pattern=command.partition("|")
+		if not SHOW_RUNNING_CONFIG.match(show.strip()):
+			return "% Invalid input detected at '^' marker."
+		keyword, separator, pattern=pattern.strip().partition(" ")
+		lines=self.getRunningConfig()
+
+		## show running-config | section <regex> (or an abbreviation of section), the sections are the top-level lines and their children
+		if keyword and "section".startswith(keyword):
+			pattern=re.compile(pattern.strip())
+			for line in lines:
+				if not line.startswith(" "):
+					inSection=bool(pattern.search(line))
+				if inSection:
+					output.append(line)
+			return "\n".join(output)
+
+		## show running-config | include <regex> (or an abbreviation of include)
+		if keyword and "include".startswith(keyword):
+			pattern=re.compile(pattern.strip())
+			return "\n".join([line for line in lines if pattern.search(line)])
+
+		return "\n".join(lines)
+
+
+def cliSession(server: object, channel: object) -> None:
+	"""
+		Run a Cisco-like CLI on an SSH channel: each line is echoed and answered with its output and the prompt.
+
+		Arguments:
+			server(object)   => The "netconfServer" object.
+			channel(object)  => SSH channel of the shell.
+
+		Returns:
+			None
+	"""
+
+	## Variables
+	prompt: str=server.model.hostname + "#"
+	buffer: str=""
+	data: bytes
+	line: str
+	output: str
+
+	try:
+		while True:
+			data=channel.recv(65536)
+			if not data:
+				break
+			server.bytesReceived+=len(data)
+			buffer+=data.decode(errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+			## Answer every complete line, the lines typed ahead are echoed when they are processed like on IOS
+			while "\n" in buffer:
+				line, buffer=buffer.split("\n", 1)
+				if line.strip() in ("exit", "logout", "quit"):
+					channel.close()
+					return None
+				output=server.model.runCommand(line)
+				server.wait()
+				server.send(channel, (line + "\n" + ((output + "\n") if output else "")).replace("\n", "\r\n").encode() + prompt.encode())
+	except (OSError, EOFError):
+		pass
+	finally:
+		channel.close()
+
+	## End the function
+	return None
+
+
+class netconfServer(object):
+	"""
+		NETCONF and CLI over SSH server listening on the loopback interface.
+	"""
+
+	## Class variables
+	host: str
+	port: int
+	latency: float
+	capabilities: list
+	model: object
+	candidate: list
+	subscribers: dict
+	locks: dict
+	errors: list
+	hostKey: object=None
+	sessionCount: int
+	rpcCount: int
+	rpcLog: list
+	bytesReceived: int
+	bytesSent: int
+
+	def __init__(self, host: str="127.0.0.1", port: int=0, latency: float=0.0, capabilities: list=[], model: object=None, encodingBug: bool=False) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				host(str)           => IP address to listen on (Default = "127.0.0.1")
+				port(int)           => Port to listen on, 0 to choose a free port (Default = 0)
+				latency(float)      => Delay in seconds added before each message sent by the server (Default = 0.0)
+				capabilities(list)  => Capabilities advertised in addition to "urn:ietf:params:netconf:base:1.0" and the modules (Default = [])
+				model(object)       => The "deviceModel" object, None for an empty device (Default = None)
+				encodingBug(bool)   => If it is True, the empty device reproduces the IOS-XE bug with the community encodings (Default = False)
+
+			Returns:
+				object
+		"""
+		self.host=host
+		self.port=port
+		self.latency=latency
+		self.capabilities=["urn:ietf:params:netconf:base:1.0"] + list(capabilities) + MODULES
+		self.model=model if model is not None else deviceModel(encodingBug=encodingBug)
+		self.candidate=[]
+		self.subscribers={}
+		self.locks={}
+		self.errors=[]
+		self.sessionCount=0
+		self.rpcCount=0
+		self.rpcLog=[]
+		self.bytesReceived=0
+		self.bytesSent=0
+		self.socket=None
+		self.thread=None
+
+		## Generate the host key once for all the servers
+		if netconfServer.hostKey is None:
+			netconfServer.hostKey=paramiko.RSAKey.generate(2048)
+
+
+	def __enter__(self) -> object:
+		return self.start()
+
+
+	def __exit__(self, *args: object) -> None:
+		self.stop()
+
+
+	def start(self) -> object:
+		"""
+			Start to listen and accept the connections in a background thread.
+
+			Arguments:
+				None
+
+			Returns:
+				object
+		"""
+		self.socket=socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self.socket.bind((self.host, self.port))
+		self.socket.listen(128)
+		self.port=self.socket.getsockname()[1]
+		self.thread=threading.Thread(target=self.accept, daemon=True)
+		self.thread.start()
+		return self
+
+
+	def stop(self) -> None:
+		"""
+			Stop to accept new connections.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		## Variables
+		listener: object=self.socket
+
+		if listener is not None:
+			self.socket=None
+			## close() alone does not wake up the thread blocked in accept()
+			try:
+				listener.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+			listener.close()
+			self.thread.join()
+		return None
+
+
+	def accept(self) -> None:
+		"""
+			Accept the connections and start an SSH server on each of them.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		client: object
+		transport: object
+		server: object
+
+		while self.socket is not None:
+			try:
+				client=self.socket.accept()[0]
+			except OSError:
+				## The socket has been closed by stop()
+				break
+			self.sessionCount+=1
+			transport=paramiko.Transport(client)
+			transport.add_server_key(netconfServer.hostKey)
+			transport.set_subsystem_handler("netconf", netconfSubsystem)
+			server=sshServer()
+			server.netconfServer=self
+			transport.start_server(server=server)
+
+		## End the function
+		return None
+
+
+	def wait(self) -> None:
+		"""
+			Wait the configured latency.
+
+			Returns:
+				None
+		"""
+		if self.latency:
+			time.sleep(self.latency)
+		return None
+
+
+	def send(self, channel: object, data: bytes) -> None:
+		"""
+			Send data on a channel and count the bytes sent.
+
+			Arguments:
+				channel(object)  => SSH channel of the session.
+				data(bytes)      => The data to send.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		lock: object=self.subscribers.get(channel)
+
+		self.bytesSent+=len(data)
+		if lock is None:
+			channel.sendall(data)
+			return None
+
+		## The notifications are sent by the threads of the other sessions
+		with lock:
+			channel.sendall(data)
+		return None
+
+
+	def notify(self, configs: list) -> None:
+		"""
+			Send a netconf-config-change notification (RFC 6470) describing the configurations applied to running to
+			the sessions which created a subscription.
+
+			Arguments:
+				configs(list)  => The <config> elements applied.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		edits: list=[edit for config in configs if config is not None for edit in getEdits(config)]
+		notification: bytes
+		channel: object
+
+		if not edits or not self.subscribers:
+			return None
+
+		notification="""<notification xmlns="{namespace}"><eventTime>{eventTime}</eventTime><netconf-config-change xmlns="{changeNamespace}"><datastore>running</datastore>{edits}</netconf-config-change></notification>""".format(
+			namespace=NOTIFICATION_NAMESPACE,
+			eventTime=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+			changeNamespace=CONFIG_CHANGE_NAMESPACE,
+			edits="".join("<edit><target xmlns:ios=\"{}\">{}</target><operation>{}</operation></edit>".format(NATIVE_NAMESPACE, escape(target), operation) for target, operation in edits),
+		).encode() + NETCONF_DELIMITER
+
+		for channel in list(self.subscribers):
+			try:
+				self.send(channel, notification)
+			except (OSError, EOFError):
+				## The session is gone
+				self.subscribers.pop(channel, None)
+		return None
+
+
+	def getHello(self) -> str:
+		"""
+			Return the hello message of the server.
+
+			Arguments:
+				None
+
+			Returns:
+				str
+		"""
+		return """<hello xmlns="{namespace}"><capabilities>{capabilities}</capabilities><session-id>{sessionId}</session-id></hello>""".format(namespace=NETCONF_NAMESPACE, capabilities="".join("<capability>" + escape(capability) + "</capability>" for capability in self.capabilities), sessionId=self.sessionCount)
+
+
+	def release(self, channel: object) -> None:
+		"""
+			Forget a closed session: its subscription ends and its locks are released.
+
+			Arguments:
+				channel(object)  => SSH channel of the session.
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		datastore: str
+
+		self.subscribers.pop(channel, None)
+		with self.model.lock:
+			for datastore in [datastore for datastore, owner in self.locks.items() if owner is channel]:
+				del self.locks[datastore]
+		return None
+
+
+	def isLocked(self, datastore: str, channel: object) -> bool:
+		"""
+			Return True if the datastore is locked by another session.
+
+			Arguments:
+				datastore(str)   => Name of the datastore (running, candidate)
+				channel(object)  => SSH channel of the session.
+
+			Returns:
+				bool
+		"""
+		return datastore in self.locks and self.locks[datastore] is not channel
+
+
+	def injectErrors(self, errorTag: str="lock-denied", count: int=1) -> None:
+		"""
+			Answer the next RPCs (except <close-session>) with an <rpc-error>, ex: to reproduce a locked datastore.
+
+			Arguments:
+				errorTag(str)  => The error-tag of the <rpc-error> (Default = "lock-denied")
+				count(int)     => Number of RPCs answered with the error (Default = 1)
+
+			Returns:
+				None
+		"""
+		self.errors.extend([errorTag] * count)
+		return None
+
+
+	def handleRpc(self, rpc: object, channel: object=None) -> str:
+		"""
+			Return the reply of an RPC. The changes of running are notified to the subscribed sessions.
+
+			Arguments:
+				rpc(object)      => The <rpc> element received from the client.
+				channel(object)  => SSH channel of the session, needed by <create-subscription> (Default = None)
+
+			Returns:
+				str
+		"""
+
+		## Variables
+		body: str="<ok/>"
+		operation: object=rpc[0]
+		name: str=operation.tag.split("}")[-1]
+		config: object
+		datastore: str
+		model: object
+
+		self.rpcCount+=1
+		self.rpcLog.append(name)
+
+		## Injected error
+		if self.errors and name != "close-session":
+			body=getError(self.errors.pop(0), "Injected by the simulator")
+		elif name == "get-config":
+			## Read the model, the candidate also shows its uncommitted changes
+			model=self.model
+			if operation.find("{*}source/{*}candidate") is not None:
+				with self.model.lock:
+					model=self.model.copy()
+					for config in self.candidate:
+						model.editConfig(config)
+			body=model.getConfig(operation.find("{*}filter"))
+		elif name in ("lock", "unlock"):
+			## A datastore is locked by a single session until it unlocks it or its session ends
+			datastore=operation.find("{*}target")[0].tag.split("}")[-1]
+			with self.model.lock:
+				if name == "lock" and datastore in self.locks:
+					body=getError("lock-denied", "The {} datastore is already locked".format(datastore))
+				elif name == "lock":
+					self.locks[datastore]=channel
+				elif datastore not in self.locks or self.locks[datastore] is not channel:
+					body=getError("operation-failed", "The {} datastore is not locked by this session".format(datastore))
+				else:
+					del self.locks[datastore]
+		elif name == "edit-config":
+			## Apply the configuration, the writes on the candidate wait for the commit
+			config=operation.find("{*}config")
+			datastore="candidate" if operation.find("{*}target/{*}candidate") is not None else "running"
+			with self.model.lock:
+				if self.isLocked(datastore, channel):
+					body=getError("in-use", "The {} datastore is locked by another session".format(datastore))
+				elif datastore == "candidate":
+					self.candidate.append(config)
+				elif config is not None:
+					self.model.editConfig(config)
+					self.notify([config])
+		elif name == "commit":
+			with self.model.lock:
+				if self.isLocked("running", channel) or self.isLocked("candidate", channel):
+					body=getError("in-use", "The datastore is locked by another session")
+				else:
+					for config in self.candidate:
+						self.model.editConfig(config)
+					self.notify(self.candidate)
+					self.candidate=[]
+		elif name == "discard-changes":
+			self.candidate=[]
+		elif name == "create-subscription" and channel is not None:
+			## The session receives the notifications from now on
+			self.subscribers[channel]=threading.Lock()
+
+		return """<rpc-reply xmlns="{namespace}" message-id="{messageId}">{body}</rpc-reply>""".format(namespace=NETCONF_NAMESPACE, messageId=rpc.get("message-id", ""), body=body)
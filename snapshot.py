@@ -0,0 +1,546 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+History of the route-map state of the devices in a compact columnar store.
+
+A store is a directory holding one packed binary file per column (NumPy dtypes, little-endian) and the table of the
+names. Each row is a sequence of a route-map of a device at a point in time: time, device, route-map, sequence and
+operation ("permit", "deny" or "removed" when the sequence disappeared). The communities are a second table of
+(row, 32-bit value). The writer only appends the sequences which changed since the previous snapshot of the device,
+and the reader maps the files in memory, so the queries over millions of rows are a few vectorized NumPy operations.
+
+Files of a store:
+	names.txt                          => One JSON string per line, the device and route-map names (id = line number)
+	time.bin                           => float64, time of the snapshot (seconds since the epoch)
+	device.bin, routeMap.bin           => uint32, id of the name
+	sequence.bin                       => uint32, sequence number (0 to 65535)
+	operation.bin                      => uint8, index in OPERATIONS
+	communityRow.bin                   => uint32, row of the community (in increasing order)
+	communityValue.bin                 => uint32, value of the community
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import os, json, time, threading, numpy, community
+
+## Columns of the rows and of the communities
+ROW_COLUMNS: dict={"time": "<f8", "device": "<u4", "routeMap": "<u4", "sequence": "<u4", "operation": "u1"}
+COMMUNITY_COLUMNS: dict={"communityRow": "<u4", "communityValue": "<u4"}
+
+## Values of the operation column
+OPERATIONS: tuple=("permit", "deny", "removed")
+REMOVED: int=OPERATIONS.index("removed")
+
+
+def getPath(path: str, column: str) -> str:
+	return os.path.join(path, column + ".bin")
+
+
+def countItems(path: str, column: str, dtype: str) -> int:
+	"""
+		Return the number of complete items of a column file.
+
+		Arguments:
+			path(str)    => Directory of the store.
+			column(str)  => Name of the column.
+			dtype(str)   => NumPy dtype of the column.
+
+		Returns:
+			int
+	"""
+	try:
+		return os.path.getsize(getPath(path, column)) // numpy.dtype(dtype).itemsize
+	except OSError:
+		return 0
+
+
+def readNames(path: str) -> list:
+	"""
+		Return the table of the names, a line not completely written is ignored.
+
+		Arguments:
+			path(str)  => Directory of the store.
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	names: list=[]
+	line: str
+
+	try:
+		with open(os.path.join(path, "names.txt"), encoding="utf-8") as table:
+			for line in table:
+				if not line.endswith("\n"):
+					break
+				names.append(json.loads(line))
+	except OSError:
+		pass
+
+	return names
+
+
+def getKeys(device: object, routeMap: object, sequence: object) -> object:
+	"""
+		Return a single 64-bit key per (device, route-map, sequence).
+
+		Arguments:
+			device(object)    => Array of device ids.
+			routeMap(object)  => Array of route-map ids.
+			sequence(object)  => Array of sequence numbers.
+
+		Returns:
+			object => numpy.ndarray of uint64
+	"""
+	return (device.astype(numpy.uint64) << numpy.uint64(40)) | (routeMap.astype(numpy.uint64) << numpy.uint64(16)) | (sequence.astype(numpy.uint64) & numpy.uint64(0xFFFF))
+
+
+class snapshotReader(object):
+	"""
+		Memory-mapped view of a store, the rows appended after the opening are not seen.
+	"""
+
+	## Class variables
+	path: str
+	names: list
+	ids: dict
+	rows: int
+	columns: dict
+	latest: dict
+
+	def __init__(self, path: str) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				path(str)  => Directory of the store.
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		column: str
+		dtype: str
+		communities: int
+
+		self.path=path
+		self.names=readNames(path)
+		self.ids={name: index for index, name in enumerate(self.names)}
+		self.columns={}
+		self.latest={}
+
+		## A row exists once all its columns are written
+		self.rows=min([countItems(path, column, dtype) for column, dtype in ROW_COLUMNS.items()])
+		for column, dtype in ROW_COLUMNS.items():
+			self.columns[column]=self.map(column, dtype, self.rows)
+
+		## The communities of the rows not written yet are ignored
+		communities=min([countItems(path, column, dtype) for column, dtype in COMMUNITY_COLUMNS.items()])
+		for column, dtype in COMMUNITY_COLUMNS.items():
+			self.columns[column]=self.map(column, dtype, communities)
+		communities=int(numpy.searchsorted(self.columns["communityRow"], self.rows))
+		for column in COMMUNITY_COLUMNS:
+			self.columns[column]=self.columns[column][:communities]
+
+
+	def map(self, column: str, dtype: str, count: int) -> object:
+		"""
+			Map the first items of a column file in memory.
+
+			Arguments:
+				column(str)  => Name of the column.
+				dtype(str)   => NumPy dtype of the column.
+				count(int)   => Number of items.
+
+			Returns:
+				object => numpy.ndarray (read-only)
+		"""
+		if count == 0:
+			return numpy.empty(0, dtype=dtype)
+		return numpy.memmap(getPath(self.path, column), dtype=dtype, mode="r", shape=(count,))
+
+
+	def __len__(self) -> int:
+		return self.rows
+
+
+	def __getitem__(self, column: str) -> object:
+		return self.columns[column]
+
+
+	def getLatest(self, at: float=None) -> object:
+		"""
+			Return the mask of the rows giving the state of the devices at a point in time: the last row of each
+			(device, route-map, sequence) written before it, unless the sequence was removed. The mask is cached.
+
+			Arguments:
+				at(float)  => Time in seconds since the epoch, None for the current state (Default = None)
+
+			Returns:
+				object => numpy.ndarray of bool, one item per row
+		"""
+
+		## Variables
+		indexes: object
+		keys: object
+		first: object
+		last: object
+		mask: object
+
+		if at in self.latest:
+			return self.latest[at]
+
+		## Rows written before the point in time, the rows are in write order
+		indexes=numpy.arange(self.rows) if at is None else numpy.flatnonzero(self.columns["time"] <= at)
+		keys=getKeys(self.columns["device"][indexes], self.columns["routeMap"][indexes], self.columns["sequence"][indexes])
+
+		## Last occurrence of each key: first occurrence in the reversed order
+		keys, first=numpy.unique(keys[::-1], return_index=True)
+		last=indexes[::-1][first]
+
+		mask=numpy.zeros(self.rows, dtype=bool)
+		mask[last[self.columns["operation"][last] != REMOVED]]=True
+		self.latest[at]=mask
+		return mask
+
+
+	def getCommunityRows(self, BGPCommunity: str, at: float=None) -> object:
+		"""
+			Return the rows of the state at a point in time which set a community.
+
+			Arguments:
+				BGPCommunity(str)  => The community, in any format ("10:10", "655370", "internet", ...)
+				at(float)          => Time in seconds since the epoch, None for the current state (Default = None)
+
+			Returns:
+				object => numpy.ndarray of row numbers
+		"""
+
+		## Variables
+		rows: object=self.columns["communityRow"][self.columns["communityValue"] == community.parseCommunity(BGPCommunity)]
+
+		return rows[self.getLatest(at)[rows]]
+
+
+	def findDevices(self, BGPCommunity: str, at: float=None) -> list:
+		"""
+			Return the devices with at least one route-map sequence setting a community.
+
+			Arguments:
+				BGPCommunity(str)  => The community, in any format ("10:10", "655370", "internet", ...)
+				at(float)          => Time in seconds since the epoch, None for the current state (Default = None)
+
+			Returns:
+				list => Names of the devices, sorted.
+		"""
+		return sorted([self.names[device] for device in numpy.unique(self.columns["device"][self.getCommunityRows(BGPCommunity, at)]).tolist()])
+
+
+	def findRouteMaps(self, BGPCommunity: str, at: float=None) -> list:
+		"""
+			Return the route-map sequences setting a community.
+
+			Arguments:
+				BGPCommunity(str)  => The community, in any format ("10:10", "655370", "internet", ...)
+				at(float)          => Time in seconds since the epoch, None for the current state (Default = None)
+
+			Returns:
+				list => [(device, routeMapName, seq_no)]
+		"""
+
+		## Variables
+		rows: object=numpy.unique(self.getCommunityRows(BGPCommunity, at))
+
+		return [(self.names[device], self.names[routeMap], sequence) for device, routeMap, sequence in zip(self.columns["device"][rows].tolist(), self.columns["routeMap"][rows].tolist(), self.columns["sequence"][rows].tolist())]
+
+
+	def getValues(self, device: str=None, at: float=None) -> dict:
+		"""
+			Return the state of a device (or of all the devices) with the raw values, as compared by the writer.
+
+			Arguments:
+				device(str)  => Name of the device, None for all the devices (Default = None)
+				at(float)    => Time in seconds since the epoch, None for the current state (Default = None)
+
+			Returns:
+				dict => {(routeMapName, seq_no): (operation index, tuple of community values)}, or {device: {...}} for all the devices
+		"""
+
+		## Variables
+		values: dict={}
+		mask: object=self.getLatest(at)
+		rows: object
+		starts: list
+		ends: list
+		row: int
+		deviceId: int
+		routeMap: int
+		sequence: int
+		operation: int
+		start: int
+		end: int
+
+		if device is not None:
+			if device not in self.ids:
+				return values
+			mask=mask & (self.columns["device"] == self.ids[device])
+
+		rows=numpy.flatnonzero(mask)
+		starts=numpy.searchsorted(self.columns["communityRow"], rows, side="left").tolist()
+		ends=numpy.searchsorted(self.columns["communityRow"], rows, side="right").tolist()
+		for deviceId, routeMap, sequence, operation, start, end in zip(self.columns["device"][rows].tolist(), self.columns["routeMap"][rows].tolist(), self.columns["sequence"][rows].tolist(), self.columns["operation"][rows].tolist(), starts, ends):
+			values.setdefault(self.names[deviceId], {})[(self.names[routeMap], sequence)]=(operation, tuple(self.columns["communityValue"][start:end].tolist()))
+
+		if device is not None:
+			return values.get(device, {})
+		return values
+
+
+	def getState(self, device: str, at: float=None, newFormat: bool=True) -> dict:
+		"""
+			Return the route-maps of a device at a point in time.
+
+			Arguments:
+				device(str)      => Name of the device.
+				at(float)        => Time in seconds since the epoch, None for the current state (Default = None)
+				newFormat(bool)  => If it is True, the communities are returned as "AA:NN", otherwise as decimal (Default = True)
+
+			Returns:
+				dict => {routeMapName: {seq_no: {"operation": str, "communities": list}}}
+		"""
+
+		## Variables
+		state: dict={}
+		routeMapName: str
+		sequence: int
+		operation: int
+		values: tuple
+
+		for (routeMapName, sequence), (operation, values) in sorted(self.getValues(device, at).items()):
+			state.setdefault(routeMapName, {})[sequence]={"operation": OPERATIONS[operation], "communities": community.formatCommunities(numpy.array(values, dtype=numpy.uint32), newFormat)}
+
+		return state
+
+
+class snapshotWriter(object):
+	"""
+		Append the snapshots of the devices to a store, only the sequences which changed are written.
+	"""
+
+	## Class variables
+	path: str
+	names: list
+	ids: dict
+	rows: int
+	states: dict
+	lock: object
+
+	def __init__(self, path: str) -> object:
+		"""
+			Constructor that return an instantiation of the object. The store is created if needed, and the end of
+			the files left by an interrupted write is dropped.
+
+			Arguments:
+				path(str)  => Directory of the store.
+
+			Returns:
+				object
+		"""
+		self.path=path
+		self.states=None
+		self.lock=threading.Lock()
+		os.makedirs(path, exist_ok=True)
+		self.repair()
+
+
+	def repair(self) -> None:
+		"""
+			Truncate the files to the last complete row and reload the names.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		reader: object
+		column: str
+		dtype: str
+		count: int
+
+		self.names=readNames(self.path)
+		self.ids={name: index for index, name in enumerate(self.names)}
+		with open(os.path.join(self.path, "names.txt"), "a+", encoding="utf-8") as table:
+			table.seek(0)
+			table.truncate(len("".join([json.dumps(name) + "\n" for name in self.names]).encode()))
+
+		reader=snapshotReader(self.path)
+		self.rows=len(reader)
+		for column, dtype in ROW_COLUMNS.items():
+			self.truncate(column, dtype, self.rows)
+		for column, dtype in COMMUNITY_COLUMNS.items():
+			self.truncate(column, dtype, len(reader[column]))
+		return None
+
+
+	def truncate(self, column: str, dtype: str, count: int) -> None:
+		with open(getPath(self.path, column), "ab") as columnFile:
+			columnFile.truncate(count * numpy.dtype(dtype).itemsize)
+		return None
+
+
+	def getId(self, name: str) -> int:
+		"""
+			Return the id of a name, the name is added to the table if needed.
+
+			Arguments:
+				name(str)  => Device or route-map name.
+
+			Returns:
+				int
+		"""
+		if name not in self.ids:
+			with open(os.path.join(self.path, "names.txt"), "a", encoding="utf-8") as table:
+				table.write(json.dumps(name) + "\n")
+			self.ids[name]=len(self.names)
+			self.names.append(name)
+		return self.ids[name]
+
+
+	def getState(self, device: str) -> dict:
+		"""
+			Return the last state written for a device, the states of all the devices are read from the store the
+			first time.
+
+			Arguments:
+				device(str)  => Name of the device.
+
+			Returns:
+				dict => See snapshotReader.getValues()
+		"""
+		if self.states is None:
+			self.states=snapshotReader(self.path).getValues()
+		return self.states.setdefault(device, {})
+
+
+	def write(self, device: str, routeMaps: dict, timestamp: float=None) -> int:
+		"""
+			Append the snapshot of a device: the sequences which were created or changed, and a "removed" row for
+			each sequence which disappeared. Nothing is written if the route-maps did not change.
+
+			Arguments:
+				device(str)       => Name of the device.
+				routeMaps(dict)   => Route-maps of the device (see routemap.parseRouteMaps), all the route-maps of the device must be given
+				timestamp(float)  => Time of the snapshot in seconds since the epoch, None for now (Default = None)
+
+			Returns:
+				int => Number of rows written.
+		"""
+
+		## Variables
+		current: dict={}
+		keys: list=[]
+		operations: list=[]
+		texts: list=[]
+		ends: list=[]
+		values: list
+		operation: int
+		start: int
+		end: int
+		previous: dict
+		changes: list
+		routeMapName: str
+		sequences: dict
+		sequence: int
+		key: tuple
+		columns: dict
+		communityRows: list=[]
+		communityValues: list=[]
+		row: int
+		column: str
+		dtype: str
+
+		## Normalise the route-maps, the communities of all the sequences are parsed in a single call
+		for routeMapName, sequences in routeMaps.items():
+			for sequence in sequences:
+				keys.append((routeMapName, int(sequence)))
+				operations.append(OPERATIONS.index(sequences[sequence]["operation"]))
+				texts.extend(sequences[sequence]["communities"])
+				ends.append(len(texts))
+		values=community.parseCommunities(texts).tolist() if texts else []
+		for key, operation, start, end in zip(keys, operations, [0] + ends[:-1], ends):
+			current[key]=(operation, tuple(values[start:end]))
+
+		with self.lock:
+			previous=self.getState(device)
+			changes=[(key, current[key]) for key in current if previous.get(key) != current[key]]
+			changes.extend([(key, (REMOVED, ())) for key in previous if key not in current])
+			if not changes:
+				return 0
+
+			## Rows and communities of the changes
+			columns={
+				"time": [timestamp if timestamp is not None else time.time()] * len(changes),
+				"device": [self.getId(device)] * len(changes),
+				"routeMap": [self.getId(key[0]) for key, value in changes],
+				"sequence": [key[1] for key, value in changes],
+				"operation": [value[0] for key, value in changes],
+			}
+			for row, (key, value) in enumerate(changes, self.rows):
+				communityRows.extend([row] * len(value[1]))
+				communityValues.extend(value[1])
+
+			## The communities first, a row is visible once all its columns are written
+			self.append("communityRow", COMMUNITY_COLUMNS["communityRow"], communityRows)
+			self.append("communityValue", COMMUNITY_COLUMNS["communityValue"], communityValues)
+			for column, dtype in ROW_COLUMNS.items():
+				self.append(column, dtype, columns[column])
+			self.rows+=len(changes)
+
+			## New state of the device
+			self.states[device]={key: value for key, value in current.items()}
+
+		return len(changes)
+
+
+	def append(self, column: str, dtype: str, values: list) -> None:
+		with open(getPath(self.path, column), "ab") as columnFile:
+			columnFile.write(numpy.asarray(values, dtype=dtype).tobytes())
+		return None
+
+
+def writeFleet(writer: object, routers: object, devices: list=None, timeout: float=None) -> dict:
+	"""
+		Read the route-map table of the devices of a fleet and append their snapshot, with a single read per device.
+
+		Arguments:
+			writer(object)   => The "snapshotWriter" object.
+			routers(object)  => The "fleet.fleet" object.
+			devices(list)    => Name of the devices to target, None for the whole fleet (Default = None)
+			timeout(float)   => Seconds given to the whole run (Default = None)
+
+		Returns:
+			dict => {name: {"result": number of rows written, "error": Exception or None}}
+	"""
+
+	## Variables
+	results: dict=routers.run(lambda nc: nc.getRouteMapTable(ttl=0).load(), devices=devices, timeout=timeout)
+	timestamp: float=time.time()
+	name: str
+	result: dict
+
+	for name, result in results.items():
+		if result["error"] is None:
+			result["result"]=writer.write(name, result["result"], timestamp)
+
+	return results
@@ -0,0 +1,294 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Pool of warm netmiko sessions shared by the "ssh" objects.
+
+The login and the prompt discovery of netmiko take several seconds, so the sessions are given back to the pool once
+a command is done and reused by the next "ssh" object of the same device. The sessions are keyed by
+(host, port, username), checked before being reused and closed once they have been idle for too long.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import threading, time, netmiko
+
+## Seconds given to the opening of a session without deadline
+CONNECT_TIMEOUT: float=300.0
+
+## Defaults of netmiko for the TCP connection and the SSH banner, reduced to the connection timeout
+TCP_TIMEOUT: float=10.0
+BANNER_TIMEOUT: float=15.0
+
+
+def connect(host: str, username: str, password: str, port: int=22, timeout: float=CONNECT_TIMEOUT) -> object:
+	"""
+		Open a netmiko session to an IOS-XE device. Every step of the opening (TCP connection, SSH banner,
+		authentication, prompt discovery) is bounded by the timeout.
+
+		Arguments:
+			host(str)        => FQDN or IP address of the SSH host.
+			username(str)    => Username for the SSH host.
+			password(str)    => Password for the SSH host.
+			port(int)        => Port for the SSH host (Default = 22)
+			timeout(float)   => Connection timeout in seconds (Default = CONNECT_TIMEOUT)
+
+		Returns:
+			object
+	"""
+	return netmiko.ConnectHandler(**{'device_type': 'cisco_ios', 'host': host, 'username': username, 'password': password, 'port': port, 'timeout': timeout, 'conn_timeout': min(TCP_TIMEOUT, timeout), 'banner_timeout': min(BANNER_TIMEOUT, timeout), 'auth_timeout': timeout})
+
+
+def disconnect(connection: object) -> None:
+	"""
+		Close a netmiko session, the errors of a session already closed are ignored.
+
+		Arguments:
+			connection(object)  => The netmiko session.
+
+		Returns:
+			None
+	"""
+	try:
+		connection.disconnect()
+	except (OSError, EOFError, netmiko.exceptions.NetmikoBaseException, netmiko.exceptions.SSHException):
+		pass
+	return None
+
+
+class sshPool(object):
+	"""
+		Pool of netmiko sessions keyed by (host, port, username).
+	"""
+
+	## Class variables
+	idleTimeout: float
+	maxIdle: int
+	idle: dict
+	keys: dict
+	lock: object
+
+	def __init__(self, idleTimeout: float=300.0, maxIdle: int=4) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				idleTimeout(float)  => Seconds before an unused session is closed (Default = 300.0)
+				maxIdle(int)        => Maximum number of unused sessions kept per device (Default = 4)
+
+			Returns:
+				object
+		"""
+		self.idleTimeout=idleTimeout
+		self.maxIdle=maxIdle
+		self.idle={}
+		self.keys={}
+		self.lock=threading.Lock()
+
+
+	def acquire(self, host: str, username: str, password: str, port: int=22, timeout: float=CONNECT_TIMEOUT) -> object:
+		"""
+			Return a live session to the device, an idle session is reused if there is one, otherwise a new one is opened.
+
+			Arguments:
+				host(str)        => FQDN or IP address of the SSH host.
+				username(str)    => Username for the SSH host.
+				password(str)    => Password for the SSH host.
+				port(int)        => Port for the SSH host (Default = 22)
+				timeout(float)   => Connection timeout in seconds of a new session (Default = CONNECT_TIMEOUT)
+
+			Returns:
+				object
+		"""
+
+		## Variables
+		key: tuple=(host, port, username)
+		connection: object=None
+		released: float
+		sessions: list
+		session: object
+		stale: list=[]
+
+		## Take the most recent idle session, the expired ones are closed
+		with self.lock:
+			sessions=self.idle.get(key, [])
+			while sessions and connection is None:
+				connection, released=sessions.pop()
+				if time.monotonic() - released > self.idleTimeout:
+					stale.append(connection)
+					connection=None
+			stale.extend(self.expire())
+
+		for session in stale:
+			self.forget(session)
+			disconnect(session)
+
+		## Health check, a dead session is replaced by a new one
+		if connection is not None and not connection.is_alive():
+			self.forget(connection)
+			disconnect(connection)
+			connection=None
+
+		if connection is None:
+			connection=connect(host, username, password, port, timeout)
+			with self.lock:
+				self.keys[id(connection)]=key
+
+		return connection
+
+
+	def release(self, connection: object) -> None:
+		"""
+			Give back a session to the pool.
+
+			Arguments:
+				connection(object)  => The session returned by acquire().
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		key: tuple
+		sessions: list
+		extra: list=[]
+
+		with self.lock:
+			key=self.keys.get(id(connection))
+			if key is not None:
+				sessions=self.idle.setdefault(key, [])
+				sessions.append((connection, time.monotonic()))
+				while len(sessions) > self.maxIdle:
+					extra.append(sessions.pop(0)[0])
+
+		## A session which does not come from the pool is closed
+		if key is None:
+			extra.append(connection)
+
+		for connection in extra:
+			self.forget(connection)
+			disconnect(connection)
+
+		## End the function
+		return None
+
+
+	def discard(self, connection: object) -> None:
+		"""
+			Close a session which failed instead of giving it back to the pool.
+
+			Arguments:
+				connection(object)  => The session returned by acquire().
+
+			Returns:
+				None
+		"""
+		self.forget(connection)
+		disconnect(connection)
+		return None
+
+
+	def forget(self, connection: object) -> None:
+		"""
+			Remove a session from the index of the pool.
+
+			Arguments:
+				connection(object)  => The session returned by acquire().
+
+			Returns:
+				None
+		"""
+		with self.lock:
+			self.keys.pop(id(connection), None)
+		return None
+
+
+	def expire(self) -> list:
+		"""
+			Remove the idle sessions unused for more than idleTimeout seconds, the lock must be held by the caller.
+
+			Arguments:
+				None
+
+			Returns:
+				list => The sessions to close.
+		"""
+
+		## Variables
+		limit: float=time.monotonic() - self.idleTimeout
+		expired: list=[]
+		key: tuple
+		sessions: list
+
+		for key, sessions in list(self.idle.items()):
+			expired.extend([connection for connection, released in sessions if released < limit])
+			sessions[:]=[(connection, released) for connection, released in sessions if released >= limit]
+			if not sessions:
+				del self.idle[key]
+
+		return expired
+
+
+	def evict(self) -> None:
+		"""
+			Close the idle sessions unused for more than idleTimeout seconds.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		expired: list
+		connection: object
+
+		with self.lock:
+			expired=self.expire()
+		for connection in expired:
+			self.forget(connection)
+			disconnect(connection)
+
+		## End the function
+		return None
+
+
+	def close(self) -> None:
+		"""
+			Close all the idle sessions of the pool.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		sessions: list
+		connection: object
+
+		with self.lock:
+			sessions=[connection for idle in self.idle.values() for connection, released in idle]
+			self.idle={}
+		for connection in sessions:
+			self.forget(connection)
+			disconnect(connection)
+
+		## End the function
+		return None
+
+
+	def __enter__(self) -> object:
+		return self
+
+
+	def __exit__(self, *args: object) -> None:
+		self.close()
+		return None
@@ -0,0 +1,193 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Converge the route-maps of a device onto a desired state with the minimal set of changes.
+
+The current route-maps are read with a single <get-config>, compared with the desired state (the communities are
+compared on their 32-bit values, so "655370" and "10:10" are the same community) and only the differences are sent,
+merged into a single <edit-config>. Nothing is sent when the device is already compliant.
+
+A desired community listed several times by the device under equivalent encodings ("655370" next to "10:10") is not
+compliant: removing one encoding removes the community from the running configuration, so all its encodings are
+removed by a first <edit-config> and the community is added again, once, with the other changes.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import routemap, payload, community
+
+
+def diffSequence(routeMapName: str, routeMapSequence: int, current: dict, desired: dict) -> list:
+	"""
+		Return the changes converging a sequence onto its desired state.
+
+		Arguments:
+			routeMapName(str)      => Name of the route-map.
+			routeMapSequence(int)  => Sequence number.
+			current(dict)          => Current sequence, None if it does not exist.
+			desired(dict)          => {"operation": "permit" or "deny" (Default = "permit"), "communities": list (Default = [])}
+
+		Returns:
+			list => See diffRouteMaps()
+	"""
+
+	## Variables
+	changes: list=[]
+	operation: str=desired.get("operation", "permit")
+	desiredCommunities: list=list(desired.get("communities", []))
+	currentCommunities: list=list(current["communities"]) if current is not None else []
+	desiredList: list=community.parseCommunities(desiredCommunities).tolist()
+	desiredValues: set=set(desiredList)
+	currentValues: list=community.parseCommunities(currentCommunities).tolist()
+	duplicated: set=set([value for value in desiredValues if currentValues.count(value) > max(desiredList.count(value), 1)])
+	present: set=set(currentValues) - duplicated
+	removed: list=[text for text, value in zip(currentCommunities, currentValues) if value not in desiredValues]
+	duplicates: list=[text for text, value in zip(currentCommunities, currentValues) if value in duplicated]
+	added: dict={}
+	text: str
+	value: int
+
+	## New sequence or new action
+	if current is None:
+		changes.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "create-sequence", "operation": operation})
+	elif current["operation"] != operation:
+		changes.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "operation", "operation": operation})
+
+	## Communities to remove, with the text used by the device
+	if removed:
+		changes.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "remove-communities", "communities": removed})
+
+	## Every encoding of a duplicated community is removed, the community is added again below
+	if duplicates:
+		changes.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "remove-duplicates", "communities": duplicates})
+
+	## Communities to add, once per value
+	for text, value in zip(desiredCommunities, desiredList):
+		if value not in present and value not in added:
+			added[value]=text
+	if added:
+		changes.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "add-communities", "communities": list(added.values())})
+
+	return changes
+
+
+def diffRouteMaps(current: dict, desired: dict, prune: bool=True) -> list:
+	"""
+		Return the changes converging the current route-maps onto the desired state.
+
+		Arguments:
+			current(dict)  => Index of the current route-maps (see routemap.parseRouteMaps)
+			desired(dict)  => {routeMapName: {seq_no: {"operation": str, "communities": list}}}, a route-map without sequence is removed
+			prune(bool)    => If it is True, the sequences of a desired route-map which are not in the desired state are removed (Default = True)
+
+		Returns:
+			list => [{"routeMapName": str, "routeMapSequence": int, "type": str, ...}] The type is one of
+			        "remove-route-map", "remove-sequence", "create-sequence", "operation" (with the "operation" key),
+			        "remove-communities", "remove-duplicates" (equivalent encodings of a desired community) or
+			        "add-communities" (with the "communities" key)
+	"""
+
+	## Variables
+	changes: list=[]
+	routeMapName: str
+	sequences: dict
+	currentSequences: dict
+	routeMapSequence: int
+
+	for routeMapName, sequences in desired.items():
+		currentSequences=current.get(routeMapName, {})
+
+		## A route-map without any sequence is removed
+		if not sequences:
+			if currentSequences:
+				changes.append({"routeMapName": routeMapName, "routeMapSequence": None, "type": "remove-route-map"})
+			continue
+
+		## Sequences not in the desired state
+		if prune:
+			for routeMapSequence in sorted(set(currentSequences) - set(int(sequence) for sequence in sequences)):
+				changes.append({"routeMapName": routeMapName, "routeMapSequence": routeMapSequence, "type": "remove-sequence", "operation": currentSequences[routeMapSequence]["operation"]})
+
+		for routeMapSequence in sorted(sequences, key=int):
+			changes.extend(diffSequence(routeMapName, int(routeMapSequence), currentSequences.get(int(routeMapSequence)), sequences[routeMapSequence]))
+
+	return changes
+
+
+def getConfigs(changes: list) -> list:
+	"""
+		Return the <config> payloads applying the changes, in an order which can be merged by a batch.
+
+		Arguments:
+			changes(list)  => Output of diffRouteMaps()
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	configs: list=[]
+	change: dict
+
+	for change in changes:
+		if change["type"] == "remove-route-map":
+			configs.append(payload.getRouteMapConfig(routeMapName=change["routeMapName"], delete=True))
+		elif change["type"] == "remove-sequence":
+			configs.append(payload.getSequenceConfig(routeMapName=change["routeMapName"], routeMapSequence=change["routeMapSequence"], routeMapOperation=change["operation"], delete=True))
+		elif change["type"] in ("create-sequence", "operation"):
+			configs.append(payload.getSequenceConfig(routeMapName=change["routeMapName"], routeMapSequence=change["routeMapSequence"], routeMapOperation=change["operation"]))
+		else:
+			configs.append(payload.getCommunitiesConfig(routeMapName=change["routeMapName"], routeMapSequence=change["routeMapSequence"], BGPCommunities=change["communities"], delete=change["type"] in ("remove-communities", "remove-duplicates")))
+
+	return configs
+
+
+def syncRouteMaps(nc: object, desired: dict, prune: bool=True, dryRun: bool=False) -> list:
+	"""
+		Converge the route-maps of a device onto the desired state: one <get-config>, then one <edit-config> with
+		only the changes, or no <edit-config> at all if the device is compliant. The duplicated communities are
+		removed by a first <edit-config>, the batch would merge their removal with the community added again.
+
+		Arguments:
+			nc(object)      => The "netconf" object.
+			desired(dict)   => {routeMapName: {seq_no: {"operation": str, "communities": list}}}, a route-map without sequence is removed
+			prune(bool)     => If it is True, the sequences of a desired route-map which are not in the desired state are removed (Default = True)
+			dryRun(bool)    => If it is True, return the changes without sending them (Default = False)
+
+		Returns:
+			list => The changes (see diffRouteMaps), empty if the device is compliant
+	"""
+
+	## Variables
+	current: dict
+	changes: list
+	config: str
+
+	## A single route-map is read with its own filter, several route-maps with the whole table
+	if len(desired) == 1:
+		current=routemap.parseRouteMaps(nc.getRouteMapByName(list(desired)[0]))
+	else:
+		current=nc.getRouteMapTable().load()
+
+	changes=diffRouteMaps(current, desired, prune=prune)
+	if dryRun:
+		return changes
+
+	## Removal of the duplicated communities, before they are added again
+	if [change for change in changes if change["type"] == "remove-duplicates"]:
+		with nc.batch():
+			for config in getConfigs([change for change in changes if change["type"] == "remove-duplicates"]):
+				nc.editConfig(config)
+
+	if [change for change in changes if change["type"] != "remove-duplicates"]:
+		with nc.batch():
+			for config in getConfigs([change for change in changes if change["type"] != "remove-duplicates"]):
+				nc.editConfig(config)
+
+	return changes
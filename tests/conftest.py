@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Fixtures of the regression tests: a local simulator (simulator.py) and the clients connected to it.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import os, sys, logging, pytest
+
+## The modules are at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulator
+from run import netconf, ssh
+
+## paramiko logs the sessions closed by the simulator
+logging.getLogger("paramiko").addHandler(logging.NullHandler())
+
+
+@pytest.fixture
+def server() -> object:
+	"""
+		Simulator of an empty device.
+	"""
+	with simulator.netconfServer() as server:
+		yield server
+
+
+@pytest.fixture
+def nc(server: object) -> object:
+	"""
+		"netconf" object connected to the simulator.
+	"""
+	with netconf(host="127.0.0.1", username="user", password="pass", port=server.port) as nc:
+		yield nc
+
+
+@pytest.fixture
+def sshSession(server: object) -> object:
+	"""
+		"ssh" object connected to the CLI of the simulator.
+	"""
+	with ssh(host="127.0.0.1", username="user", password="pass", port=server.port) as session:
+		yield session
+
+
+@pytest.fixture
+def bugServer() -> object:
+	"""
+		Simulator of an empty device with the community encoding bug: "655370" and "10:10" are two NETCONF entries.
+	"""
+	with simulator.netconfServer(encodingBug=True) as server:
+		yield server
+
+
+@pytest.fixture
+def bugNc(bugServer: object) -> object:
+	"""
+		"netconf" object connected to the simulator with the encoding bug.
+	"""
+	with netconf(host="127.0.0.1", username="user", password="pass", port=bugServer.port) as nc:
+		yield nc
+
+
+@pytest.fixture
+def bugSshSession(bugServer: object) -> object:
+	"""
+		"ssh" object connected to the CLI of the simulator with the encoding bug.
+	"""
+	with ssh(host="127.0.0.1", username="user", password="pass", port=bugServer.port) as session:
+		yield session
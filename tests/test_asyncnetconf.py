@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Regression tests of asyncnetconf.py against the simulator.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import asyncio, simulator, routemap
+from xml.etree import ElementTree
+from asyncnetconf import asyncNetconf
+
+
+def recordFilters(server: object) -> list:
+	"""
+		Return the list receiving the serialized filter of each <get-config> handled by the simulator.
+	"""
+
+	## Variables
+	filters: list=[]
+	getConfig: object=server.model.getConfig
+
+	def record(filter: object=None) -> str:
+		filters.append(ElementTree.tostring(filter, encoding="unicode") if filter is not None else "")
+		return getConfig(filter)
+
+	server.model.getConfig=record
+	return filters
+
+
+def getSequenceNumbers(nc: object, routeMapName: str) -> list:
+	"""
+		Return the sequence numbers of a route-map read from the simulator.
+	"""
+	return sorted(routemap.parseRouteMaps(nc.getRouteMapByName(routeMapName)).get(routeMapName, {}))
+
+
+def testDeleteSequenceReadsOnlySequenceNumbers(server: object, nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMap("A", 20)
+	nc.setRouteMapBGPCommunity("A", 10, "1:1")
+	filters: list=recordFilters(server)
+
+	async def delete() -> None:
+		async with asyncNetconf(host="127.0.0.1", username="user", password="pass", port=server.port) as anc:
+			await anc.setRouteMap("A", 10, delete=True)
+
+	asyncio.run(delete())
+	assert len(filters) == 1
+	assert "seq_no" in filters[0] and "community" not in filters[0]
+	assert getSequenceNumbers(nc, "A") == [20]
+
+
+def testDeleteLastSequenceDeletesRouteMap(server: object, nc: object) -> None:
+	nc.setRouteMap("A", 10)
+
+	async def delete() -> None:
+		async with asyncNetconf(host="127.0.0.1", username="user", password="pass", port=server.port) as anc:
+			await anc.setRouteMap("A", 10, delete=True)
+
+	asyncio.run(delete())
+	assert getSequenceNumbers(nc, "A") == []
+
+
+def testReadsUseXPathFilters() -> None:
+	with simulator.netconfServer(capabilities=["urn:ietf:params:netconf:capability:xpath:1.0"]) as server:
+		filters: list=recordFilters(server)
+
+		async def read() -> tuple:
+			async with asyncNetconf(host="127.0.0.1", username="user", password="pass", port=server.port) as anc:
+				await anc.setRouteMapBGPCommunity("A", 10, "1:1")
+				await anc.setBGPCommunityNewFormat()
+				return routemap.parseRouteMaps(await anc.getRouteMapByName("A")), await anc.getBGPCommunityNewFormat()
+
+		routeMaps, newFormat=asyncio.run(read())
+	assert list(routeMaps) == ["A"] and routeMaps["A"][10]["communities"] == ["1:1"]
+	assert newFormat is True
+	assert len(filters) == 2 and all('type="xpath"' in filter for filter in filters)
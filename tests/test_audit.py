@@ -0,0 +1,91 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of audit.py: each check on a device of the simulator, the scope of the rules and the errors of the fleet audit.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import pytest, socket, audit, fleet, retry
+
+
+def getLocations(violations: list) -> list:
+	"""
+		Return the rule, route-map, sequence and communities of each violation.
+	"""
+	return sorted((violation["rule"], violation["routeMapName"], violation["routeMapSequence"], violation["communities"]) for violation in violations)
+
+
+def testDefaultRulesOnDevice(bugNc: object) -> None:
+	bugNc.setBGPCommunityNewFormat()
+	bugNc.setRouteMapBGPCommunity("A", 10, "655370")
+	bugNc.setRouteMapBGPCommunity("A", 10, "10:10")
+	bugNc.setRouteMapBGPCommunity("A", 20, "1:1")
+
+	assert getLocations(audit.auditDevice(bugNc)) == [("decimal-with-new-format", "A", 10, ["655370"]), ("duplicate-community", "A", 10, ["655370", "10:10"])]
+
+
+def testDecimalOnlyWithNewFormat(bugNc: object) -> None:
+	bugNc.setRouteMapBGPCommunity("A", 10, "655370")
+
+	assert audit.auditDevice(bugNc) == []
+
+
+def testCommunityChecks(nc: object) -> None:
+	rules: list=[
+		{"name": "forbidden", "check": "forbidden", "communities": ["65535:666"]},
+		{"name": "required", "check": "required", "communities": ["65000:1", "65000:2"], "operations": ["permit"]},
+		{"name": "small", "check": "maxCommunities", "limit": 2, "routeMaps": "^CUSTOMER-"},
+	]
+	nc.setBGPCommunityNewFormat()
+	for BGPCommunity in ("65000:1", "65000:2", "65535:666"):
+		nc.setRouteMapBGPCommunity("CUSTOMER-A", 10, BGPCommunity)
+	nc.setRouteMapBGPCommunity("B", 10, "65000:2")
+	nc.setRouteMapBGPCommunity("B", 10, "1:1")
+	nc.setRouteMapBGPCommunity("B", 10, "2:2")
+	nc.setRouteMap("B", 20, routeMapOperation="deny")
+
+	assert getLocations(audit.auditDevice(nc, rules)) == [("forbidden", "CUSTOMER-A", 10, ["65535:666"]), ("required", "B", 10, ["65000:1"]), ("small", "CUSTOMER-A", 10, [])]
+
+
+def testModelFromRouteMaps() -> None:
+	model: object=audit.auditModel({"A": {10: {"operation": "permit", "communities": ["1:1", "65537"]}, 20: {"operation": "deny", "communities": []}}}, False)
+
+	assert len(model) == 2 and model.getLocation(1) == ("A", 20)
+	assert model.values.tolist() == [65537, 65537]
+	assert getLocations(audit.evaluate(model, [{"name": "duplicate", "check": "duplicate"}, {"name": "decimal", "check": "decimal", "when": {"newFormat": False}}])) == [("decimal", "A", 10, ["65537"]), ("duplicate", "A", 10, ["1:1", "65537"])]
+
+
+@pytest.mark.parametrize("rule", [
+	{"name": "unknown", "check": "unknown"},
+	{"name": "forbidden", "check": "forbidden"},
+	{"name": "small", "check": "maxCommunities"},
+	{"name": "decimal", "check": "decimal", "when": {"candidate": True}},
+	{"name": "forbidden", "check": "forbidden", "communities": ["65536:1"]},
+])
+def testInvalidRuleRaises(rule: dict) -> None:
+	with pytest.raises(ValueError):
+		audit.compileRules([rule])
+
+
+def testFleetReportsUnreachableDevice(bugNc: object) -> None:
+	bugNc.setRouteMapBGPCommunity("A", 10, "655370")
+	bugNc.setRouteMapBGPCommunity("A", 10, "10:10")
+	devices: list=[{"name": "bug", "host": "127.0.0.1", "username": "user", "password": "pass", "port": bugNc.port}]
+	listener: object=socket.socket()
+
+	## A port with no server
+	listener.bind(("127.0.0.1", 0))
+	devices.append({"name": "down", "host": "127.0.0.1", "username": "user", "password": "pass", "port": listener.getsockname()[1]})
+	listener.close()
+
+	with fleet.fleet(devices, retryPolicy=retry.retryPolicy(attempts=1), failureThreshold=None) as routers:
+		violations: list=list(audit.auditFleet(routers))
+
+	assert sorted((violation["device"], violation["rule"]) for violation in violations) == [("bug", "duplicate-community"), ("down", "device-error")]
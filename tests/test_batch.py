@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Regression tests of batch.py: the merged payload must have the same effect as the payloads sent one by one.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import batch, payload, routemap
+
+
+def getSequences(config: str) -> dict:
+	"""
+		Return the sequences (and their communities) written by a <config> payload.
+	"""
+
+	## Variables
+	routeMaps: dict=routemap.parseRouteMaps(config.replace("<config>", "<data>").replace("</config>", "</data>"))
+
+	return {(name, number): sequence["communities"] for name, sequences in routeMaps.items() for number, sequence in sequences.items()}
+
+
+def testMergeKeepsSequencesOfSameRouteMap() -> None:
+	config: str=batch.mergeConfig([payload.getRouteMapConfig("A", 10), payload.getRouteMapConfig("A", 20)])
+	assert set(getSequences(config)) == {("A", 10), ("A", 20)}
+
+
+def testMergeKeepsCommunityBeforeRouteMapWrite() -> None:
+	config: str=batch.mergeConfig([payload.getCommunityConfig("A", 10, "1:1"), payload.getRouteMapConfig("A", 10)])
+	assert getSequences(config) == {("A", 10): ["1:1"]}
+	assert "<operation>permit</operation>" in config
+
+
+def testRemoveSupersedesEarlierWrite() -> None:
+	config: str=batch.mergeConfig([payload.getRouteMapConfig("A", 10), payload.getRouteMapConfig("A", delete=True)])
+	assert config.count("<route-map ") == 1 and 'operation="remove"' in config
+
+
+def testMergeAfterRemoveIsReplace() -> None:
+	config: str=batch.mergeConfig([payload.getRouteMapConfig("A", delete=True), payload.getSequenceConfig("A", 20).replace(' operation="merge"', "")])
+	assert 'operation="replace"' in config
+
+
+def testBatchKeepsBothSequencesOnDevice(nc: object) -> None:
+	with nc.batch():
+		nc.setRouteMap("B", 10)
+		nc.setRouteMap("B", 20)
+	assert sorted(routemap.parseRouteMaps(nc.getRouteMapByName("B"))["B"]) == [10, 20]
+
+
+def testBatchKeepsCommunityOnDevice(nc: object) -> None:
+	with nc.batch():
+		nc.setRouteMapBGPCommunity("B", 10, "10:10")
+		nc.setRouteMap("B", 10)
+	assert nc.getRouteMapBGPCommunity("B", 10, canonical=True) == ["10:10"]
@@ -0,0 +1,58 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of benchmark.py: the suites count the RPCs of each workflow against the simulator, and the comparison of two
+results reports the regressions.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import json, pytest, benchmark
+
+
+def getResults(p50: float, rpc: float) -> dict:
+	"""
+		Return the output of runSuite() with a single scenario.
+	"""
+	return {"results": {"latency": {"get": {"p50": p50, "p95": p50, "rpc": rpc, "bytesSent": 100.0, "bytesReceived": 100.0}}}}
+
+
+def testSuitesCountRpcs() -> None:
+	results: dict=benchmark.runSuite(quick=True, suites=["latency"])["results"]
+
+	assert list(results) == ["latency"]
+	assert results["latency"]["get"]["rpc"] == results["latency"]["set"]["rpc"] == 1
+	assert results["latency"]["get"]["samples"] == 10
+	assert benchmark.suiteBulk(sizes=(10,), repeats=1)["add-10"]["rpc"] == 1
+	assert benchmark.suiteTable(routeMaps=5, repeats=1)["table"]["rpc"] == 1
+
+
+def testCompareResults() -> None:
+	assert benchmark.compareResults(getResults(1.0, 1.0), getResults(1.1, 1.0)) == []
+	assert [(regression["metric"], regression["current"]) for regression in benchmark.compareResults(getResults(1.0, 1.0), getResults(1.5, 2.0))] == [("p50", 1.5), ("p95", 1.5), ("rpc", 2.0)]
+
+
+def testCompareExitCode(tmp_path: object) -> None:
+	baseline: object=tmp_path / "baseline.json"
+	current: object=tmp_path / "current.json"
+	baseline.write_text(json.dumps(getResults(1.0, 1.0)))
+	current.write_text(json.dumps(getResults(1.0, 2.0)))
+
+	with pytest.raises(SystemExit) as exit:
+		benchmark.main("compare", str(baseline), str(baseline))
+	assert exit.value.code == 0
+	with pytest.raises(SystemExit) as exit:
+		benchmark.main("compare", str(baseline), str(current))
+	assert exit.value.code == 1
+
+
+@pytest.mark.parametrize("args", [["--only", "latency", "suite"], ["suite", "--only", "latency"]])
+def testOnlyBeforeOrAfterSuite(args: list) -> None:
+	assert benchmark.getParser().parse_args(args).only == ["latency"]
+	assert not hasattr(benchmark.getParser().parse_args(["suite"]), "only")
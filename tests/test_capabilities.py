@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of capabilities.py: the entries survive between runs, the quirks are dropped when the software version
+changes, and a cached device is answered without any connection or probe.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import os, pytest, capabilities
+from run import netconf
+
+## Capabilities of two software versions
+VERSION_1: list=["urn:ietf:params:netconf:base:1.0", "http://cisco.com/ns/yang/Cisco-IOS-XE-native?module=Cisco-IOS-XE-native&revision=2018-07-27"]
+VERSION_2: list=["urn:ietf:params:netconf:base:1.0", "http://cisco.com/ns/yang/Cisco-IOS-XE-native?module=Cisco-IOS-XE-native&revision=2019-11-01"]
+
+
+def testVersion() -> None:
+	assert capabilities.getVersion(VERSION_1) == "Cisco-IOS-XE-native@2018-07-27"
+	assert capabilities.getVersion(["urn:ietf:params:netconf:base:1.0"]).startswith("sha1:")
+	assert capabilities.getModules(VERSION_2) == {"Cisco-IOS-XE-native": "2019-11-01"}
+
+
+def testQuirksFollowVersion(tmp_path: object) -> None:
+	path: str=os.path.join(str(tmp_path), "capabilities.json")
+	cache: object=capabilities.capabilityCache(path)
+
+	with pytest.raises(ValueError):
+		cache.setQuirk("R1", 830, "encodingBug", True)
+	cache.update("R1", 830, VERSION_1)
+	cache.setQuirk("R1", 830, "encodingBug", True)
+
+	## Same version with one more capability: the quirks are kept
+	cache.update("R1", 830, VERSION_1 + ["urn:ietf:params:netconf:capability:candidate:1.0"])
+	assert capabilities.capabilityCache(path).getQuirk("R1", 830, "encodingBug") is True
+	assert capabilities.capabilityCache(path).get("R1", 830)["features"]["candidate"] is True
+
+	## New version: the quirks are detected again
+	cache.update("R1", 830, VERSION_2)
+	assert capabilities.capabilityCache(path).getQuirk("R1", 830, "encodingBug") is None
+
+	cache.invalidate("R1", 830)
+	assert capabilities.capabilityCache(path).get("R1", 830) is None
+
+
+def testCorruptedFileIsEmptyCache(tmp_path: object) -> None:
+	path: str=os.path.join(str(tmp_path), "capabilities.json")
+	with open(path, "w") as cache:
+		cache.write("{")
+
+	assert capabilities.capabilityCache(path).entries == {}
+
+
+def testCachedDeviceIsNotProbedAgain(tmp_path: object, bugServer: object) -> None:
+	path: str=os.path.join(str(tmp_path), "capabilities.json")
+
+	with netconf(host="127.0.0.1", username="user", password="pass", port=bugServer.port, capabilityCache=capabilities.capabilityCache(path)) as nc:
+		assert nc.hasEncodingBug() is True
+	bugServer.rpcLog.clear()
+
+	## The session is opened by the first request, not by supports()
+	nc: object=netconf(host="127.0.0.1", username="user", password="pass", port=bugServer.port, capabilityCache=capabilities.capabilityCache(path))
+	try:
+		assert nc.supports(":candidate") is False
+		assert nc.manager is None
+		assert nc.hasEncodingBug() is True
+	finally:
+		nc.close()
+	assert "edit-config" not in bugServer.rpcLog
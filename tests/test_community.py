@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of community.py: the bulk functions must give the same values and raise on the same texts as the scalar ones.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import pytest, numpy, community
+
+## Valid texts, with the edge cases of the bulk parsing (padding, spaces, names, more digits than the float64 precision)
+VALID: list=["10:10", "655370", "0", "4294967295", "65535:65535", "0:0", "007:1", "1:01", " 1:1", "2:2 ", "no-export", "internet", "local-AS", "gshut", "0000000000000000010"]
+
+## Invalid texts
+INVALID: list=["65536:1", "1:65536", "4294967296", "1:2:3", "abc", "", ":1", "1:", "-1", "1.5", "1 :1", "99999999999999999999"]
+
+
+def testBulkMatchesScalar() -> None:
+	assert community.parseCommunities(VALID).tolist() == [community.parseCommunity(BGPCommunity) for BGPCommunity in VALID]
+	assert community.parseCommunities(numpy.array(VALID)).tolist() == [community.parseCommunity(BGPCommunity) for BGPCommunity in VALID]
+	assert community.parseCommunities([]).dtype == numpy.uint32
+
+
+@pytest.mark.parametrize("BGPCommunity", INVALID)
+def testUnknownTokenRaises(BGPCommunity: str) -> None:
+	with pytest.raises(ValueError):
+		community.parseCommunity(BGPCommunity)
+	with pytest.raises(ValueError):
+		community.parseCommunities(["1:1", BGPCommunity, "2:2"])
+
+
+def testFormatMatchesScalar() -> None:
+	values: list=community.parseCommunities(VALID).tolist()
+
+	assert community.formatCommunities(values) == [community.formatCommunity(value) for value in values]
+	assert community.formatCommunities(values, newFormat=False) == [community.formatCommunity(value, newFormat=False) for value in values]
+
+
+def testCanonicalForm() -> None:
+	assert community.canonicalCommunity("655370") == "10:10"
+	assert community.canonicalCommunity("10:10", newFormat=False) == "655370"
+	assert community.canonicalCommunity("4294967041") == "no-export"
+	assert community.canonicalCommunities(["655370", "1:1", "10:10", "no-export", "65537"]) == ["1:1", "10:10", "no-export"]
+	assert community.canonicalCommunities(["655370", "1:1", "10:10"], newFormat=False) == ["65537", "655370"]
+	assert community.canonicalCommunities([]) == []
@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of drift.py: the NETCONF and CLI views of the simulator agree unless the community encoding bug lists a
+community twice.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import socket, drift
+
+
+def getDevice(port: int) -> dict:
+	"""
+		Return the NETCONF and SSH arguments of a device of the simulator.
+	"""
+	return {"netconf": {"host": "127.0.0.1", "username": "user", "password": "pass", "port": port}, "ssh": {"host": "127.0.0.1", "username": "user", "password": "pass", "port": port}}
+
+
+def testCompareRouteMaps() -> None:
+	netconfRouteMaps: dict={"A": {10: {"operation": "permit", "communities": ["655370", "10:10"]}, 20: {"operation": "deny", "communities": []}}, "B": {10: {"operation": "permit", "communities": ["1:1"]}}}
+	cliRouteMaps: dict={"A": {10: {"operation": "permit", "communities": ["655370"]}, 20: {"operation": "permit", "communities": []}}, "B": {10: {"operation": "permit", "communities": ["65537", "2:2"]}}, "C": {10: {"operation": "permit", "communities": []}}}
+
+	assert [(difference["routeMapName"], difference["routeMapSequence"], difference["type"]) for difference in drift.compareRouteMaps(netconfRouteMaps, cliRouteMaps)] == [
+		("A", 10, "duplicate-communities"),
+		("A", 20, "operation"),
+		("B", 10, "communities"),
+		("C", 10, "missing-in-netconf"),
+	]
+	assert drift.compareRouteMaps({"A": {10: {"operation": "permit", "communities": []}}}, {})[0]["type"] == "missing-in-cli"
+
+
+def testNoDriftWithoutBug(nc: object, sshSession: object) -> None:
+	nc.setRouteMapBGPCommunity("A", 10, "655370")
+	nc.setRouteMapBGPCommunity("A", 10, "1:1")
+	nc.setRouteMap("A2", 20, routeMapOperation="deny")
+
+	assert drift.detectDrift(nc, sshSession) == []
+	assert drift.detectDrift(nc, sshSession, "A") == []
+
+
+def testEncodingBugDrift(bugNc: object, bugSshSession: object) -> None:
+	bugNc.setRouteMapBGPCommunity("A", 10, "655370")
+	bugNc.setRouteMapBGPCommunity("A", 10, "10:10")
+
+	assert drift.detectDrift(bugNc, bugSshSession, "A") == [{"routeMapName": "A", "routeMapSequence": 10, "type": "duplicate-communities", "netconf": ["655370", "10:10"], "cli": ["655370"]}]
+
+
+def testFleetDrift(nc: object, bugNc: object) -> None:
+	listener: object=socket.socket()
+	bugNc.setRouteMapBGPCommunity("A", 10, "655370")
+	bugNc.setRouteMapBGPCommunity("A", 10, "10:10")
+	nc.setRouteMapBGPCommunity("A", 10, "10:10")
+
+	## A port with no server
+	listener.bind(("127.0.0.1", 0))
+	port: int=listener.getsockname()[1]
+	listener.close()
+	results: dict=drift.detectFleetDrift([dict(getDevice(nc.port), name="ok"), dict(getDevice(bugNc.port), name="bug"), dict(getDevice(port), name="down")])
+
+	assert results["ok"] == {"differences": [], "error": None}
+	assert [difference["type"] for difference in results["bug"]["differences"]] == ["duplicate-communities"]
+	assert results["down"]["differences"] is None and results["down"]["error"] is not None
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of fleet.py: the operations run on every device of simulators, an error on a device does not stop the other
+ones, and the sessions per device are bounded.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import socket, threading, time, pytest, fleet, retry
+
+
+def getDevice(name: str, port: int) -> dict:
+	"""
+		Return the arguments of a device of the simulator.
+	"""
+	return {"name": name, "host": "127.0.0.1", "username": "user", "password": "pass", "port": port}
+
+
+def getClosedPort() -> int:
+	"""
+		Return a port with no server.
+	"""
+
+	## Variables
+	listener: object=socket.socket()
+
+	listener.bind(("127.0.0.1", 0))
+	try:
+		return listener.getsockname()[1]
+	finally:
+		listener.close()
+
+
+def testOperationsOnEveryDevice(server: object, bugServer: object) -> None:
+	with fleet.fleet([getDevice("R1", server.port), getDevice("R2", bugServer.port)]) as routers:
+		assert routers.setRouteMapBGPCommunity(routeMapName="A", routeMapSequence=10, BGPCommunity="10:10") == {"R1": {"result": None, "error": None}, "R2": {"result": None, "error": None}}
+		assert routers.getRouteMapBGPCommunity(routeMapName="A", routeMapSequence=10, canonical=True) == {"R1": {"result": ["10:10"], "error": None}, "R2": {"result": ["10:10"], "error": None}}
+		assert routers.syncRouteMap({"A": {10: {"communities": ["10:10"]}}}, devices=["R2"]) == {"R2": {"result": [], "error": None}}
+		assert sorted(name for name, result in routers.stream(lambda nc: nc.getBGPCommunityNewFormat())) == ["R1", "R2"]
+
+
+def testUnreachableDeviceDoesNotStopOthers(server: object) -> None:
+	with fleet.fleet([getDevice("R1", server.port), getDevice("down", getClosedPort())], retryPolicy=retry.retryPolicy(attempts=1)) as routers:
+		results: dict=routers.getRouteMapBGPCommunity(routeMapName="A")
+
+	assert results["R1"] == {"result": [], "error": None}
+	assert results["down"]["result"] is None and isinstance(results["down"]["error"], Exception)
+
+
+def testSessionsPerDeviceAreBounded(server: object) -> None:
+	active: list=[0, 0]
+	lock: object=threading.Lock()
+
+	def request(nc: object) -> None:
+		with lock:
+			active[0]+=1
+			active[1]=max(active)
+		nc.getBGPCommunityNewFormat()
+		time.sleep(0.05)
+		with lock:
+			active[0]-=1
+
+	with fleet.fleet([getDevice("R1", server.port)], sessionsPerDevice=2) as routers:
+		for future in [routers.executor.submit(routers.execute, "R1", request) for index in range(6)]:
+			assert future.result() == {"result": None, "error": None}
+		assert len(routers.pools["R1"].sessions) == 2
+
+	assert active[1] == 2
+	assert server.sessionCount == 2
+
+
+def testExpiredDeadlineFailsDevices(server: object) -> None:
+	with fleet.fleet([getDevice("R1", server.port)]) as routers:
+		result: dict=routers.execute("R1", lambda nc: nc.getBGPCommunityNewFormat(), retry.deadline(0.0))
+
+	assert isinstance(result["error"], retry.deadlineExceededError)
+	assert server.sessionCount == 0
+
+
+def testPoolWaitIsBounded() -> None:
+	pool: object=fleet.netconfPool({"host": "127.0.0.1", "username": "user", "password": "pass", "port": getClosedPort()}, size=1)
+	nc: object=pool.acquire()
+
+	with pytest.raises(retry.deadlineExceededError):
+		pool.acquire(timeout=0.05)
+	pool.release(nc)
+	assert pool.acquire(timeout=0.05) is nc
+
+
+def testFailedSessionReleasesSlot() -> None:
+	pool: object=fleet.netconfPool({"host": "127.0.0.1", "unknown": True}, size=1)
+
+	with pytest.raises(TypeError):
+		pool.acquire()
+	assert pool.sessions == []
+
+	## The slot of the failed session is free again
+	pool.device={"host": "127.0.0.1", "username": "user", "password": "pass", "port": getClosedPort()}
+	assert pool.acquire(timeout=0.05) in pool.sessions
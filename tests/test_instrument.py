@@ -0,0 +1,97 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of instrument.py: the spans and the counters reported by the "netconf" and "ssh" classes against the simulator.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import pytest, instrument
+from ncclient.operations.rpc import RPCError
+from run import netconf, ssh
+
+
+class recordingTracer(object):
+	"""
+		OpenTelemetry-style tracer recording its spans.
+	"""
+
+	## Class variables
+	spans: list
+
+	def __init__(self) -> object:
+		self.spans=[]
+
+	def start_span(self, name: str, start_time: int, attributes: dict) -> object:
+		self.spans.append({"name": name, "start": start_time, "attributes": attributes, "end": None, "error": None})
+		return self
+
+	def record_exception(self, error: object) -> None:
+		self.spans[-1]["error"]=error
+
+	def end(self, end_time: int) -> None:
+		self.spans[-1]["end"]=end_time
+
+
+def testNetconfMetrics(server: object) -> None:
+	registry: object=instrument.metricsRegistry()
+
+	with netconf(host="127.0.0.1", username="user", password="pass", port=server.port, instrumentation=instrument.instrumentation([registry])) as nc:
+		nc.setRouteMapBGPCommunity("A", 10, "1:1")
+		assert nc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["1:1"]
+		assert registry.getCounter("netconf.rpc", host="127.0.0.1") == len(server.rpcLog) == 2
+
+	assert registry.getHistogram("netconf.connect")["count"] == 1
+	assert registry.getHistogram("netconf.rpc", error=False)["count"] == 2
+	assert registry.getCounter("netconf.bytesSent") > 0 and registry.getCounter("netconf.bytesReceived") > 0
+	assert 'netconf_rpc_total{host="127.0.0.1"} ' in registry.render()
+	assert 'netconf_rpc_seconds_bucket{host="127.0.0.1",error="False",le="+Inf"} 2' in registry.render()
+
+
+def testFailedRpcIsReportedAsError(server: object) -> None:
+	registry: object=instrument.metricsRegistry()
+	server.injectErrors("invalid-value", 1)
+
+	with netconf(host="127.0.0.1", username="user", password="pass", port=server.port, instrumentation=instrument.instrumentation([registry])) as nc:
+		with pytest.raises(RPCError):
+			nc.setRouteMap("A", 10)
+
+	assert registry.getHistogram("netconf.rpc", error=True)["count"] == 1
+
+
+def testSshMetrics(server: object) -> None:
+	registry: object=instrument.metricsRegistry()
+
+	with ssh(host="127.0.0.1", username="user", password="pass", port=server.port, instrumentation=instrument.instrumentation([registry])) as session:
+		session.executeCommands(["show running-config | include bgp-community", "show running-config | section route-map"])
+
+	assert registry.getHistogram("ssh.connect", pooled=False)["count"] == 1
+	assert registry.getHistogram("ssh.command", commands=2)["count"] == 1
+	assert registry.getCounter("ssh.command", host="127.0.0.1") == 2
+
+
+def testTracerHook() -> None:
+	tracer: object=recordingTracer()
+	hooks: object=instrument.instrumentation([instrument.tracerHook(tracer)])
+
+	with hooks.span("netconf.rpc", host="R1", port=830):
+		pass
+	with pytest.raises(KeyError):
+		with hooks.span("netconf.parse", host="R1"):
+			raise KeyError("Simulated error")
+
+	assert [(span["name"], span["attributes"], span["end"] >= span["start"]) for span in tracer.spans] == [("netconf.rpc", {"host": "R1", "port": "830"}, True), ("netconf.parse", {"host": "R1"}, True)]
+	assert tracer.spans[0]["error"] is None and isinstance(tracer.spans[1]["error"], KeyError)
+
+
+def testDisabledInstrumentation() -> None:
+	assert instrument.DISABLED.enabled() is False
+	assert instrument.DISABLED.span("netconf.rpc", host="R1") is instrument.DISABLED.span("ssh.command")
+	with pytest.raises(ValueError):
+		instrument.DISABLED.addHook(instrument.metricsRegistry())
@@ -0,0 +1,173 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of the "netconf" class (run.py) against the simulator: reads, writes, deletions, batches, sync and the
+community encoding bug.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import pytest, simulator, routemap
+from run import netconf
+
+
+def getSequenceNumbers(nc: object, routeMapName: str) -> list:
+	"""
+		Return the sequence numbers of a route-map read from the simulator.
+	"""
+	return sorted(routemap.parseRouteMaps(nc.getRouteMapByName(routeMapName)).get(routeMapName, {}))
+
+
+def testSetAndGetCommunities(nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMapBGPCommunity("A", 10, "1:1")
+	nc.setRouteMapBGPCommunity("A", 10, "10:10")
+
+	assert nc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["1:1", "10:10"]
+	assert nc.getRouteMapBGPCommunity("A", 10, cached=True, canonical=True) == ["1:1", "10:10"]
+	assert nc.getRouteMapBGPCommunity("A", 20) == []
+
+
+def testDeleteCommunity(nc: object) -> None:
+	nc.setRouteMapBGPCommunity("A", 10, "1:1")
+	nc.setRouteMapBGPCommunity("A", 10, "10:10")
+	nc.setRouteMapBGPCommunity("A", 10, "1:1", delete=True)
+
+	assert nc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["10:10"]
+
+
+def testDeleteSequenceKeepsOtherSequences(nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMap("A", 20, routeMapOperation="deny")
+	nc.setRouteMap("A", 10, delete=True)
+
+	assert getSequenceNumbers(nc, "A") == [20]
+	assert routemap.parseRouteMaps(nc.getRouteMapByName("A"))["A"][20]["operation"] == "deny"
+
+
+def testDeleteLastSequenceDeletesRouteMap(nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMap("A", 10, delete=True)
+
+	assert getSequenceNumbers(nc, "A") == []
+
+
+def testDeleteRouteMap(nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMap("A", 20)
+	nc.setRouteMap("B", 10)
+	nc.deleteRouteMap("A")
+
+	assert getSequenceNumbers(nc, "A") == []
+	assert getSequenceNumbers(nc, "B") == [10]
+
+
+def testNewFormat(nc: object) -> None:
+	assert nc.getBGPCommunityNewFormat() is False
+	nc.setBGPCommunityNewFormat()
+	assert nc.getBGPCommunityNewFormat() is True
+	assert nc.getRouteMapBGPCommunity("A", 10) == []
+	nc.setRouteMapBGPCommunity("A", 10, "655370")
+	assert nc.getRouteMapBGPCommunity("A", 10) == ["10:10"]
+	nc.setBGPCommunityNewFormat(delete=True)
+	assert nc.getBGPCommunityNewFormat() is False
+
+
+def testBatchSendsSingleEditConfig(server: object, nc: object) -> None:
+	with nc.batch():
+		nc.setRouteMap("A", 10)
+		nc.setRouteMap("A", 20)
+		nc.setRouteMapBGPCommunity("A", 10, "1:1")
+		nc.setRouteMapBGPCommunity("A", 20, "2:2")
+
+	assert server.rpcLog.count("edit-config") == 1
+	assert nc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["1:1"]
+	assert nc.getRouteMapBGPCommunity("A", 20, canonical=True) == ["2:2"]
+
+
+def testBatchSendsNothingOnError(server: object, nc: object) -> None:
+	with pytest.raises(RuntimeError):
+		with nc.batch():
+			nc.setRouteMap("A", 10)
+			raise RuntimeError("Abort the batch")
+
+	assert server.rpcLog.count("edit-config") == 0
+	assert getSequenceNumbers(nc, "A") == []
+
+
+def testBatchDeletingEverySequenceDeletesRouteMap(server: object, nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMap("A", 20)
+	with nc.batch():
+		nc.setRouteMap("A", 10, delete=True)
+		nc.setRouteMap("A", 20, delete=True)
+
+	assert "A" not in server.model.routeMaps
+
+
+def testBatchDeleteKeepsQueuedSequence(nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	with nc.batch():
+		nc.setRouteMap("A", 20)
+		nc.setRouteMap("A", 10, delete=True)
+
+	assert getSequenceNumbers(nc, "A") == [20]
+
+
+def testTransactionDeletingEverySequenceDeletesRouteMap() -> None:
+	with simulator.netconfServer(capabilities=["urn:ietf:params:netconf:capability:candidate:1.0"]) as server:
+		with netconf(host="127.0.0.1", username="user", password="pass", port=server.port, candidate=True) as nc:
+			nc.setRouteMap("A", 10)
+			nc.setRouteMap("A", 20)
+			with nc.transaction():
+				nc.setRouteMap("A", 10, delete=True)
+				nc.setRouteMap("A", 20, delete=True)
+
+			assert "A" not in server.model.routeMaps
+
+
+def testSyncRouteMap(server: object, nc: object) -> None:
+	desired: dict={"A": {10: {"operation": "permit", "communities": ["10:10", "1:1"]}, 20: {"operation": "deny"}}}
+	nc.setRouteMap("A", 30)
+	nc.setRouteMapBGPCommunity("A", 10, "3:3")
+
+	assert [change["type"] for change in nc.syncRouteMap(desired, dryRun=True)] == ["remove-sequence", "remove-communities", "add-communities", "create-sequence"]
+	assert getSequenceNumbers(nc, "A") == [10, 30]
+
+	nc.syncRouteMap(desired)
+	assert getSequenceNumbers(nc, "A") == [10, 20]
+	assert nc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["1:1", "10:10"]
+
+	## A compliant device costs a read and no write
+	server.rpcLog.clear()
+	assert nc.syncRouteMap(desired) == []
+	assert "edit-config" not in server.rpcLog
+
+
+def testEncodingBugDetected(nc: object, bugNc: object) -> None:
+	assert nc.hasEncodingBug() is False
+	assert bugNc.hasEncodingBug() is True
+	assert getSequenceNumbers(bugNc, "NETCONF_ENCODING_PROBE") == []
+
+
+def testEncodingBugProbeKeepsExistingRouteMap(nc: object) -> None:
+	nc.setRouteMapBGPCommunity("NETCONF_ENCODING_PROBE", 10, "1:1")
+	with pytest.raises(ValueError):
+		nc.hasEncodingBug()
+
+	assert nc.getRouteMapBGPCommunity("NETCONF_ENCODING_PROBE", 10, canonical=True) == ["1:1"]
+	assert nc.hasEncodingBug(probeName="OTHER_PROBE") is False
+
+
+def testEncodingBugListsBothEncodings(bugNc: object) -> None:
+	bugNc.setRouteMapBGPCommunity("A", 10, "655370")
+	bugNc.setRouteMapBGPCommunity("A", 10, "10:10")
+
+	assert bugNc.getRouteMapBGPCommunity("A", 10) == ["655370", "10:10"]
+	assert bugNc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["10:10"]
@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of payload.py: the filters read the keys of the selected entries, the values are escaped in the payloads and
+the filters, and the bulk payloads are the same as the single ones.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import pytest, simulator, payload, routemap
+from lxml import etree
+from run import netconf
+
+## Capability of the XPath filters
+XPATH_CAPABILITY: str="urn:ietf:params:netconf:capability:xpath:1.0"
+
+
+@pytest.fixture(params=[False, True], ids=["subtree", "xpath"])
+def filterNc(request: object) -> object:
+	"""
+		"netconf" object connected to a simulator with two route-maps, reading with subtree then XPath filters.
+	"""
+	with simulator.netconfServer(capabilities=[XPATH_CAPABILITY] if request.param else []) as server:
+		with netconf(host="127.0.0.1", username="user", password="pass", port=server.port) as nc:
+			nc.setRouteMapBGPCommunity("A", 10, "1:1")
+			nc.setRouteMap("A", 20, routeMapOperation="deny")
+			nc.setRouteMapBGPCommunity("B", 30, "2:2")
+			yield nc
+
+
+def testFieldsOfAllRouteMapsKeepKeys(filterNc: object) -> None:
+	routeMaps: dict=routemap.parseRouteMaps(filterNc.getConfig(fields=[payload.COMMUNITY_LIST]))
+
+	assert {name: sorted(sequences) for name, sequences in routeMaps.items()} == {"A": [10, 20], "B": [30]}
+	assert routeMaps["B"][30]["communities"] == ["131074"]
+
+
+def testOperationOfRouteMapKeepsKeys(filterNc: object) -> None:
+	routeMaps: dict=routemap.parseRouteMaps(filterNc.getConfig(routeMapName="A", fields=[payload.SEQUENCE_OPERATION]))
+
+	assert {number: sequence["operation"] for number, sequence in routeMaps["A"].items()} == {10: "permit", 20: "deny"}
+
+
+def testSequenceKeepsKeys(filterNc: object) -> None:
+	assert list(routemap.parseRouteMaps(filterNc.getConfig(routeMapName="A", routeMapSequence=20))) == ["A"]
+
+
+def testSimulatorLeavesOutUnselectedKeys(server: object, nc: object) -> None:
+	nc.setRouteMap("A", 10)
+	xml: str=server.model.getConfig(simulator.getXPathFilter("/ios:native/ios:route-map/ios-route-map:route-map-without-order-seq/ios-route-map:operation"))
+
+	assert "<operation>permit</operation>" in xml
+	assert "<name>" not in xml and "<seq_no>" not in xml
+
+
+@pytest.mark.parametrize("routeMapName", ["A&B <1>", "it's", 'say "hi"'])
+def testNameIsEscaped(filterNc: object, routeMapName: str) -> None:
+	filterNc.setRouteMapBGPCommunity(routeMapName, 10, "1:1")
+	filterNc.setRouteMap(routeMapName, 20, routeMapOperation="deny")
+
+	assert filterNc.getRouteMapBGPCommunity(routeMapName, 10, canonical=True) == ["1:1"]
+	assert sorted(routemap.parseRouteMaps(filterNc.getRouteMapByName(routeMapName))[routeMapName]) == [10, 20]
+	assert filterNc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["1:1"]
+
+
+def testXPathLiteral() -> None:
+	assert payload.getXPathLiteral("A") == "'A'"
+	assert payload.getXPathLiteral("it's") == '"it\'s"'
+	assert payload.getXPathLiteral('it\'s "A"') == 'concat(\'it\', "\'", \'s "A"\')'
+
+
+def testBulkPayloadsMatchSinglePayloads() -> None:
+	BGPCommunities: list=["1:1", "655370", "no-export"]
+	tree: object=etree.fromstring(payload.getCommunitiesConfig("A&B", 20, BGPCommunities, delete=True))
+
+	assert payload.getCommunityConfigs("A&B", 20, BGPCommunities) == [payload.getCommunityConfig("A&B", 20, BGPCommunity) for BGPCommunity in BGPCommunities]
+	assert tree.findtext(".//{*}name") == "A&B" and tree.findtext(".//{*}seq_no") == "20"
+	assert [(node.text, node.get("operation")) for node in tree.iterfind(".//{*}community-list")] == [(BGPCommunity, "remove") for BGPCommunity in BGPCommunities]
+	assert payload.getCommunityConfigs("A", 10, []) == []
+
+
+@pytest.mark.parametrize("routeMapName", ["{communities}", "{BGPCommunity}", "A{operation}"])
+def testBulkPayloadsWithPlaceholderName(routeMapName: str) -> None:
+	tree: object=etree.fromstring(payload.getCommunitiesConfig(routeMapName, 10, ["1:1", "2:2"]))
+
+	assert tree.findtext(".//{*}name") == routeMapName
+	assert [node.text for node in tree.iterfind(".//{*}community-list")] == ["1:1", "2:2"]
+	assert payload.getCommunityConfigs(routeMapName, 10, ["1:1", "2:2"]) == [payload.getCommunityConfig(routeMapName, 10, BGPCommunity) for BGPCommunity in ("1:1", "2:2")]
+	assert payload.getCommunitiesConfig(routeMapName) == payload.getCommunitiesConfig(routeMapName, 10, [])
+	assert payload.getCommunityConfigs(routeMapName) == []
@@ -0,0 +1,86 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Regression tests of retry.py: the writes which are not idempotent must not be sent again after a timeout.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import pytest, netmiko, retry, sshpool
+from ncclient.operations.errors import TimeoutExpiredError
+from run import ssh
+
+
+def getTimingOut(calls: list) -> object:
+	"""
+		Return a request recording its calls in the list and timing out every time.
+	"""
+
+	def request(*args: object) -> None:
+		calls.append(args)
+		raise TimeoutExpiredError("Simulated timeout")
+
+	return request
+
+
+def testTimeoutOfReadIsRetried() -> None:
+	calls: list=[]
+
+	with pytest.raises(TimeoutExpiredError):
+		retry.retryPolicy(attempts=3, baseDelay=0.0).call(getTimingOut(calls))
+	assert len(calls) == 3
+
+
+def testTimeoutOfWriteIsNotRetried() -> None:
+	calls: list=[]
+
+	with pytest.raises(TimeoutExpiredError):
+		retry.retryPolicy(attempts=3, baseDelay=0.0).call(getTimingOut(calls), idempotent=False)
+	assert len(calls) == 1
+
+
+def testTimeoutOfEditConfigIsNotRetried(nc: object) -> None:
+	calls: list=[]
+
+	with pytest.raises(TimeoutExpiredError):
+		nc.execute(getTimingOut(calls), idempotent=False)
+	assert len(calls) == 1
+
+
+def testLockDeniedOfEditConfigIsRetried(server: object, nc: object) -> None:
+	server.injectErrors("lock-denied", 1)
+	nc.setRouteMap("A", 10)
+	assert server.rpcLog.count("edit-config") == 2
+	assert "A" in nc.getRouteMapByName("A")
+
+
+def testTimeoutOfNetconfClosesSession(nc: object) -> None:
+	nc.connect()
+	with pytest.raises(TimeoutExpiredError):
+		nc.execute(getTimingOut([]), idempotent=False)
+	assert nc.manager is None
+
+
+def testTimedOutPooledSessionIsNotReused(server: object, nc: object) -> None:
+	nc.setBGPCommunityNewFormat()
+
+	def request(connection: object) -> None:
+		## The command is sent but its output is left unread in the channel
+		connection.write_channel("show running-config | include bgp-community\n")
+		raise netmiko.exceptions.ReadTimeout("Simulated timeout")
+
+	with sshpool.sshPool() as pool:
+		with ssh(host="127.0.0.1", username="user", password="pass", port=server.port, pool=pool, retryPolicy=retry.retryPolicy(attempts=2, baseDelay=0.0)) as session:
+			with pytest.raises(netmiko.exceptions.ReadTimeout):
+				session.execute(request)
+			assert session.ssh is None
+		assert pool.idle == {}
+
+		with ssh(host="127.0.0.1", username="user", password="pass", port=server.port, pool=pool) as session:
+			assert session.executeCommands(["show running-config | section route-map", "show running-config | include new-format"]) == ["", "ip bgp-community new-format"]
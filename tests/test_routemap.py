@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of routemap.py: the cached route-map table is read once and read again after its TTL or a write, and the CLI
+output is parsed into the same index as the NETCONF replies.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import time, routemap
+
+## Output of "show running-config" with the clauses the parser must handle
+RUNNING_CONFIG: str="""route-map A permit 10
+ match ip address prefix-list P
+ set community 655370 1:1 additive
+route-map A deny 20
+ip bgp-community new-format
+route-map B permit 5
+ set local-preference 200
+interface Loopback0
+ set community 2:2
+"""
+
+
+def testTableIsReadOnce(server: object, nc: object) -> None:
+	nc.setRouteMapBGPCommunity("A", 10, "1:1")
+	nc.setRouteMap("B", 20, routeMapOperation="deny")
+	server.rpcLog.clear()
+	table: object=nc.getRouteMapTable(ttl=None)
+
+	assert sorted(table.names()) == ["A", "B"] and len(table) == 2 and "A" in table and "C" not in table
+	assert table.getCommunities("A", 10) == ["65537"]
+	assert table.getSequence("B", 20)["operation"] == "deny"
+	assert table.getSequence("B", 10) is None and table.getCommunities("C") == []
+	assert nc.getRouteMapBGPCommunity("A", 10, cached=True, canonical=True) == ["1:1"]
+	assert server.rpcLog == ["get-config"]
+
+
+def testWriteInvalidatesTable(server: object, nc: object) -> None:
+	table: object=nc.getRouteMapTable(ttl=None)
+
+	assert table.names() == []
+	nc.setRouteMapBGPCommunity("A", 10, "1:1")
+	assert table.getCommunities("A", 10) == ["65537"]
+	assert server.rpcLog.count("get-config") == 2
+
+
+def testTableExpires(server: object, nc: object) -> None:
+	table: object=nc.getRouteMapTable(ttl=0.05)
+	table.names()
+	table.names()
+	time.sleep(0.1)
+	table.names()
+
+	assert server.rpcLog.count("get-config") == 2
+
+
+def testParseRunningConfig() -> None:
+	routeMaps: dict
+	newFormat: bool
+
+	routeMaps, newFormat=routemap.parseRunningConfig(RUNNING_CONFIG)
+
+	assert newFormat is True
+	assert sorted(routeMaps["A"]) == [10, 20] and list(routeMaps["B"]) == [5]
+	assert routeMaps["A"][10]["communities"] == ["655370", "1:1"]
+	assert routeMaps["A"][10]["match"] == {"ip": "address prefix-list P"}
+	assert routeMaps["A"][20] == {"operation": "deny", "set": {}, "match": {}, "communities": []}
+	assert routeMaps["B"][5]["set"] == {"local-preference": "200"} and routeMaps["B"][5]["communities"] == []
+	assert routemap.parseRouteMapConfig(RUNNING_CONFIG) == routeMaps
@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Regression tests of scheduler.py: the coalesced writes must all reach the device and every intent of a round must be
+released, even if the round is interrupted.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import pytest, payload, routemap, scheduler
+
+
+class interruptedNetconf(object):
+	"""
+		Stand-in of a "netconf" object whose locked edit is interrupted by the user.
+	"""
+
+	## Class variables
+	deadline: object=None
+
+	def editLocked(self, config: str) -> None:
+		raise KeyboardInterrupt()
+
+
+def getIntents(configs: list) -> list:
+	"""
+		Return the intents of a round, as taken by the leader.
+	"""
+
+	## Variables
+	intents: list=[scheduler.writeIntent(config) for config in configs]
+	intent: object
+
+	for intent in intents:
+		intent.state="sending"
+	return intents
+
+
+def testCoalescedWritesToSameRouteMapAllReachDevice(nc: object) -> None:
+	writes: object=scheduler.writeScheduler("simulator")
+	intents: list=getIntents([payload.getRouteMapConfig("A", 10), payload.getCommunityConfig("A", 10, "1:1"), payload.getRouteMapConfig("A", 20)])
+
+	writes.send(nc, intents)
+	assert writes.writeCount == 1
+	assert [intent.error for intent in intents] == [None, None, None]
+	assert sorted(routemap.parseRouteMaps(nc.getRouteMapByName("A"))["A"]) == [10, 20]
+	assert nc.getRouteMapBGPCommunity("A", 10, canonical=True) == ["1:1"]
+
+
+def testInterruptedRoundReleasesEveryIntent() -> None:
+	writes: object=scheduler.writeScheduler("simulator")
+	intents: list=getIntents([payload.getRouteMapConfig("A", 10), payload.getRouteMapConfig("B", 10)])
+
+	with pytest.raises(KeyboardInterrupt):
+		writes.send(interruptedNetconf(), intents)
+	assert all(intent.state == "done" and intent.event.is_set() for intent in intents)
+	assert all(isinstance(intent.error, scheduler.writeInterruptedError) for intent in intents)
+
+
+def testInterruptedLeaderHandsOver() -> None:
+	writes: object=scheduler.writeScheduler("simulator")
+
+	with pytest.raises(KeyboardInterrupt):
+		writes.submit(interruptedNetconf(), payload.getRouteMapConfig("A", 10))
+	assert not writes.writing and not writes.queue
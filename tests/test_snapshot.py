@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of snapshot.py: the state written is the state read back, at every point of the history, and a store left by
+an interrupted write is repaired.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import os, snapshot, fleet
+
+## States of a device at two points in time
+FIRST: dict={"A": {10: {"operation": "permit", "communities": ["10:10", "1:1"]}, 20: {"operation": "deny", "communities": []}}}
+SECOND: dict={"A": {10: {"operation": "permit", "communities": ["655370"]}}, "B": {30: {"operation": "permit", "communities": ["no-export"]}}}
+
+
+def testRoundTrip(tmp_path: object) -> None:
+	writer: object=snapshot.snapshotWriter(str(tmp_path))
+
+	assert writer.write("R1", FIRST, timestamp=100.0) == 2
+	assert writer.write("R1", FIRST, timestamp=150.0) == 0
+	assert writer.write("R1", SECOND, timestamp=200.0) == 3
+	reader: object=snapshot.snapshotReader(str(tmp_path))
+
+	assert len(reader) == 5
+	assert reader.getState("R1", at=100.0) == FIRST
+	assert reader.getState("R1") == {"A": {10: {"operation": "permit", "communities": ["10:10"]}}, "B": {30: {"operation": "permit", "communities": ["no-export"]}}}
+	assert reader.getState("R1", newFormat=False)["A"][10]["communities"] == ["655370"]
+	assert reader.getState("R2") == {}
+
+
+def testFindCommunityInAnyEncoding(tmp_path: object) -> None:
+	writer: object=snapshot.snapshotWriter(str(tmp_path))
+	writer.write("R1", FIRST, timestamp=100.0)
+	writer.write("R2", SECOND, timestamp=100.0)
+	writer.write("R1", {}, timestamp=200.0)
+	reader: object=snapshot.snapshotReader(str(tmp_path))
+
+	assert reader.findDevices("655370") == ["R2"]
+	assert reader.findDevices("10:10", at=100.0) == ["R1", "R2"]
+	assert reader.findRouteMaps("1:1", at=150.0) == [("R1", "A", 10)]
+	assert reader.findRouteMaps("1:1") == []
+
+
+def testReopenedWriterKeepsState(tmp_path: object) -> None:
+	snapshot.snapshotWriter(str(tmp_path)).write("R1", FIRST, timestamp=100.0)
+	writer: object=snapshot.snapshotWriter(str(tmp_path))
+
+	assert writer.write("R1", FIRST, timestamp=200.0) == 0
+	assert writer.write("R1", SECOND, timestamp=300.0) == 3
+	assert snapshot.snapshotReader(str(tmp_path)).getState("R1", at=200.0) == FIRST
+
+
+def testInterruptedWriteIsRepaired(tmp_path: object) -> None:
+	snapshot.snapshotWriter(str(tmp_path)).write("R1", FIRST, timestamp=100.0)
+
+	## A write interrupted after some of the columns
+	with open(os.path.join(str(tmp_path), "time.bin"), "ab") as columnFile:
+		columnFile.write(b"\x00" * 12)
+	with open(os.path.join(str(tmp_path), "communityValue.bin"), "ab") as columnFile:
+		columnFile.write(b"\x01\x00\x00\x00")
+	assert snapshot.snapshotReader(str(tmp_path)).getState("R1") == FIRST
+
+	writer: object=snapshot.snapshotWriter(str(tmp_path))
+	assert os.path.getsize(os.path.join(str(tmp_path), "time.bin")) == 16
+	assert writer.write("R1", SECOND, timestamp=200.0) == 3
+	assert snapshot.snapshotReader(str(tmp_path)).getState("R1", newFormat=False) == {"A": {10: {"operation": "permit", "communities": ["655370"]}}, "B": {30: {"operation": "permit", "communities": ["no-export"]}}}
+
+
+def testWriteFleet(tmp_path: object, nc: object) -> None:
+	nc.setRouteMapBGPCommunity("A", 10, "10:10")
+	nc.setRouteMap("A", 20, routeMapOperation="deny")
+	writer: object=snapshot.snapshotWriter(str(tmp_path))
+
+	with fleet.fleet([{"name": "R1", "host": "127.0.0.1", "username": "user", "password": "pass", "port": nc.port}]) as routers:
+		assert snapshot.writeFleet(writer, routers)["R1"] == {"result": 2, "error": None}
+		assert snapshot.writeFleet(writer, routers)["R1"] == {"result": 0, "error": None}
+
+	assert snapshot.snapshotReader(str(tmp_path)).getState("R1") == {"A": {10: {"operation": "permit", "communities": ["10:10"]}, 20: {"operation": "deny", "communities": []}}}
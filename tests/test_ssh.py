@@ -0,0 +1,56 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of the "ssh" class (run.py) against the CLI of the simulator, and of its agreement with the NETCONF view.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import routemap, community
+
+
+def testGetRouteMapConfig(nc: object, sshSession: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMapBGPCommunity("A", 10, "10:10")
+	nc.setRouteMap("B", 20, routeMapOperation="deny")
+
+	assert sshSession.getRouteMapConfig("A").splitlines() == ["route-map A permit 10", " set community 655370"]
+	assert "route-map B deny 20" in sshSession.getRouteMapConfig()
+
+
+def testExecuteCommandsKeepsOrder(nc: object, sshSession: object) -> None:
+	nc.setBGPCommunityNewFormat()
+	outputs: list=sshSession.executeCommands(["show running-config | include bgp-community", "show version", "show running-config | include new-format"])
+
+	assert outputs == ["ip bgp-community new-format", "% Invalid input detected at '^' marker.", "ip bgp-community new-format"]
+	assert sshSession.executeCommands([]) == []
+
+
+def testGetRouteMapsMatchesNetconf(nc: object, sshSession: object) -> None:
+	nc.setRouteMap("A", 10)
+	nc.setRouteMapBGPCommunity("A", 10, "1:1")
+	nc.setRouteMapBGPCommunity("A", 10, "10:10")
+	nc.setRouteMap("A2", 20, routeMapOperation="deny")
+
+	## The "section" filter is a regex, "A" also matches "A2" but only "A" is returned
+	routeMaps, newFormat=sshSession.getRouteMaps(["A"])
+	assert list(routeMaps) == ["A"] and newFormat is False
+	assert community.canonicalCommunities(routeMaps["A"][10]["communities"]) == nc.getRouteMapBGPCommunity("A", 10, canonical=True)
+
+	routeMaps, newFormat=sshSession.getRouteMaps(newFormat=False)
+	assert sorted(routeMaps) == ["A", "A2"] and newFormat is None
+	assert routeMaps["A2"][20]["operation"] == "deny"
+
+
+def testEncodingBugShowsOneCommunityInCli(bugNc: object, bugSshSession: object) -> None:
+	bugNc.setRouteMapBGPCommunity("A", 10, "655370")
+	bugNc.setRouteMapBGPCommunity("A", 10, "10:10")
+
+	assert bugNc.getRouteMapBGPCommunity("A", 10) == ["655370", "10:10"]
+	assert routemap.parseRouteMapConfig(bugSshSession.getRouteMapConfig("A"))["A"][10]["communities"] == ["655370"]
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of sshpool.py: the sessions given back are reused by the next "ssh" objects of the device, and the idle, extra
+or dead sessions are closed.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import socket, time, pytest, retry, sshpool
+from run import ssh
+
+
+def testSessionIsReused(server: object) -> None:
+	with sshpool.sshPool() as pool:
+		for routeMapName in ("A", "B", "C"):
+			with ssh(host="127.0.0.1", username="user", password="pass", port=server.port, pool=pool) as session:
+				assert session.getRouteMapConfig(routeMapName) == ""
+
+		## Another user does not share the sessions
+		with ssh(host="127.0.0.1", username="other", password="pass", port=server.port, pool=pool) as session:
+			session.getRouteMapConfig()
+		assert server.sessionCount == 2
+		assert len(pool.idle) == 2
+
+
+def testIdleSessionIsEvicted(server: object) -> None:
+	with sshpool.sshPool(idleTimeout=0.05) as pool:
+		connection: object=pool.acquire("127.0.0.1", "user", "pass", server.port)
+		pool.release(connection)
+		time.sleep(0.1)
+		pool.evict()
+
+		assert pool.idle == {} and pool.keys == {}
+		assert not connection.is_alive()
+		pool.release(pool.acquire("127.0.0.1", "user", "pass", server.port))
+		assert server.sessionCount == 2
+
+
+def testExtraSessionIsClosed(server: object) -> None:
+	with sshpool.sshPool(maxIdle=1) as pool:
+		first: object=pool.acquire("127.0.0.1", "user", "pass", server.port)
+		second: object=pool.acquire("127.0.0.1", "user", "pass", server.port)
+		pool.release(first)
+		pool.release(second)
+
+		assert not first.is_alive() and second.is_alive()
+		first=pool.acquire("127.0.0.1", "user", "pass", server.port)
+		pool.release(first)
+		assert first is second
+
+
+def testDeadSessionIsReplaced(server: object) -> None:
+	with sshpool.sshPool() as pool:
+		connection: object=pool.acquire("127.0.0.1", "user", "pass", server.port)
+		pool.release(connection)
+		sshpool.disconnect(connection)
+
+		replacement: object=pool.acquire("127.0.0.1", "user", "pass", server.port)
+		pool.release(replacement)
+		assert replacement is not connection and replacement.is_alive()
+		assert id(connection) not in pool.keys
+
+
+def testForeignSessionIsClosed(server: object) -> None:
+	connection: object=sshpool.connect("127.0.0.1", "user", "pass", server.port)
+
+	with sshpool.sshPool() as pool:
+		pool.release(connection)
+		assert pool.idle == {}
+	assert not connection.is_alive()
+
+
+def testConnectIsBoundedByDeadline() -> None:
+	listener: object=socket.socket()
+	listener.bind(("127.0.0.1", 0))
+	listener.listen(1)
+
+	## The TCP connection is accepted but the SSH banner never comes
+	try:
+		session: object=ssh(host="127.0.0.1", username="user", password="pass", port=listener.getsockname()[1], retryPolicy=retry.retryPolicy(attempts=1))
+		session.setDeadline(0.5)
+		start: float=time.monotonic()
+		with pytest.raises(Exception) as error:
+			session.getRouteMapConfig()
+		assert not isinstance(error.value, AttributeError)
+		assert time.monotonic() - start < 5.0
+	finally:
+		listener.close()
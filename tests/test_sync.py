@@ -0,0 +1,40 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Regression tests of sync.py: after a sync, the device must hold each desired community once, in both views.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import sync, drift
+
+
+def testDuplicateOfDesiredCommunityIsRemoved() -> None:
+	current: dict={"A": {10: {"operation": "permit", "communities": ["655370", "10:10", "1:1"]}}}
+	changes: list=sync.diffRouteMaps(current, {"A": {10: {"communities": ["10:10", "1:1"]}}})
+
+	assert [(change["type"], change["communities"]) for change in changes] == [("remove-duplicates", ["655370", "10:10"]), ("add-communities", ["10:10"])]
+
+
+def testDuplicateListedByDesiredStateIsKept() -> None:
+	current: dict={"A": {10: {"operation": "permit", "communities": ["655370", "10:10"]}}}
+
+	assert sync.diffRouteMaps(current, {"A": {10: {"communities": ["655370", "10:10"]}}}) == []
+
+
+def testSyncRemovesEquivalentEncodings(bugNc: object, bugSshSession: object) -> None:
+	bugNc.setRouteMap("A", 10)
+	for BGPCommunity in ("655370", "10:10", "1:1"):
+		bugNc.setRouteMapBGPCommunity("A", 10, BGPCommunity)
+	assert bugNc.getRouteMapBGPCommunity("A", 10) == ["655370", "10:10", "1:1"]
+
+	bugNc.syncRouteMap({"A": {10: {"communities": ["10:10", "1:1"]}}})
+	assert sorted(bugNc.getRouteMapBGPCommunity("A", 10)) == ["10:10", "1:1"]
+	assert drift.detectDrift(bugNc, bugSshSession, "A") == []
+	assert bugNc.syncRouteMap({"A": {10: {"communities": ["10:10", "1:1"]}}}) == []
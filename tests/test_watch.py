@@ -0,0 +1,98 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of watch.py: the local copy follows the changes of the simulator, through the notifications or by polling.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import queue, pytest, simulator, watch
+from lxml import etree
+from run import netconf
+
+## Capability of the notifications
+NOTIFICATION_CAPABILITY: str="urn:ietf:params:netconf:capability:notification:1.0"
+
+## Seconds given to the watcher to see a change
+TIMEOUT: float=5.0
+
+
+def getNotification(datastore: str, targets: list) -> object:
+	"""
+		Return a netconf-config-change notification with an <edit> per target, without <edit> if targets is None.
+	"""
+	return etree.fromstring("""<notification xmlns="urn:ietf:params:xml:ns:netconf:notification:1.0"><netconf-config-change xmlns="{}"><datastore>{}</datastore>{}</netconf-config-change></notification>""".format(
+		watch.CONFIG_CHANGE_NAMESPACE,
+		datastore,
+		"".join("<edit><target>{}</target></edit>".format(target) for target in targets or []),
+	))
+
+
+def getWatcher(port: int, changes: object, **kwargs: object) -> object:
+	"""
+		Return a watcher of the simulator putting the changes in the queue.
+	"""
+	return watch.routeMapWatcher(host="127.0.0.1", username="user", password="pass", port=port, callback=changes.put, **kwargs)
+
+
+@pytest.mark.parametrize("datastore, targets, expected", [
+	("running", ["/ios:native/ios:route-map[ios:name='A']", '/ios:native/ios:route-map[ios:name="B"]/ios-route-map:route-map-without-order-seq'], ({"A", "B"}, False, False)),
+	("running", ["/ios:native/ios:ip/ios:bgp-community/ios:new-format"], (set(), True, False)),
+	("running", ["/ios:native"], (set(), False, True)),
+	("running", ["/ios:native/ios:interface"], (set(), False, False)),
+	("running", None, (set(), False, True)),
+	("candidate", ["/ios:native"], (set(), False, False)),
+])
+def testChangedNodes(datastore: str, targets: list, expected: tuple) -> None:
+	assert watch.getChangedNodes(getNotification(datastore, targets)) == expected
+
+
+def testNotificationReadsChangedRouteMap() -> None:
+	changes: object=queue.Queue()
+
+	with simulator.netconfServer(capabilities=[NOTIFICATION_CAPABILITY]) as server:
+		with netconf(host="127.0.0.1", username="user", password="pass", port=server.port) as writer:
+			writer.setRouteMapBGPCommunity("A", 10, "1:1")
+			with getWatcher(server.port, changes) as watcher:
+				assert watcher.mode == "notification"
+				assert watcher.getCommunities("A", 10) == ["65537"]
+				server.rpcLog.clear()
+
+				writer.setRouteMapBGPCommunity("B", 20, "2:2")
+				assert [(change["routeMapName"], change["type"]) for change in changes.get(timeout=TIMEOUT)] == [("B", "create-sequence"), ("B", "add-communities")]
+				assert watcher.getCommunities("B", 20) == ["131074"]
+				assert watcher.getCommunities("A", 10) == ["65537"]
+				assert server.rpcLog == ["edit-config", "get-config"]
+
+
+def testPollingSeesNewFormat(server: object, nc: object) -> None:
+	changes: object=queue.Queue()
+
+	with getWatcher(server.port, changes, interval=0.05, maxInterval=0.1) as watcher:
+		assert watcher.mode == "polling"
+		assert watcher.getNewFormat() is False
+
+		nc.setBGPCommunityNewFormat()
+		assert changes.get(timeout=TIMEOUT) == [{"routeMapName": None, "routeMapSequence": None, "type": "new-format", "newFormat": True}]
+		assert watcher.getNewFormat() is True
+
+
+def testPollingBackoff(server: object, nc: object) -> None:
+	changes: object=queue.Queue()
+	watcher: object=getWatcher(server.port, changes, interval=0.01, maxInterval=0.03, backoff=2.0)
+
+	try:
+		watcher.refresh()
+		assert watcher.poll(0.01) == 0.02
+		assert watcher.poll(0.02) == 0.03
+		nc.setRouteMap("A", 10)
+		assert watcher.poll(0.03) == 0.01
+		assert [change["type"] for change in changes.get_nowait()] == ["create-sequence"]
+	finally:
+		watcher.stop()
@@ -0,0 +1,92 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Tests of xmlstream.py: the replies parsed by small chunks give the same route-maps as a parse of the whole document,
+and the parsing stops once the node looked for is found.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import io, pytest, xmlstream, simulator
+from lxml import etree
+
+## Reply with a route-map of a BGP neighbor, which is not a route-map of the table
+NEIGHBOR_REPLY: str="""<data xmlns="urn:ietf:params:xml:ns:netconf:base:1.0"><native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
+<route-map><name>A</name><route-map-without-order-seq xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-route-map"><seq_no>10</seq_no><operation>deny</operation></route-map-without-order-seq></route-map>
+<router><bgp><neighbor><route-map><name>IN</name><inout>in</inout></route-map></neighbor></bgp></router>
+<ip><bgp-community><new-format/></bgp-community></ip>
+</native></data>"""
+
+
+class readCounter(io.StringIO):
+	"""
+		File object counting the characters read.
+	"""
+
+	## Class variables
+	count: int=0
+
+	def read(self, size: int=-1) -> str:
+		chunk: str=super().read(size)
+		self.count+=len(chunk)
+		return chunk
+
+
+def getExpected(xml: str) -> dict:
+	"""
+		Return the sequence numbers, operations and communities of a reply parsed as a whole.
+	"""
+
+	## Variables
+	tree: object=etree.fromstring(xml.encode())
+
+	return {
+		routeMap.findtext("{*}name"): {int(sequence.findtext("{*}seq_no")): (sequence.findtext("{*}operation"), [node.text for node in sequence.iterfind(".//{*}community-list")]) for sequence in routeMap.iterfind("{*}route-map-without-order-seq")}
+		for routeMap in tree.iterfind("{*}native/{*}route-map")
+	}
+
+
+@pytest.fixture
+def generatedReply() -> str:
+	"""
+		<get-config> reply of a generated route-map table.
+	"""
+	return simulator.deviceModel().generate(routeMaps=50, sequences=4, communities=3).getConfig()
+
+
+@pytest.mark.parametrize("chunkSize", [7, 64, 1 << 20])
+def testChunksMatchWholeParse(monkeypatch: object, generatedReply: str, chunkSize: int) -> None:
+	monkeypatch.setattr(xmlstream, "CHUNK_SIZE", chunkSize)
+	routeMaps: dict={name: {number: (sequence["operation"], sequence["communities"]) for number, sequence in sequences.items()} for name, sequences in xmlstream.iterRouteMaps(generatedReply)}
+
+	assert routeMaps == getExpected(generatedReply)
+	assert routeMaps == {name: {number: (sequence["operation"], sequence["communities"]) for number, sequence in sequences.items()} for name, sequences in xmlstream.iterRouteMaps(io.BytesIO(generatedReply.encode()))}
+
+
+def testNeighborRouteMapIsIgnored() -> None:
+	routeMaps: dict=dict(xmlstream.iterRouteMaps(NEIGHBOR_REPLY))
+
+	assert list(routeMaps) == ["A"]
+	assert routeMaps["A"][10]["operation"] == "deny" and routeMaps["A"][10]["communities"] == []
+
+
+def testGetCommunitiesStopsAtRouteMap(monkeypatch: object, generatedReply: str) -> None:
+	monkeypatch.setattr(xmlstream, "CHUNK_SIZE", 256)
+	source: object=readCounter(generatedReply)
+
+	assert xmlstream.getCommunities(source, "RM_000001", 20) == getExpected(generatedReply)["RM_000001"][20][1]
+	assert source.count < len(generatedReply) // 2
+	assert xmlstream.getCommunities(generatedReply, "RM_000001", 15) == []
+	assert xmlstream.getCommunities(generatedReply, "UNKNOWN") == []
+
+
+def testHasNode() -> None:
+	assert xmlstream.hasNode(NEIGHBOR_REPLY, "new-format") is True
+	assert xmlstream.hasNode(NEIGHBOR_REPLY.encode(), "inout") is True
+	assert xmlstream.hasNode(io.StringIO(NEIGHBOR_REPLY), "community-list") is False
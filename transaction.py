@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Commit a sequence of writes on the candidate datastore at once.
+
+When the host supports ":candidate", the writes done inside the transaction stay in the candidate datastore and are
+committed once at the end, optionally as a confirmed commit. When it does not, the writes go to the running
+datastore as they always did.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+class configTransaction(object):
+	"""
+		Context manager committing the writes of a "netconf" object at the end of the "with" block.
+
+		Usage:
+			with nc.transaction(confirmTimeout=120):
+				nc.setRouteMap(...)
+				nc.setRouteMapBGPCommunity(...)
+			nc.confirm()
+	"""
+
+	## Class variables
+	netconf: object
+	confirmTimeout: int
+	outer: bool
+
+	def __init__(self, netconf: object, confirmTimeout: int=None) -> object:
+		"""
+			Constructor that return an instantiation of the object.
+
+			Arguments:
+				netconf(object)       => The "netconf" object.
+				confirmTimeout(int)   => Seconds before the rollback of the commit if it is not confirmed (Default = None)
+
+			Returns:
+				object
+		"""
+		self.netconf=netconf
+		self.confirmTimeout=confirmTimeout
+		self.outer=False
+
+
+	def __enter__(self) -> object:
+		## A nested transaction is part of the outer transaction
+		if not self.netconf.inTransaction:
+			self.netconf.inTransaction=True
+			self.outer=True
+		return self
+
+
+	def __exit__(self, exceptionType: object, *args: object) -> None:
+		if not self.outer:
+			return None
+
+		self.netconf.inTransaction=False
+
+		## Nothing to commit or discard if the writes went to running
+		if self.netconf.getTarget() != "candidate":
+			return None
+
+		## Commit the changes if the block succeeded, otherwise discard them
+		if exceptionType is None:
+			self.netconf.commit(confirmTimeout=self.confirmTimeout)
+		else:
+			self.netconf.discard()
+
+		## End the function
+		return None
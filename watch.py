@@ -0,0 +1,509 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Watch the route-maps and the "ip bgp-community new-format" of a device and keep a local copy of them up to date.
+
+When the device advertises ":notification", the watcher subscribes to the NETCONF event stream (RFC 5277) on a
+dedicated session and waits for the netconf-config-change events (RFC 6470): only the route-map or the node named by
+the event is read again, so a change is seen a few milliseconds after its commit and nothing is sent while the
+configuration does not change. Otherwise the watcher polls the configuration, the interval grows after every poll
+without change (up to maxInterval) and goes back to its minimum as soon as something changed.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+import re, time, threading, routemap, xmlstream, sync
+from run import netconf
+
+## Namespace of the netconf-config-change event (RFC 6470)
+CONFIG_CHANGE_NAMESPACE: str="urn:ietf:params:xml:ns:yang:ietf-netconf-notifications"
+
+## Subscription filter keeping only the configuration changes
+CONFIG_CHANGE_FILTER: str='<netconf-config-change xmlns="{}"/>'.format(CONFIG_CHANGE_NAMESPACE)
+
+## Route-map named by the target of an <edit>, ex: /ios:native/ios:route-map[ios:name='RM']
+ROUTE_MAP_TARGET: object=re.compile(r"/(?:[\w-]+:)?route-map\[(?:[\w-]+:)?name=(['\"])(.*?)\1\]")
+
+## Watched nodes, without prefix, a change of one of their ancestors needs a full read
+WATCHED_PATHS: tuple=("/native/route-map/", "/native/ip/bgp-community/")
+
+## Seconds between two checks of the stop request while waiting for a notification
+WAKEUP_INTERVAL: float=0.2
+
+
+def getChangedNodes(notification: object) -> tuple:
+	"""
+		Return what a notification changed in the watched configuration.
+
+		Arguments:
+			notification(object)  => The <notification> element.
+
+		Returns:
+			tuple => (routeMapNames(set), newFormat(bool), everything(bool)), everything is True if the change cannot be
+			         narrowed down (no <edit> or unknown target)
+	"""
+
+	## Variables
+	routeMapNames: set=set()
+	newFormat: bool=False
+	everything: bool=False
+	change: object
+	edit: object
+	target: str
+	match: object
+	path: str
+
+	for change in notification.iter("{%s}netconf-config-change" % CONFIG_CHANGE_NAMESPACE):
+		## Only the running datastore is watched
+		if change.findtext("{*}datastore", "running") != "running":
+			continue
+
+		if change.find("{*}edit") is None:
+			everything=True
+		for edit in change.iterfind("{*}edit"):
+			target=edit.findtext("{*}target", "")
+			match=ROUTE_MAP_TARGET.search(target)
+			if match:
+				routeMapNames.add(match.group(2))
+				continue
+			if "bgp-community" in target:
+				newFormat=True
+				continue
+
+			## The change covers the whole table or the whole native tree
+			path=re.sub(r"[\w-]+:", "", re.sub(r"\[.*?\]", "", target)).rstrip("/") + "/"
+			if any(watched.startswith(path) for watched in WATCHED_PATHS):
+				everything=True
+
+	return routeMapNames, newFormat, everything
+
+
+class routeMapWatcher(object):
+	"""
+		Local copy of the route-maps and of the new-format of a device, updated by the notifications or by polling.
+	"""
+
+	## Class variables
+	netconf: object
+	subscription: object
+	callbacks: list
+	interval: float
+	maxInterval: float
+	backoff: float
+	notifications: bool
+	mode: str
+	routeMaps: dict
+	newFormat: bool
+	loaded: bool
+	lastChange: float
+	error: object
+	lock: object
+	wakeup: object
+	stopped: object
+	thread: object
+
+	def __init__(self, host: str, username: str, password: str, port: int=830, keepalive: int=30, callback: object=None, interval: float=1.0, maxInterval: float=60.0, backoff: float=2.0, notifications: bool=True, instrumentation: object=None, capabilityCache: object=None) -> object:
+		"""
+			Constructor that return an instantiation of the object. Nothing is read before start().
+
+			Arguments:
+				host(str)                => FQDN or IP address of the NETCONF host.
+				username(str)            => Username for the NETCONF host.
+				password(str)            => Password for the NETCONF host.
+				port(int)                => Port for the Netconf host (Default = 830)
+				keepalive(int)           => Interval in seconds between SSH keepalive packets, 0 to disable (Default = 30)
+				callback(object)         => Function receiving the list of changes (see getChanges), None for none (Default = None)
+				interval(float)          => Minimum seconds between two polls, and between two attempts after an error (Default = 1.0)
+				maxInterval(float)       => Maximum seconds between two polls once the configuration is stable (Default = 60.0)
+				backoff(float)           => Factor applied to the interval after a poll without change (Default = 2.0)
+				notifications(bool)      => If it is False, the configuration is polled even if the host supports the notifications (Default = True)
+				instrumentation(object)  => "instrument.instrumentation" object receiving the timings and the counters (Default = None)
+				capabilityCache(object)  => "capabilities.capabilityCache" object used to know the capabilities of the host (Default = None)
+
+			Returns:
+				object
+		"""
+		self.netconf=netconf(host=host, username=username, password=password, port=port, keepalive=keepalive, instrumentation=instrumentation, capabilityCache=capabilityCache)
+		self.subscription=netconf(host=host, username=username, password=password, port=port, keepalive=keepalive, instrumentation=instrumentation)
+		self.callbacks=[callback] if callback is not None else []
+		self.interval=interval
+		self.maxInterval=maxInterval
+		self.backoff=backoff
+		self.notifications=notifications
+		self.mode=None
+		self.routeMaps={}
+		self.newFormat=None
+		self.loaded=False
+		self.lastChange=None
+		self.error=None
+		self.lock=threading.Lock()
+		self.wakeup=threading.Event()
+		self.stopped=threading.Event()
+		self.thread=None
+
+
+	def __enter__(self) -> object:
+		return self.start()
+
+
+	def __exit__(self, *args: object) -> None:
+		self.stop()
+
+
+	def addCallback(self, callback: object) -> object:
+		"""
+			Add a function receiving the list of changes and return it. The functions are called by the thread of the
+			watcher.
+
+			Arguments:
+				callback(object)  => The function.
+
+			Returns:
+				object
+		"""
+		self.callbacks.append(callback)
+		return callback
+
+
+	def start(self) -> object:
+		"""
+			Read the configuration, subscribe to the notifications if the host supports them, then start to watch in
+			a background thread.
+
+			Arguments:
+				None
+
+			Returns:
+				object
+		"""
+
+		## Subscribe before the first read, so no change is missed between both
+		if self.notifications and self.netconf.supports(":notification"):
+			self.subscribe()
+			self.mode="notification"
+		else:
+			self.mode="polling"
+
+		self.refresh()
+		self.stopped.clear()
+		self.thread=threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+		return self
+
+
+	def stop(self) -> None:
+		"""
+			Stop the watcher and close its sessions.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		self.stopped.set()
+		self.wakeup.set()
+		if self.thread is not None:
+			self.thread.join()
+			self.thread=None
+		self.subscription.close()
+		self.netconf.close()
+		return None
+
+
+	def trigger(self) -> None:
+		"""
+			Read the whole configuration again as soon as possible, ex: after a write done by another object. In
+			polling mode, the interval goes back to its minimum.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		self.wakeup.set()
+		return None
+
+
+	def subscribe(self) -> None:
+		"""
+			Open the session dedicated to the notifications and subscribe to the configuration changes. The session
+			does not send any other RPC.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+		self.subscription.close()
+		self.subscription.execute(lambda manager: manager.create_subscription(filter=("subtree", CONFIG_CHANGE_FILTER)))
+		return None
+
+
+	def refresh(self, routeMapNames: set=None, newFormat: bool=False) -> list:
+		"""
+			Read the configuration from the device and update the local copy. A single route-map or the new-format
+			alone are read with their own filter, anything else with a single read of both.
+
+			Arguments:
+				routeMapNames(set)  => Names of the route-maps to read, None to read everything (Default = None)
+				newFormat(bool)     => If it is True, the new-format is read too (Default = False)
+
+			Returns:
+				list => The changes (see getChanges)
+		"""
+
+		## Variables
+		xml: str
+		routeMaps: dict={}
+		currentFormat: bool=None
+
+		if routeMapNames is None or len(routeMapNames) > 1 or (routeMapNames and newFormat):
+			xml=self.netconf.getConfig(newFormat=True)
+			with self.netconf.instrumentation.span("netconf.parse", host=self.netconf.host):
+				routeMaps=routemap.parseRouteMaps(xml)
+				currentFormat=xmlstream.hasNode(xml, "new-format")
+			return self.apply(routeMaps, currentFormat, None)
+
+		if routeMapNames:
+			routeMaps=routemap.parseRouteMaps(self.netconf.getRouteMapByName(list(routeMapNames)[0]))
+		if newFormat:
+			currentFormat=self.netconf.getBGPCommunityNewFormat()
+		return self.apply(routeMaps, currentFormat, routeMapNames)
+
+
+	def getChanges(self, routeMaps: dict, newFormat: bool, routeMapNames: set=None) -> list:
+		"""
+			Return the differences between the local copy and a new read of the configuration.
+
+			Arguments:
+				routeMaps(dict)     => Route-maps read (see routemap.parseRouteMaps)
+				newFormat(bool)     => New-format read, None if it was not read.
+				routeMapNames(set)  => Names of the route-maps read, None if the whole table was read (Default = None)
+
+			Returns:
+				list => The changes of sync.diffRouteMaps() going from the old to the new configuration, and
+				        {"type": "new-format", "newFormat": bool} if the new-format changed
+		"""
+
+		## Variables
+		names: set=set(routeMapNames) if routeMapNames is not None else set(self.routeMaps) | set(routeMaps)
+		changes: list=sync.diffRouteMaps({name: self.routeMaps.get(name, {}) for name in names}, {name: routeMaps.get(name, {}) for name in names})
+
+		if newFormat is not None and newFormat != self.newFormat:
+			changes.append({"routeMapName": None, "routeMapSequence": None, "type": "new-format", "newFormat": newFormat})
+		return changes
+
+
+	def apply(self, routeMaps: dict, newFormat: bool, routeMapNames: set=None) -> list:
+		"""
+			Update the local copy with a new read of the configuration and call the callbacks if it changed. The
+			first read only fills the local copy.
+
+			Arguments:
+				routeMaps(dict)     => Route-maps read (see routemap.parseRouteMaps)
+				newFormat(bool)     => New-format read, None if it was not read.
+				routeMapNames(set)  => Names of the route-maps read, None if the whole table was read (Default = None)
+
+			Returns:
+				list => The changes (see getChanges)
+		"""
+
+		## Variables
+		changes: list
+		name: str
+		callback: object
+
+		with self.lock:
+			changes=self.getChanges(routeMaps, newFormat, routeMapNames)
+			if routeMapNames is None:
+				self.routeMaps=dict(routeMaps)
+			for name in routeMapNames or []:
+				if routeMaps.get(name):
+					self.routeMaps[name]=routeMaps[name]
+				else:
+					self.routeMaps.pop(name, None)
+			if newFormat is not None:
+				self.newFormat=newFormat
+
+		if not self.loaded:
+			self.loaded=True
+			return []
+
+		if changes:
+			self.lastChange=time.time()
+			for callback in self.callbacks:
+				callback(changes)
+		return changes
+
+
+	def run(self) -> None:
+		"""
+			Watch the configuration until stop() is called. After an error (ex: the device is unreachable), the
+			sessions are reopened and the whole configuration is read again, since changes may have been missed.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		delay: float=self.interval
+		resync: bool=False
+
+		while not self.stopped.is_set():
+			try:
+				if resync:
+					if self.mode == "notification":
+						self.subscribe()
+					self.refresh()
+					resync=False
+					self.error=None
+					delay=self.interval
+
+				if self.mode == "notification":
+					self.waitNotifications()
+				else:
+					delay=self.poll(delay)
+			except Exception as error:
+				## Wait before the next attempt, longer after each failure
+				self.error=error
+				self.subscription.close()
+				self.netconf.close()
+				resync=True
+				self.stopped.wait(delay)
+				delay=min(delay * self.backoff, self.maxInterval)
+
+		## End the function
+		return None
+
+
+	def waitNotifications(self) -> None:
+		"""
+			Wait for the next notifications and read again what they changed. The notifications already received
+			are processed together, so a burst of changes costs a single read.
+
+			Arguments:
+				None
+
+			Returns:
+				None
+		"""
+
+		## Variables
+		manager: object=self.subscription.manager
+		notification: object
+		routeMapNames: set=set()
+		newFormat: bool=False
+		everything: bool=False
+		names: set
+		changed: bool
+		unknown: bool
+
+		## Explicit request for a full read
+		if self.wakeup.is_set():
+			self.wakeup.clear()
+			if not self.stopped.is_set():
+				self.refresh()
+			return None
+
+		if manager is None or not manager.connected:
+			raise ConnectionError("The notification session to {} has been closed".format(self.netconf.host))
+
+		notification=manager.take_notification(block=True, timeout=WAKEUP_INTERVAL)
+		while notification is not None:
+			names, changed, unknown=getChangedNodes(notification.notification_ele)
+			routeMapNames|=names
+			newFormat=newFormat or changed
+			everything=everything or unknown
+			notification=manager.take_notification(block=False)
+
+		if everything:
+			self.refresh()
+		elif routeMapNames or newFormat:
+			self.refresh(routeMapNames, newFormat)
+		return None
+
+
+	def poll(self, delay: float) -> float:
+		"""
+			Wait for the delay (or for trigger()), read the configuration and return the delay before the next poll.
+
+			Arguments:
+				delay(float)  => Seconds to wait before the poll.
+
+			Returns:
+				float
+		"""
+
+		## Variables
+		triggered: bool=self.wakeup.wait(delay)
+
+		self.wakeup.clear()
+		if self.stopped.is_set():
+			return delay
+
+		## The interval goes back to its minimum after a change or a trigger, otherwise it grows
+		if self.refresh() or triggered:
+			return self.interval
+		return min(delay * self.backoff, self.maxInterval)
+
+
+	def getRouteMaps(self) -> dict:
+		"""
+			Return the local copy of the route-maps, without any request to the device.
+
+			Arguments:
+				None
+
+			Returns:
+				dict => {routeMapName: {seq_no: {"operation": str, "set": dict, "match": dict, "communities": list}}}
+		"""
+		with self.lock:
+			return dict(self.routeMaps)
+
+
+	def getCommunities(self, routeMapName: str, routeMapSequence: int=10) -> list:
+		"""
+			Return the BGP communities set by a sequence of a route-map, from the local copy.
+
+			Arguments:
+				routeMapName(str)      => Name of the route-map.
+				routeMapSequence(int)  => Sequence number (Default = 10)
+
+			Returns:
+				list
+		"""
+
+		## Variables
+		sequence: dict
+
+		with self.lock:
+			sequence=self.routeMaps.get(routeMapName, {}).get(int(routeMapSequence))
+			if sequence is None:
+				return []
+			return list(sequence["communities"])
+
+
+	def getNewFormat(self) -> bool:
+		"""
+			Return True if "ip bgp-community new-format" is configured, from the local copy.
+
+			Arguments:
+				None
+
+			Returns:
+				bool
+		"""
+		with self.lock:
+			return bool(self.newFormat)
@@ -0,0 +1,243 @@
+#!/usr/bin/python
+# -*-coding:Utf-8 -*
+"""
+Incremental parsing of the <get-config> replies.
+
+The reply is fed to the parser by chunks and only the nodes needed by the caller (route-map sequences, community
+values, presence of a node) are extracted. Every node is dropped from the tree once it has been processed, so the
+memory used by the parser does not grow with the size of the running configuration.
+"""
+
+## Global Variables
+__author__       = "Maxim Deschenes"
+__author_email__ = "maxim.deschenes@outlook.com"
+__copyright__    = "Copyright (c) 2020 Maxim Deschenes"
+__license__      = "BSD-3-Clause (https://opensource.org/licenses/BSD-3-Clause)"
+
+
+## Import librairies
+from lxml import etree
+
+## Size of the chunks fed to the parser
+CHUNK_SIZE: int=1 << 20
+
+
+def getName(element: object) -> str:
+	"""
+		Return the name of a node without its namespace.
+
+		Arguments:
+			element(object)  => The lxml element.
+
+		Returns:
+			str
+	"""
+	return element.tag.rpartition("}")[2]
+
+
+def iterChunks(source: object) -> object:
+	"""
+		Yield the source by chunks.
+
+		Arguments:
+			source(object)  => The XML as str, bytes or file object.
+
+		Returns:
+			generator => str or bytes
+	"""
+
+	## Variables
+	chunk: object
+	offset: int
+
+	if hasattr(source, "read"):
+		chunk=source.read(CHUNK_SIZE)
+		while chunk:
+			yield chunk
+			chunk=source.read(CHUNK_SIZE)
+	else:
+		for offset in range(0, len(source), CHUNK_SIZE):
+			yield source[offset:offset + CHUNK_SIZE]
+
+
+def iterEvents(source: object, events: tuple=("end",), tag: object=None) -> object:
+	"""
+		Feed the source to a pull parser by chunks and yield the parser events.
+
+		Arguments:
+			source(object)  => The XML as str, bytes or file object.
+			events(tuple)   => The lxml events to yield (Default = ("end",))
+			tag(object)     => Tag or list of tags to report, the other nodes are skipped by lxml (Default = None)
+
+		Returns:
+			generator => (event, element)
+	"""
+
+	## Variables
+	parser: object=etree.XMLPullParser(events=events, tag=tag)
+	chunk: object
+
+	for chunk in iterChunks(source):
+		parser.feed(chunk)
+		yield from parser.read_events()
+
+	parser.close()
+	yield from parser.read_events()
+
+
+def dropProcessed(element: object) -> None:
+	"""
+		Remove the complete children of a node which is still being parsed, except the <name> leaves which are the
+		keys of the lists. Only the last child can still be incomplete, it is cleaned recursively until a route-map
+		sequence, which is kept whole until it is processed.
+
+		Arguments:
+			element(object)  => The lxml element being parsed.
+
+		Returns:
+			None
+	"""
+
+	## Variables
+	child: object
+
+	while element is not None and len(element) and getName(element) != "route-map-without-order-seq":
+		for child in element[:-1]:
+			if getName(child) != "name":
+				element.remove(child)
+		element=element[-1]
+
+	## End the function
+	return None
+
+
+def toDict(element: object) -> object:
+	"""
+		Convert a node to a dict (the text for a leaf, a list for the repeated children).
+
+		Arguments:
+			element(object)  => The lxml element.
+
+		Returns:
+			object
+	"""
+
+	## Variables
+	result: dict={}
+	child: object
+	name: str
+	value: object
+
+	if len(element) == 0:
+		return element.text
+
+	for child in element:
+		name=getName(child)
+		value=toDict(child)
+		if name not in result:
+			result[name]=value
+		elif type(result[name]) is list:
+			result[name].append(value)
+		else:
+			result[name]=[result[name], value]
+
+	return result
+
+
+def iterRouteMaps(source: object) -> object:
+	"""
+		Yield the route-maps of a <get-config> reply one by one.
+
+		Arguments:
+			source(object)  => The XML as str, bytes or file object.
+
+		Returns:
+			generator => (routeMapName, {seq_no: {"operation": str, "set": dict, "match": dict, "communities": list}})
+	"""
+
+	## Variables
+	parser: object=etree.XMLPullParser(events=("start", "end"), tag=("{*}native", "{*}route-map", "{*}route-map-without-order-seq"))
+	sequences: dict={}
+	native: object=None
+	chunk: object
+	event: str
+	element: object
+	parent: object
+	name: str
+
+	for chunk in iterChunks(source):
+		parser.feed(chunk)
+		for event, element in parser.read_events():
+			name=getName(element)
+
+			if event == "start":
+				## Only the start of <native> is needed, to clean it while parsing
+				if name == "native":
+					native=element
+			elif name == "route-map-without-order-seq":
+				## The sequence is complete, index it
+				sequences[int(element.findtext("{*}seq_no"))]={
+					"operation": element.findtext("{*}operation"),
+					"set": toDict(element.find("{*}set")) if element.find("{*}set") is not None else {},
+					"match": toDict(element.find("{*}match")) if element.find("{*}match") is not None else {},
+					"communities": [community.text for community in element.iterfind("{*}set/{*}community/{*}community-well-known/{*}community-list")],
+				}
+			elif name == "route-map":
+				## The route-map is complete, return it (the route-map of the BGP neighbors are ignored)
+				parent=element.getparent()
+				if parent is not None and getName(parent) == "native":
+					yield element.findtext("{*}name"), sequences
+				sequences={}
+
+		## Drop the nodes already processed
+		dropProcessed(native)
+
+	parser.close()
+
+
+def getCommunities(source: object, routeMapName: str, routeMapSequence: int=10) -> list:
+	"""
+		Return the BGP communities set by a sequence of a route-map, the parsing stops once the route-map is found.
+
+		Arguments:
+			source(object)         => The XML as str, bytes or file object.
+			routeMapName(str)      => Name of the route-map.
+			routeMapSequence(int)  => Sequence number (Default = 10)
+
+		Returns:
+			list
+	"""
+
+	## Variables
+	name: str
+	sequences: dict
+
+	for name, sequences in iterRouteMaps(source):
+		if name == routeMapName:
+			if int(routeMapSequence) in sequences:
+				return sequences[int(routeMapSequence)]["communities"]
+			return []
+
+	return []
+
+
+def hasNode(source: object, nodeName: str) -> bool:
+	"""
+		Return True if the XML contains a node with this name, the parsing stops at the first one.
+
+		Arguments:
+			source(object)  => The XML as str, bytes or file object.
+			nodeName(str)   => Name of the node without namespace.
+
+		Returns:
+			bool
+	"""
+
+	## Variables
+	event: str
+	element: object
+
+	for event, element in iterEvents(source, events=("start",), tag="{*}" + nodeName):
+		return True
+
+	return False